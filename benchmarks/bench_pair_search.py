@@ -0,0 +1,95 @@
+"""
+Benchmark for the soft-duplicate pair search (DuplicateDetector._find_similar_pairs).
+
+Generates synthetic pHash libraries of increasing size and times every
+pair_search_engine on them. Libraries are clustered like real photo sets:
+most images are unique, some have a few near copies (bursts, re-encodes).
+
+Usage (from the repository root):
+    python benchmarks/bench_pair_search.py
+    python benchmarks/bench_pair_search.py --sizes 1000 10000 --engines multi_index matrix
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.config_manager import ConfigManager  # noqa: E402
+from core.duplicate_detector import DuplicateDetector  # noqa: E402
+from core.hash_cache import HashCache  # noqa: E402
+
+DEFAULT_SIZES = [1_000, 2_000, 5_000, 10_000, 20_000, 50_000, 100_000]
+ENGINES = ["bktree", "matrix", "multi_index"]
+
+
+def synthetic_hashes(count: int, hash_size: int, seed: int = 42) -> dict:
+    """path -> hex pHash; about a fifth of the images get 1-3 variants within 1-12 bits."""
+    rng = random.Random(seed)
+    bits = hash_size * hash_size
+    hex_length = (bits + 3) // 4
+    hashes = {}
+    while len(hashes) < count:
+        base = rng.getrandbits(bits)
+        hashes[f"img_{len(hashes)}.jpg"] = format(base, f"0{hex_length}x")
+        if rng.random() < 0.2:
+            for _ in range(rng.randint(1, 3)):
+                if len(hashes) >= count:
+                    break
+                variant = base
+                for bit in rng.sample(range(bits), rng.randint(1, 12)):
+                    variant ^= 1 << bit
+                hashes[f"img_{len(hashes)}.jpg"] = format(variant, f"0{hex_length}x")
+    return hashes
+
+
+def make_detector(work_dir: Path, engine: str, hash_size: int) -> DuplicateDetector:
+    config = ConfigManager(work_dir / "config.json")
+    config.config.update({"pair_search_engine": engine, "hash_size": hash_size})
+    return DuplicateDetector(config, hash_cache=HashCache(work_dir / "hash_cache.db", work_dir / "none.json"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=ENGINES)
+    parser.add_argument("--hash-size", type=int, default=8)
+    parser.add_argument("--max-seconds", type=float, default=None,
+                        help="skip the larger sizes of an engine once one run took longer than this")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        detectors = {engine: make_detector(work_dir, engine, args.hash_size) for engine in args.engines}
+        print(f"threshold_soft={detectors[args.engines[0]].threshold_soft}, hash_size={args.hash_size}")
+        print(f"{'hashes':>8}  " + "  ".join(f"{engine:>14}" for engine in args.engines) + "  pairs")
+
+        too_slow = set()
+        for size in args.sizes:
+            hashes = synthetic_hashes(size, args.hash_size)
+            cells = []
+            pair_counts = set()
+            for engine in args.engines:
+                if engine in too_slow:
+                    cells.append(f"{'skipped':>14}")
+                    continue
+                start = time.perf_counter()
+                pairs = detectors[engine]._find_similar_pairs(hashes)
+                elapsed = time.perf_counter() - start
+                pair_counts.add(len(pairs))
+                cells.append(f"{elapsed:>13.2f}s")
+                if args.max_seconds is not None and elapsed > args.max_seconds:
+                    too_slow.add(engine)
+            # All engines must agree; a mismatch means one of them is wrong
+            pairs_cell = str(pair_counts.pop()) if len(pair_counts) == 1 else f"MISMATCH {sorted(pair_counts)}"
+            print(f"{size:>8}  " + "  ".join(cells) + f"  {pairs_cell}", flush=True)
+
+        for detector in detectors.values():
+            detector.hash_cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark for application startup: module imports and time to the first painted window.
+
+Each run starts a fresh interpreter that imports main, creates the MainWindow
+offscreen and processes events once after show(). Runs happen in a temporary
+working directory, so sessions and caches start empty and nothing in data/
+is touched. Also lists the slowest imports reported by python -X importtime.
+
+Usage (from the repository root):
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 10 --top 20
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Deferred until a scan or video needs them; see tests/test_startup.py
+HEAVY_MODULES = ["cv2", "numpy", "imagehash", "scipy", "PyQt6.QtMultimedia"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+import main
+imported = time.perf_counter()
+from PyQt6.QtWidgets import QApplication
+app = QApplication([])
+window = main.MainWindow()
+window.show()
+app.processEvents()
+painted = time.perf_counter()
+print(json.dumps({{
+    "imports": imported - start,
+    "first_paint": painted - start,
+    "heavy": [m for m in {heavy!r} if m in sys.modules],
+}}))
+window.close()
+"""
+
+
+def run_probe(work_dir: Path, extra_args=()) -> subprocess.CompletedProcess:
+    """Runs the startup probe in a fresh interpreter inside work_dir."""
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    probe = PROBE.format(root=str(ROOT), heavy=HEAVY_MODULES)
+    return subprocess.run([sys.executable, *extra_args, "-c", probe], cwd=work_dir, env=env,
+                          capture_output=True, text=True, timeout=120, check=True)
+
+
+def prepare_work_dir(work_dir: Path):
+    # Assets are looked up relative to the working directory (utils.path_utils.resource_path)
+    (work_dir / "assets").symlink_to(ROOT / "assets", target_is_directory=True)
+
+
+def parse_json_line(stdout: str) -> dict:
+    return json.loads(stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(stderr: str, top: int):
+    """(self microseconds, module) of the slowest modules in -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        own, _, name = line[len("import time:"):].split("|")
+        rows.append((int(own), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list, 0 to skip")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        prepare_work_dir(work_dir)
+
+        results = [parse_json_line(run_probe(work_dir).stdout) for _ in range(args.runs)]
+        print(f"{'':<14}{'min':>10}{'median':>10}{'max':>10}")
+        for key, label in (("imports", "imports"), ("first_paint", "first paint")):
+            values = [r[key] for r in results]
+            print(f"{label:<14}{min(values):>9.3f}s{statistics.median(values):>9.3f}s{max(values):>9.3f}s")
+        heavy = sorted({m for r in results for m in r["heavy"]})
+        print(f"heavy modules loaded at startup: {', '.join(heavy) if heavy else 'none'}")
+
+        if args.top:
+            print("\nslowest imports (-X importtime, own time without nested imports):")
+            for micros, name in slowest_imports(run_probe(work_dir, ("-X", "importtime")).stderr, args.top):
+                print(f"{micros / 1000:>9.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,10 +7,20 @@ class ConfigManager:
         "default_source_path": "",
         "default_destination_path": "",
         "thumbnail_cache_size": 500,
+        "thumbnail_disk_cache_mb": 1024,
+        "prefetch_next": 3,
+        "prefetch_previous": 1,
         "dupe_threshold": 5,
         "threshold_hard": 4,
         "threshold_soft": 10,
         "hash_size": 8,
+        "pair_search_engine": "multi_index",
+        "hash_fast_decode": True,
+        "hash_use_exif_thumbnail": False,
+        "hash_backend": "threads",
+        "hash_workers": 0,
+        "video_hash_workers": 1,
+        "video_fingerprint_frames": 8,
         "theme": "dark",
         "test_data_folder": ""
     }
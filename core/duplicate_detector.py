@@ -1,169 +1,894 @@
 import logging
 import imagehash
-import cv2
 import numpy as np
-import json
+import io
 import os
 import shutil
+import piexif
 from PIL import Image
 from pathlib import Path
-from typing import List, Tuple, Dict, Optional, Set, Any
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Tuple, Dict, Optional, Set, Any, Iterable
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import multiprocessing
+import queue
 import threading
 import time
+import hashlib
 from .config_manager import ConfigManager
+from .hash_cache import HashCache, content_key, CONTENT_SAMPLE_SIZE
+from .metadata_extractor import MetadataExtractor
+from .format_handlers import handler_for
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+DIGEST_CHUNK_SIZE = 1024 * 1024
+VIDEO_FINGERPRINT_PREFIX = "v:"
+VIDEO_FINGERPRINT_FRAMES = 8
+
+
+# Software tag values of editors, matched case-insensitively as substrings
+EDITOR_SOFTWARE = (
+    "photoshop", "lightroom", "gimp", "snapseed", "darktable", "rawtherapee", "affinity",
+    "capture one", "pixelmator", "luminar", "acdsee", "picasa", "paint", "digikam", "shotwell",
+)
+
+
+def _edited_after_capture(exif: Dict[str, Any]) -> bool:
+    """
+    True if the EXIF shows the file was saved again after it was taken: an editor in
+    Software, or a DateTime (last change) that differs from DateTimeOriginal.
+    Without DateTimeOriginal an edit cannot be ruled out, so that counts as edited too.
+    """
+    software = exif.get("0th", {}).get(piexif.ImageIFD.Software, b"")
+    if isinstance(software, bytes):
+        software = software.decode("latin-1", "replace")
+    if any(editor in software.lower() for editor in EDITOR_SOFTWARE):
+        return True
+
+    original = exif.get("Exif", {}).get(piexif.ExifIFD.DateTimeOriginal)
+    changed = exif.get("0th", {}).get(piexif.ImageIFD.DateTime)
+    if not original:
+        return True
+    return bool(changed) and changed != original
+
+
+def _exif_thumbnail(img: Image.Image, hash_size: int) -> Optional[Image.Image]:
+    """
+    Return the embedded EXIF thumbnail if it can stand in for the full image:
+    large enough for phash, with the same aspect ratio (no letterboxing or crop),
+    and from an unedited file. Editors often leave the camera's thumbnail in
+    place, which would make an edited photo hash like its original.
+    """
+    exif_bytes = img.info.get("exif")
+    if not exif_bytes:
+        return None
+    try:
+        exif = piexif.load(exif_bytes)
+        thumb_bytes = exif.get("thumbnail")
+        if not thumb_bytes or _edited_after_capture(exif):
+            return None
+        thumb = Image.open(io.BytesIO(thumb_bytes))
+        thumb.load()
+    except Exception:
+        return None
+
+    width, height = img.size
+    thumb_width, thumb_height = thumb.size
+    if min(thumb_width, thumb_height) < hash_size * 4:
+        return None
+    if abs((thumb_width / thumb_height) / (width / height) - 1) > 0.02:
+        return None
+    return thumb
+
+
+def compute_image_phash(image_path: str, hash_size: int, fast_decode: bool = False,
+                        use_exif_thumbnail: bool = False) -> imagehash.ImageHash:
+    """
+    Perceptual hash of an image. Raises on unreadable files.
+    With fast_decode, JPEGs are decoded at reduced scale (down to 1/8) via draft mode,
+    since phash only looks at a (hash_size * 4)² thumbnail anyway. With
+    use_exif_thumbnail, a trustworthy embedded thumbnail skips decoding entirely.
+    RAW and HEIC files are hashed from the preview of their format handler, as stored
+    (not rotated), like JPEGs.
+    """
+    handler = handler_for(image_path)
+    if handler is not None:
+        img = handler.open_preview(image_path, max_edge=hash_size * 16, upright=False)
+        if img is None:
+            raise ValueError(f"No preview in {image_path}")
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        return imagehash.phash(img, hash_size=hash_size)
+
+    with Image.open(image_path) as img:
+        if fast_decode and img.format == "JPEG":
+            thumb = _exif_thumbnail(img, hash_size) if use_exif_thumbnail else None
+            if thumb is not None:
+                img = thumb
+            else:
+                # Smallest DCT scale that still leaves headroom over the phash input size
+                img.draft("RGB", (hash_size * 16, hash_size * 16))
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        return imagehash.phash(img, hash_size=hash_size)
+
+
+def compute_video_fingerprint(video_path: str, hash_size: int, frames: int = VIDEO_FINGERPRINT_FRAMES) -> Optional[str]:
+    """
+    Fingerprint of a video: its duration plus the pHashes of `frames` evenly spaced
+    frames, encoded as "v:<duration ms>:<hash>,<hash>,...". None if no frame could be read.
+
+    The file is read once, front to back. Frames between two samples are skipped with
+    grab(), which leaves out retrieve() and the colour conversion. There is no
+    CAP_PROP_POS_FRAMES seek: with the long keyframe intervals of phone H.264 files,
+    every seek decodes again from the previous keyframe.
+    """
+    # OpenCV is only needed for videos; importing it costs more than the rest of this module
+    import cv2
+
+    # Suppress OpenCV/FFmpeg logging
+    try:
+        cv2.utils.logging.setLogLevel(cv2.utils.logging.LOG_LEVEL_ERROR)
+    except AttributeError:
+        pass
+
+    # Note: 'moov atom not found' is a C-level FFmpeg error printed to stderr.
+    # It's hard to suppress fully in Python without redirecting stderr file descriptors,
+    # which can be risky in a GUI app.
+    # We accept that corrupt files might print this, but we ensure the app doesn't crash.
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return None
+
+    hashes = []
+    try:
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        duration_ms = int(frame_count * 1000 / fps) if frame_count > 0 and fps > 0 else 0
+        if frame_count > 0:
+            # Centre of each of the equal segments, so the first and last frames (often black) are avoided
+            targets = sorted({int((i + 0.5) * frame_count / frames) for i in range(frames)})
+        else:
+            targets = [0]
+
+        position = 0
+        for target in targets:
+            grabbed = True
+            while position < target and grabbed:
+                grabbed = cap.grab()
+                position += 1
+            if not grabbed:
+                break
+            ret, frame = cap.read()
+            position += 1
+            if not ret or frame is None:
+                break
+            img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            hashes.append(str(imagehash.phash(img, hash_size=hash_size)))
+    finally:
+        cap.release()
+
+    if not hashes:
+        return None
+    return f"{VIDEO_FINGERPRINT_PREFIX}{duration_ms}:{','.join(hashes)}"
+
+
+def is_video_fingerprint(hash_value: str) -> bool:
+    return hash_value.startswith(VIDEO_FINGERPRINT_PREFIX)
+
+
+def parse_video_fingerprint(fingerprint: str) -> Tuple[int, List[int]]:
+    """(duration in ms, frame hashes as integers) of a fingerprint from compute_video_fingerprint."""
+    _, duration, hashes = fingerprint.split(":", 2)
+    return int(duration), [int(h, 16) for h in hashes.split(",")]
+
+
+def video_fingerprint_distance(a: Tuple[int, List[int]], b: Tuple[int, List[int]]) -> Optional[int]:
+    """
+    Sequence distance of two parsed fingerprints: the mean Hamming distance of the
+    frame hashes at the same relative positions, rounded so image thresholds apply.
+    None if the durations differ too much for the clips to be the same.
+    """
+    (duration_a, hashes_a), (duration_b, hashes_b) = a, b
+    if not _durations_match(duration_a, duration_b):
+        return None
+    count = min(len(hashes_a), len(hashes_b))
+    if not count:
+        return None
+    total = sum((x ^ y).bit_count() for x, y in zip(hashes_a[:count], hashes_b[:count]))
+    return round(total / count)
+
+
+def _durations_match(duration_a: int, duration_b: int) -> bool:
+    """Equal within 1 s or 5% (re-encodes shift the length slightly)."""
+    return abs(duration_a - duration_b) <= max(1000, 0.05 * max(duration_a, duration_b))
+
+
+def full_digest(path: str) -> Optional[str]:
+    """Digest of the whole file: xxh3-128 if xxhash is installed, otherwise BLAKE2b."""
+    digest = xxhash.xxh3_128() if xxhash else hashlib.blake2b(digest_size=16)
+    try:
+        with open(path, "rb") as f:
+            while chunk := f.read(DIGEST_CHUNK_SIZE):
+                digest.update(chunk)
+        return digest.hexdigest()
+    except OSError:
+        return None
+
+
+class IdenticalFileIndex:
+    """
+    Finds byte-identical files without decoding them. Files are bucketed by size
+    while they are discovered (register, cheap enough for the walking thread);
+    the digests are read later on the hashing workers (find_original). Only when
+    a size collides is a head/tail digest read (see hash_cache.content_key), and
+    only if that matches as well are the full contents hashed. Each identical set
+    keeps its first discovered file as representative.
+    """
+    def __init__(self):
+        self.by_size: Dict[int, List[str]] = {}  # size -> files in discovery order
+        self._copy_of: Dict[str, str] = {}  # copy -> representative
+        self._partial: Dict[str, Optional[str]] = {}
+        self._full: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    def _partial_digest(self, path: str, size: int) -> Optional[str]:
+        # Two workers may read the same file at once; both get the same digest
+        if path not in self._partial:
+            self._partial[path] = content_key(path, size)
+        return self._partial[path]
+
+    def _full_digest(self, path: str, size: int) -> Optional[str]:
+        if path not in self._full:
+            # Files up to the head/tail sample size were read entirely already
+            self._full[path] = full_digest(path) if size > 2 * CONTENT_SAMPLE_SIZE else self._partial_digest(path, size)
+        return self._full[path]
+
+    def register(self, path: str, size: int) -> List[str]:
+        """Records a discovered file without reading it. Returns the earlier files of the same size."""
+        if size <= 0:
+            return []
+        with self._lock:
+            bucket = self.by_size.setdefault(size, [])
+            earlier = [p for p in bucket if p not in self._copy_of]
+            bucket.append(path)
+        return earlier
+
+    def find_original(self, path: str, size: int, earlier: List[str]) -> Optional[str]:
+        """
+        Compares a registered file with the earlier files register returned.
+        Returns the representative if it is a copy of one of them, else None.
+        Identity is transitive, so the first match in discovery order is never
+        a copy itself.
+        """
+        if not earlier:
+            return None
+        partial = self._partial_digest(path, size)
+        if partial is None:
+            return None
+        for candidate in earlier:
+            if self._partial_digest(candidate, size) != partial:
+                continue
+            full = self._full_digest(path, size)
+            if full is not None and self._full_digest(candidate, size) == full:
+                with self._lock:
+                    self._copy_of[path] = candidate
+                return candidate
+        return None
+
+    def add(self, path: str, size: int) -> Optional[str]:
+        """Registers and checks a file in one step. Returns the representative if it is a copy, else None."""
+        return self.find_original(path, size, self.register(path, size))
+
+    def content_key(self, path: str) -> Optional[str]:
+        """The head/tail digest if it was read for the comparison, so the hash cache need not read it again."""
+        return self._partial.get(path)
+
+    @property
+    def copies(self) -> Dict[str, List[str]]:
+        """Representative -> identical later files."""
+        with self._lock:
+            copy_of = dict(self._copy_of)
+        order = {path: i for bucket in self.by_size.values() for i, path in enumerate(bucket)}
+        copies: Dict[str, List[str]] = {}
+        for path in sorted(copy_of, key=lambda p: order.get(p, 0)):
+            copies.setdefault(copy_of[path], []).append(path)
+        return copies
+
+    @property
+    def copy_count(self) -> int:
+        return len(self._copy_of)
+
+
+def _hash_batch(batch: List[Tuple[int, str, str]], hash_size: int, fast_decode: bool = False,
+                use_exif_thumbnail: bool = False) -> List[Tuple[int, Optional[int]]]:
+    """
+    Process-pool worker for images. Takes (path_id, path, type) tuples and returns
+    compact (path_id, hash_int) results; hash_int is None on failure.
+    Videos are fingerprinted on the detector's video thread pool instead.
+    """
+    results = []
+    for path_id, path, file_type in batch:
+        try:
+            hash_value = compute_image_phash(path, hash_size, fast_decode, use_exif_thumbnail)
+            results.append((path_id, int(str(hash_value), 16) if hash_value is not None else None))
+        except Exception:
+            results.append((path_id, None))
+    return results
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over integer hashes using the Hamming distance.
+    Answers "all hashes within radius r" without comparing against every entry,
+    since the triangle inequality lets whole subtrees be skipped.
+    """
+    def __init__(self):
+        self.root = None  # [hash_int, [items], {distance: child_node}]
+        self.size = 0
+
+    @staticmethod
+    def distance(a: int, b: int) -> int:
+        return (a ^ b).bit_count()
+
+    def add(self, hash_int: int, item: Any):
+        """Insert an item under the given hash. Equal hashes share one node."""
+        self.size += 1
+        if self.root is None:
+            self.root = [hash_int, [item], {}]
+            return
+
+        node = self.root
+        while True:
+            dist = self.distance(hash_int, node[0])
+            if dist == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(dist)
+            if child is None:
+                node[2][dist] = [hash_int, [item], {}]
+                return
+            node = child
+
+    def query(self, hash_int: int, radius: int) -> List[Tuple[Any, int]]:
+        """Return (item, distance) for every stored hash within radius."""
+        results = []
+        if self.root is None:
+            return results
+
+        stack = [self.root]
+        while stack:
+            node_hash, items, children = stack.pop()
+            dist = self.distance(hash_int, node_hash)
+            if dist <= radius:
+                for item in items:
+                    results.append((item, dist))
+            # Only children with |d(child, node) - dist| <= radius can match
+            low = dist - radius
+            high = dist + radius
+            for child_dist, child in children.items():
+                if low <= child_dist <= high:
+                    stack.append(child)
+        return results
+
+
+class HashMatrix:
+    """
+    Vectorized brute-force Hamming search over pHashes.
+    Hashes are packed into a (n, words) uint64 array, so hash sizes above 8
+    use multi-word rows. Pairs are found tile by tile with XOR plus a 16-bit
+    popcount lookup table, which keeps memory bounded for large libraries.
+    """
+    _POPCOUNT16 = np.array([bin(i).count("1") for i in range(1 << 16)], dtype=np.uint8)
+
+    def __init__(self, file_hashes: Dict[str, str], hash_size: int = 8, tile_size: int = 2048):
+        self.paths = list(file_hashes.keys())
+        self.tile_size = tile_size
+        self.words = max(1, (hash_size * hash_size + 63) // 64)
+        self.matrix = self._pack(file_hashes, self.paths, self.words)
+
+    @staticmethod
+    def _pack(file_hashes: Dict[str, str], paths: List[str], words: int) -> np.ndarray:
+        """Convert hex hash strings to a (n, words) big-endian uint64 matrix."""
+        row_bytes = words * 8
+        buffer = bytearray(len(paths) * row_bytes)
+        for row, path in enumerate(paths):
+            hex_str = file_hashes[path]
+            raw = bytes.fromhex(hex_str if len(hex_str) % 2 == 0 else "0" + hex_str)
+            # Left-pad so the integer value is preserved in the last word
+            start = row * row_bytes + row_bytes - len(raw)
+            buffer[start:start + len(raw)] = raw
+        return np.frombuffer(bytes(buffer), dtype=">u8").astype(np.uint64).reshape(len(paths), words)
+
+    def _distances(self, block_a: np.ndarray, block_b: np.ndarray) -> np.ndarray:
+        """Hamming distance matrix between two blocks of packed rows."""
+        xor = block_a[:, None, :] ^ block_b[None, :, :]
+        counts = self._POPCOUNT16[xor.view(np.uint16)]
+        return counts.sum(axis=-1, dtype=np.uint16)
+
+    def find_pairs(self, threshold: int, should_cancel=None) -> List[Tuple[int, int, int]]:
+        """
+        Return (i, j, dist) index triples with i < j and dist <= threshold,
+        ordered by i, then j.
+        """
+        hits = self.pairs_among(np.arange(len(self.paths)), threshold, should_cancel)
+        return [(int(i), int(j), int(d)) for i, j, d in hits]
+
+    def pairs_among(self, indices: np.ndarray, threshold: int, should_cancel=None) -> np.ndarray:
+        """
+        Compare all rows in indices (ascending) against each other.
+        Returns an (k, 3) array of (i, j, dist) with i < j, sorted by i, then j.
+        """
+        n = len(indices)
+        tile = self.tile_size
+        row_hits = []
+
+        for row_start in range(0, n, tile):
+            if should_cancel and should_cancel():
+                break
+            row_idx = indices[row_start:row_start + tile]
+            rows = self.matrix[row_idx]
+
+            for col_start in range(row_start, n, tile):
+                col_idx = indices[col_start:col_start + tile]
+                dist = self._distances(rows, self.matrix[col_idx])
+
+                mask = dist <= threshold
+                if col_start == row_start:
+                    # Diagonal tile: only keep the upper triangle (i < j)
+                    mask &= np.triu(np.ones(mask.shape, dtype=bool), k=1)
+
+                ii, jj = np.nonzero(mask)
+                if len(ii):
+                    row_hits.append(np.stack((row_idx[ii], col_idx[jj], dist[ii, jj]), axis=1))
+
+        if not row_hits:
+            return np.empty((0, 3), dtype=np.int64)
+        hits = np.concatenate(row_hits).astype(np.int64)
+        return hits[np.lexsort((hits[:, 1], hits[:, 0]))]
+
+
+class MultiIndexHash:
+    """
+    Multi-index hashing for near-duplicate candidate generation.
+    By the pigeonhole principle, two hashes within distance r that are split
+    into r + 1 disjoint blocks agree exactly on at least one block. Only rows
+    sharing a block bucket are compared, using the HashMatrix popcount kernel.
+    """
+    def __init__(self, hash_matrix: HashMatrix, hash_size: int, radius: int):
+        self.hash_matrix = hash_matrix
+        self.radius = radius
+        self.bits = hash_size * hash_size
+        # Blocks must stay below 64 bits so keys fit into a uint64
+        self.num_blocks = min(self.bits, max(radius + 1, -(-self.bits // 63)))
+        self.block_bounds = self._block_bounds(self.bits, self.num_blocks)
+        self.keys = self._block_keys()
+
+    @staticmethod
+    def _block_bounds(bits: int, num_blocks: int) -> List[Tuple[int, int]]:
+        """Split bit positions into num_blocks contiguous, near-equal blocks."""
+        base, extra = divmod(bits, num_blocks)
+        bounds = []
+        start = 0
+        for b in range(num_blocks):
+            width = base + (1 if b < extra else 0)
+            bounds.append((start, start + width))
+            start += width
+        return bounds
+
+    def _block_keys(self) -> np.ndarray:
+        """(n, num_blocks) uint64 array with the integer value of every block."""
+        matrix = self.hash_matrix.matrix
+        n, words = matrix.shape
+        # Unpack to bits, dropping the left padding of the first word
+        bit_rows = np.unpackbits(matrix.astype(">u8").view(np.uint8).reshape(n, words * 8), axis=1)
+        bit_rows = bit_rows[:, words * 64 - self.bits:]
+
+        keys = np.zeros((n, self.num_blocks), dtype=np.uint64)
+        for b, (start, end) in enumerate(self.block_bounds):
+            weights = np.left_shift(np.uint64(1), np.arange(end - start - 1, -1, -1, dtype=np.uint64))
+            keys[:, b] = (bit_rows[:, start:end].astype(np.uint64) * weights).sum(axis=1, dtype=np.uint64)
+        return keys
+
+    def candidate_pairs(self, should_cancel=None) -> np.ndarray:
+        """
+        Verified (i, j, dist) triples within radius, sorted by i, then j.
+        Each pair is reported only for the first block on which it collides.
+        """
+        if self.radius >= self.bits:
+            # More blocks than bits are impossible, so the pigeonhole argument fails; every pair is in range anyway
+            return self.hash_matrix.pairs_among(np.arange(len(self.hash_matrix.paths)), self.radius, should_cancel)
+
+        results = []
+        for b in range(self.num_blocks):
+            if should_cancel and should_cancel():
+                break
+            column = self.keys[:, b]
+            order = np.argsort(column, kind="stable")
+            sorted_keys = column[order]
+            # Bucket boundaries in the sorted order
+            edges = np.flatnonzero(np.diff(sorted_keys)) + 1
+            starts = np.concatenate(([0], edges))
+            ends = np.concatenate((edges, [len(order)]))
+
+            for start, end in zip(starts, ends):
+                if end - start < 2:
+                    continue
+                bucket = np.sort(order[start:end])
+                hits = self.hash_matrix.pairs_among(bucket, self.radius, should_cancel)
+                if b and len(hits):
+                    # Drop pairs already reported by an earlier block
+                    earlier = self.keys[hits[:, 0], :b] == self.keys[hits[:, 1], :b]
+                    hits = hits[~earlier.any(axis=1)]
+                if len(hits):
+                    results.append(hits)
+
+        if not results:
+            return np.empty((0, 3), dtype=np.int64)
+        hits = np.concatenate(results)
+        return hits[np.lexsort((hits[:, 1], hits[:, 0]))]
+
+    def find_pairs(self, should_cancel=None) -> List[Tuple[int, int, int]]:
+        return [(int(i), int(j), int(d)) for i, j, d in self.candidate_pairs(should_cancel)]
+
 
 class DuplicateDetector:
-    def __init__(self, config_manager: ConfigManager, session_manager=None):
+    PROCESS_BATCH_SIZE = 32  # Files per process-pool task
+
+    def __init__(self, config_manager: ConfigManager, session_manager=None, hash_cache: Optional[HashCache] = None,
+                 metadata_extractor: Optional[MetadataExtractor] = None):
         self.logger = logging.getLogger("FotoSortierer.DuplicateDetector")
         self.config = config_manager
         self.session_manager = session_manager
         self.hash_size = self.config.get("hash_size", 8)
         self.threshold_hard = self.config.get("threshold_hard", 4)
         self.threshold_soft = self.config.get("threshold_soft", 10)
+        self.pair_search_engine = self.config.get("pair_search_engine", "multi_index")
+        self.fast_decode = self.config.get("hash_fast_decode", True)
+        self.use_exif_thumbnail = self.config.get("hash_use_exif_thumbnail", False)
+        self.hash_backend = self.config.get("hash_backend", "threads")
+        self.hash_workers = self.config.get("hash_workers", 0) or os.cpu_count() or 4
+        # Videos get their own small pool, so long clips cannot occupy every image worker
+        self.video_hash_workers = self.config.get("video_hash_workers", 1)
+        self.video_fingerprint_frames = self.config.get("video_fingerprint_frames", VIDEO_FINGERPRINT_FRAMES)
         self.cancelled = False
-        self.cache_path = Path("cache/hash_cache.json")
-        self.hash_cache = self._load_cache()
-        self._lock = threading.Lock()
-
-    def _load_cache(self) -> Dict[str, str]:
-        """Load hash cache from disk."""
-        if self.cache_path.exists():
-            try:
-                with open(self.cache_path, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except Exception as e:
-                self.logger.error(f"Error loading cache: {e}")
-        return {}
+        self._last_report = 0.0
+        self.hash_cache = hash_cache or HashCache()
+        # Shared with the sorter (ExifManager), so both use one metadata cache
+        self.metadata_extractor = metadata_extractor or MetadataExtractor()
 
-    def _save_cache(self):
-        """Save hash cache to disk."""
-        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
-        try:
-            with open(self.cache_path, "w", encoding="utf-8") as f:
-                json.dump(self.hash_cache, f, indent=4)
-        except Exception as e:
-            self.logger.error(f"Error saving cache: {e}")
+    def _hash_params(self, file_type: str) -> str:
+        """
+        Describes how hashes of this file type are computed, stored with each cache
+        entry: a hash from another hash size, decode mode or frame count is a miss.
+        """
+        if file_type == "video":
+            return f"{self.hash_size}:video{self.video_fingerprint_frames}"
+        if not self.fast_decode:
+            decode = "full"
+        else:
+            decode = "exif" if self.use_exif_thumbnail else "draft"
+        return f"{self.hash_size}:{decode}"
 
     def calculate_phash_image(self, image_path: str) -> Optional[str]:
         """Calculate perceptual hash for an image."""
         try:
-            with Image.open(image_path) as img:
-                if img.mode not in ('RGB', 'L'):
-                    img = img.convert('RGB')
-                hash_value = imagehash.phash(img, hash_size=self.hash_size)
-                return str(hash_value)
+            return str(compute_image_phash(image_path, self.hash_size, self.fast_decode, self.use_exif_thumbnail))
         except Exception as e:
             self.logger.warning(f"Error hashing image {image_path}: {e}")
             return None
 
-    def calculate_phash_video(self, video_path: str) -> Optional[str]:
-        """Calculate perceptual hash for a video (middle frame)."""
+    def calculate_video_fingerprint(self, video_path: str) -> Optional[str]:
+        """Calculate the multi-frame fingerprint of a video."""
         try:
-            # Suppress OpenCV/FFmpeg logging
-            try:
-                cv2.utils.logging.setLogLevel(cv2.utils.logging.LOG_LEVEL_ERROR)
-            except AttributeError:
-                pass
-            
-            # Note: 'moov atom not found' is a C-level FFmpeg error printed to stderr.
-            # It's hard to suppress fully in Python without redirecting stderr file descriptors,
-            # which can be risky in a GUI app. 
-            # We accept that corrupt files might print this, but we ensure the app doesn't crash.
-            
-            cap = cv2.VideoCapture(video_path)
-            if not cap.isOpened():
-                return None
-            
-            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_count // 2)
-            ret, frame = cap.read()
-            cap.release()
-            
-            if ret and frame is not None:
-                img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-                hash_value = imagehash.phash(img, hash_size=self.hash_size)
-                return str(hash_value)
-            return None
+            return compute_video_fingerprint(video_path, self.hash_size, self.video_fingerprint_frames)
         except Exception as e:
             self.logger.warning(f"Error hashing video {video_path}: {e}")
             return None
 
-    def _get_file_hash(self, file_info: Dict[str, Any]) -> Tuple[str, Optional[str]]:
-        """Worker to get hash for a single file (check cache first)."""
+    def _get_file_hash(self, file_info: Dict[str, Any], identical: Optional[IdenticalFileIndex] = None,
+                       earlier: Optional[List[str]] = None) -> Tuple[str, Optional[str]]:
+        """
+        Worker to get hash for a single file (check cache first). With identical,
+        a copy of one of the earlier files (see IdenticalFileIndex.register) is not
+        hashed at all and the hash is None.
+        """
         if self.cancelled:
             return file_info["path"], None
 
         path = file_info["path"]
         mtime = file_info["mtime"]
         size = file_info["size"]
-        cache_key = f"{path}_{size}_{mtime}"
 
-        with self._lock:
-            if cache_key in self.hash_cache:
-                return path, self.hash_cache[cache_key]
+        key = None
+        if identical is not None:
+            if identical.find_original(path, size, earlier) is not None:
+                return path, None
+            key = identical.content_key(path)
+
+        params = self._hash_params(file_info["type"])
+        cached, key = self.hash_cache.lookup(path, size, mtime, key=key, params=params)
+        # Videos hashed before fingerprints existed carry a single frame hash
+        if cached and (file_info["type"] != "video" or is_video_fingerprint(cached)):
+            return path, cached
 
         # Calculate new hash
         if file_info["type"] == "video":
-            hash_val = self.calculate_phash_video(path)
+            hash_val = self.calculate_video_fingerprint(path)
         else:
             hash_val = self.calculate_phash_image(path)
 
         if hash_val:
-            with self._lock:
-                self.hash_cache[cache_key] = hash_val
+            self.hash_cache.put(path, size, mtime, hash_val, key=key, params=params)
         
         return path, hash_val
 
-    def scan_and_process(self, file_list: List[Dict[str, Any]], session_id: str, progress_callback=None) -> List[Tuple[str, str]]:
+    def scan_and_process(self, files: Iterable[Dict[str, Any]], session_id: str, progress_callback=None) -> List[Tuple[str, str]]:
         """
         Main entry point.
         1. Calculate hashes.
         2. Detect duplicates.
         3. Auto-delete hard duplicates.
         4. Return soft duplicates for review.
+
+        files may be a generator (see FileManager.iter_directory): hashing starts on
+        the first discovered file while the directory walk is still running.
+        progress_callback receives (current, total, deleted, review, status, scanning);
+        while scanning is True, total is the number of files discovered so far.
         """
         self.cancelled = False
-        self.logger.info(f"Processing {len(file_list)} files...")
+        self.logger.info("Processing files as they are discovered...")
+
+        # 1. Calculate Hashes (byte-identical copies are set aside instead of hashed)
+        file_list = []
+        identical = IdenticalFileIndex()
+        if self.hash_backend == "processes":
+            file_hashes = self._hash_with_processes(files, file_list, identical, progress_callback)
+        else:
+            file_hashes = self._hash_with_threads(files, file_list, identical, progress_callback)
+
+        if file_hashes is None:
+            return []
+
+        self.hash_cache.flush()
+        self.logger.info(f"Hashed {len(file_hashes)} of {len(file_list)} files, "
+                         f"skipped {identical.copy_count} byte-identical copies")
+        
+        if self.cancelled:
+            return []
+
+        # 2. Detect & Resolve
+        return self._resolve_duplicates(file_hashes, file_list, session_id, progress_callback, identical)
+
+    def _report_hashing(self, progress_callback, hashed: int, discovered: int, scanning: bool, force: bool = False):
+        """Throttled progress report for the hashing stage (at most every 100 ms)."""
+        if not progress_callback:
+            return
+        now = time.monotonic()
+        if force or now - self._last_report >= 0.1:
+            self._last_report = now
+            # During hashing, deleted and review are 0
+            progress_callback(hashed, discovered, 0, 0, "Analysiere Dateien...", scanning)
 
-        # 1. Calculate Hashes
+    def _hash_with_threads(self, files: Iterable[Dict[str, Any]], file_list: List[Dict[str, Any]],
+                           identical: IdenticalFileIndex, progress_callback=None) -> Optional[Dict[str, str]]:
+        """
+        Hash files on a thread pool, submitting each file as soon as it is discovered.
+        Discovered files are appended to file_list; the workers compare them with
+        earlier files of the same size and only register copies in identical.
+        Returns None if cancelled.
+        """
         file_hashes = {}
-        total = len(file_list)
+        done_queue = queue.Queue()
         processed = 0
+        self._last_report = 0.0
 
-        with ThreadPoolExecutor(max_workers=os.cpu_count() or 4) as executor:
-            futures = {executor.submit(self._get_file_hash, f): f for f in file_list}
-            
-            for future in as_completed(futures):
-                if self.cancelled:
-                    executor.shutdown(wait=False, cancel_futures=True)
-                    return []
-                
-                path, hash_val = future.result()
+        def collect(block: bool):
+            nonlocal processed
+            while True:
+                try:
+                    future = done_queue.get(timeout=0.2) if block else done_queue.get_nowait()
+                except queue.Empty:
+                    return
+                block = False
+                try:
+                    path, hash_val = future.result()
+                except Exception as e:
+                    self.logger.error(f"Hashing worker failed: {e}")
+                    path, hash_val = None, None
                 if hash_val:
                     file_hashes[path] = hash_val
-                
                 processed += 1
-                if progress_callback:
-                    # During hashing, deleted and review are 0
-                    progress_callback(processed, total, 0, 0, "Analysiere Dateien...")
 
-        self._save_cache()
-        
+        executor = ThreadPoolExecutor(max_workers=self.hash_workers)
+        video_executor = ThreadPoolExecutor(max_workers=self.video_hash_workers)
+        try:
+            for file_info in files:
+                if self.cancelled:
+                    return None
+                file_list.append(file_info)
+                earlier = identical.register(file_info["path"], file_info["size"])
+                pool = video_executor if file_info["type"] == "video" else executor
+                pool.submit(self._get_file_hash, file_info, identical, earlier).add_done_callback(done_queue.put)
+                collect(block=False)
+                self._report_hashing(progress_callback, processed, len(file_list), scanning=True)
+
+            while processed < len(file_list):
+                if self.cancelled:
+                    return None
+                collect(block=True)
+                self._report_hashing(progress_callback, processed, len(file_list), scanning=False)
+            self._report_hashing(progress_callback, processed, len(file_list), scanning=False, force=True)
+        finally:
+            executor.shutdown(wait=not self.cancelled, cancel_futures=True)
+            video_executor.shutdown(wait=not self.cancelled, cancel_futures=True)
+            self.hash_cache.flush()
+
+        return file_hashes
+
+    def _prepare_image(self, file_info: Dict[str, Any], identical: IdenticalFileIndex,
+                       earlier: List[str]) -> Tuple[Optional[str], Optional[str], bool]:
+        """
+        Pre-pass of the process backend, run on its prepare threads: the identical
+        check and the cache lookup, both of which read the file. Returns
+        (cached hash, content key, is copy).
+        """
         if self.cancelled:
-            return []
+            return None, None, True
+        path, size = file_info["path"], file_info["size"]
+        if identical.find_original(path, size, earlier) is not None:
+            return None, None, True
+        cached, key = self.hash_cache.lookup(path, size, file_info["mtime"], key=identical.content_key(path),
+                                             params=self._hash_params(file_info["type"]))
+        return cached, key, False
 
-        # 2. Detect & Resolve
-        return self._resolve_duplicates(file_hashes, file_list, session_id, progress_callback)
+    def _hash_with_processes(self, files: Iterable[Dict[str, Any]], file_list: List[Dict[str, Any]],
+                             identical: IdenticalFileIndex, progress_callback=None) -> Optional[Dict[str, str]]:
+        """
+        Hash files on a process pool, sidestepping the GIL held by PIL, imagehash and scipy.
+        The identical check and cache lookup run on a small thread pool in this process
+        while the walk runs; uncached files are sent to workers in batches and come back
+        as (path_id, hash_int) pairs. Videos go to a separate thread pool (OpenCV decodes
+        without holding the GIL).
+        Discovered files are appended to file_list; copies of earlier files are only
+        registered in identical. Returns None if cancelled.
+        """
+        file_hashes = {}
+        done_queue = queue.Queue()  # (future, kind, payload)
+        processed = 0
+        preparing = 0
+        self._last_report = 0.0
+        hex_length = (self.hash_size * self.hash_size + 3) // 4
+        uncached = []  # path_id -> (file_info, content key)
+        batch = []
+
+        def collect(block: bool):
+            nonlocal processed, preparing, batch
+            while True:
+                try:
+                    future, kind, payload = done_queue.get(timeout=0.2) if block else done_queue.get_nowait()
+                except queue.Empty:
+                    return
+                block = False
+                if kind == "video":
+                    # Video from the thread pool, already cached by _get_file_hash
+                    try:
+                        path, hash_val = future.result()
+                    except Exception as e:
+                        self.logger.error(f"Hashing worker failed: {e}")
+                        path, hash_val = None, None
+                    if hash_val:
+                        file_hashes[path] = hash_val
+                    processed += 1
+                    continue
+                if kind == "prepare":
+                    preparing -= 1
+                    file_info = payload
+                    try:
+                        cached, key, is_copy = future.result()
+                    except Exception as e:
+                        self.logger.error(f"Hashing worker failed: {e}")
+                        cached, key, is_copy = None, None, True
+                    if cached or is_copy:
+                        if cached:
+                            file_hashes[file_info["path"]] = cached
+                        processed += 1
+                    else:
+                        batch.append((len(uncached), file_info["path"], file_info["type"]))
+                        uncached.append((file_info, key))
+                        if len(batch) >= self.PROCESS_BATCH_SIZE:
+                            submit(batch)
+                            batch = []
+                    continue
+                try:
+                    results = future.result()
+                except Exception as e:
+                    self.logger.error(f"Hashing worker failed: {e}")
+                    results = [(path_id, None) for path_id, _, _ in payload]
+
+                for path_id, hash_int in results:
+                    if hash_int is None:
+                        continue
+                    file_info, key = uncached[path_id]
+                    hash_val = format(hash_int, f"0{hex_length}x")
+                    file_hashes[file_info["path"]] = hash_val
+                    self.hash_cache.put(file_info["path"], file_info["size"], file_info["mtime"], hash_val, key=key,
+                                        params=self._hash_params(file_info["type"]))
+                processed += len(payload)
 
-    def _resolve_duplicates(self, file_hashes: Dict[str, str], file_list: List[Dict[str, Any]], session_id: str, progress_callback=None) -> List[Tuple[str, str]]:
+        def submit(batch_items):
+            future = executor.submit(_hash_batch, batch_items, self.hash_size, self.fast_decode, self.use_exif_thumbnail)
+            future.add_done_callback(lambda f, b=batch_items: done_queue.put((f, "batch", b)))
+
+        # Never fork: this runs on a QThread next to Qt, SQLite and logging threads,
+        # and a forked child would inherit their locks in whatever state they are in
+        executor = ProcessPoolExecutor(max_workers=self.hash_workers, mp_context=multiprocessing.get_context("spawn"))
+        prepare_executor = ThreadPoolExecutor(max_workers=self.hash_workers)
+        video_executor = ThreadPoolExecutor(max_workers=self.video_hash_workers)
+        try:
+            for file_info in files:
+                if self.cancelled:
+                    return None
+                file_list.append(file_info)
+
+                earlier = identical.register(file_info["path"], file_info["size"])
+                if file_info["type"] == "video":
+                    video_executor.submit(self._get_file_hash, file_info, identical, earlier).add_done_callback(
+                        lambda f: done_queue.put((f, "video", None)))
+                else:
+                    preparing += 1
+                    prepare_executor.submit(self._prepare_image, file_info, identical, earlier).add_done_callback(
+                        lambda f, info=file_info: done_queue.put((f, "prepare", info)))
+
+                collect(block=False)
+                self._report_hashing(progress_callback, processed, len(file_list), scanning=True)
+
+            while processed < len(file_list):
+                # Wake up regularly so cancel() takes effect without waiting for a whole batch
+                if self.cancelled:
+                    return None
+                # The last, partial batch goes out once every file has been looked up
+                if batch and not preparing:
+                    submit(batch)
+                    batch = []
+                collect(block=True)
+                self._report_hashing(progress_callback, processed, len(file_list), scanning=False)
+            self._report_hashing(progress_callback, processed, len(file_list), scanning=False, force=True)
+        finally:
+            prepare_executor.shutdown(wait=not self.cancelled, cancel_futures=True)
+            executor.shutdown(wait=not self.cancelled, cancel_futures=True)
+            video_executor.shutdown(wait=not self.cancelled, cancel_futures=True)
+            self.hash_cache.flush()
+
+        return file_hashes
+
+    def _resolve_duplicates(self, file_hashes: Dict[str, str], file_list: List[Dict[str, Any]], session_id: str, progress_callback=None,
+                            identical: Optional[IdenticalFileIndex] = None) -> List[Tuple[str, str]]:
         """
         Compare hashes, delete hard duplicates, return soft pairs.
         """
         # Map path -> file_info for quick lookup
         file_map = {f["path"]: f for f in file_list}
         total_files = len(file_list)
+        deleted_files = set()
         
+        # Byte-identical copies: keep one of each set, it alone takes part in the pHash comparison
+        identical_copies = identical.copies if identical else {}
+        if identical_copies:
+            for representative, copies in identical_copies.items():
+                group = [representative] + copies
+                self._auto_delete_group(group, file_map, session_id, deleted_files)
+                if representative in deleted_files and representative in file_hashes:
+                    keeper = next((p for p in group if p not in deleted_files), None)
+                    hash_val = file_hashes.pop(representative)
+                    if keeper:
+                        file_hashes[keeper] = hash_val
+            if progress_callback:
+                progress_callback(total_files, total_files, len(deleted_files), 0, "Lösche exakte Duplikate...")
         
         # Group by Hash (Exact Duplicates)
         exact_groups = {}
@@ -173,7 +898,6 @@ class DuplicateDetector:
             exact_groups[h].append(path)
 
         # Process groups with same hash
-        deleted_files = set()
         soft_duplicate_pairs = []
         
         for h, paths in exact_groups.items():
@@ -228,38 +952,12 @@ class DuplicateDetector:
         remaining_paths = [p for p in file_hashes.keys() if p not in deleted_files]
         remaining_hashes = {p: file_hashes[p] for p in remaining_paths}
         
-        uncertain_pairs = []
-        checked_pairs = set()
-
-        paths = list(remaining_hashes.keys())
-        n = len(paths)
-        
-        self.logger.info(f"Checking {n} files for soft duplicates...")
+        self.logger.info(f"Checking {len(remaining_hashes)} files for soft duplicates...")
 
-        hash_objects = {p: imagehash.hex_to_hash(h) for p, h in remaining_hashes.items()}
-        path_list = list(hash_objects.keys())
-        
-        for i in range(n):
-            if self.cancelled: break
-            
-            p1 = path_list[i]
-            h1 = hash_objects[p1]
-            
-            for j in range(i + 1, n):
-                p2 = path_list[j]
-                h2 = hash_objects[p2]
-                
-                dist = h1 - h2
-                
-                if dist <= self.threshold_hard:
-                    # Hard duplicate missed by exact match
-                    pass 
-                
-                if dist <= self.threshold_soft:
-                    pair = tuple(sorted((p1, p2)))
-                    if pair not in checked_pairs:
-                        checked_pairs.add(pair)
-                        uncertain_pairs.append((p1, p2, dist))
+        # Video fingerprints are sequences and are compared among themselves only
+        image_hashes = {p: h for p, h in remaining_hashes.items() if not is_video_fingerprint(h)}
+        video_fingerprints = {p: h for p, h in remaining_hashes.items() if is_video_fingerprint(h)}
+        uncertain_pairs = self._find_similar_pairs(image_hashes) + self._find_similar_videos(video_fingerprints)
 
         # Now process the found pairs
         final_soft_pairs = []
@@ -324,6 +1022,68 @@ class DuplicateDetector:
         self.logger.info(f"Auto-deleted hard duplicates. Found {len(all_soft_pairs)} soft pairs for review.")
         return all_soft_pairs
 
+    def _find_similar_videos(self, fingerprints: Dict[str, str]) -> List[Tuple[str, str, int]]:
+        """
+        Find all video pairs whose sequence distance is within threshold_soft.
+        Only clips of similar duration are compared, found by a sweep over the
+        duration-sorted list. Returns (p1, p2, dist) with p1 before p2 in the input order.
+        """
+        order = {p: i for i, p in enumerate(fingerprints)}
+        parsed = []
+        for path, fingerprint in fingerprints.items():
+            try:
+                parsed.append((path, parse_video_fingerprint(fingerprint)))
+            except ValueError:
+                self.logger.warning(f"Ignoring malformed video fingerprint for {path}")
+        parsed.sort(key=lambda item: item[1][0])
+
+        found = []
+        for i, (path_a, fp_a) in enumerate(parsed):
+            if self.cancelled:
+                break
+            for path_b, fp_b in parsed[i + 1:]:
+                if not _durations_match(fp_a[0], fp_b[0]):
+                    break
+                dist = video_fingerprint_distance(fp_a, fp_b)
+                if dist is not None and dist <= self.threshold_soft:
+                    found.append((path_a, path_b, dist) if order[path_a] < order[path_b] else (path_b, path_a, dist))
+        found.sort(key=lambda pair: (order[pair[0]], order[pair[1]]))
+        return found
+
+    def _find_similar_pairs(self, hashes: Dict[str, str]) -> List[Tuple[str, str, int]]:
+        """
+        Find all path pairs whose hashes are within threshold_soft.
+        Returns (p1, p2, dist) with p1 before p2 in the input order.
+        """
+        paths = list(hashes.keys())
+        if self.pair_search_engine in ("multi_index", "matrix"):
+            matrix = HashMatrix(hashes, hash_size=self.hash_size)
+            if self.pair_search_engine == "multi_index":
+                # Hard pairs are a subset of soft pairs, so the wider radius decides the layout
+                radius = max(self.threshold_soft, self.threshold_hard)
+                index = MultiIndexHash(matrix, self.hash_size, radius)
+                found = index.find_pairs(should_cancel=lambda: self.cancelled)
+                found = [(i, j, dist) for i, j, dist in found if dist <= self.threshold_soft]
+            else:
+                found = matrix.find_pairs(self.threshold_soft, should_cancel=lambda: self.cancelled)
+            return [(paths[i], paths[j], dist) for i, j, dist in found]
+
+        tree = BKTree()
+        found = []
+
+        # Query before inserting, so every pair is reported exactly once
+        for j, path in enumerate(paths):
+            if self.cancelled:
+                break
+            h = int(hashes[path], 16)
+            for i, dist in tree.query(h, self.threshold_soft):
+                found.append((i, j, dist))
+            tree.add(h, j)
+
+        # Keep the same ordering as a nested i < j loop
+        found.sort()
+        return [(paths[i], paths[j], dist) for i, j, dist in found]
+
     def _auto_delete_group(self, paths: List[str], file_map: Dict[str, Any], session_id: str, deleted_set: Set[str]):
         """
         Keep the best file, delete others.
@@ -357,12 +1117,13 @@ class DuplicateDetector:
                         counter += 1
                     
                     shutil.move(str(src), str(dst))
+                    self.hash_cache.relocate(file_path, str(dst))
                     deleted_set.add(file_path)
                     self.logger.info(f"Auto-deleted hard duplicate: {file_path} -> {dst}")
                     
                     # Update session stats
                     if self.session_manager:
-                        self.session_manager.update_deleted_stats(session_id, file_size)
+                        self.session_manager.update_deleted_stats(session_id, file_size, file_path, dst)
             except Exception as e:
                 self.logger.error(f"Error moving file {file_path}: {e}")
 
@@ -373,31 +1134,18 @@ class DuplicateDetector:
         """Extract basic metadata from an image for UI display."""
         path = Path(image_path)
         try:
-            if not path.exists():
+            metadata = self.metadata_extractor.read_metadata(image_path)
+            if metadata is None:
                 return {"filename": path.name, "date": "N/A", "time": "N/A", "camera": "N/A"}
             
-            stat = path.stat()
-            mtime = time.localtime(stat.st_mtime)
-            
-            # Try to get EXIF data
-            camera = "Unbekannt"
-            try:
-                with Image.open(path) as img:
-                    exif = img.getexif()
-                    if exif:
-                        # 271: Make, 272: Model
-                        make = exif.get(271, "")
-                        model = exif.get(272, "")
-                        if make or model:
-                            camera = f"{make} {model}".strip()
-            except:
-                pass
+            mtime = time.localtime(metadata["mtime"])
+            camera = f"{metadata['camera_make'] or ''} {metadata['camera_model'] or ''}".strip()
             
             return {
                 "filename": path.name,
                 "date": time.strftime("%d.%m.%Y", mtime),
                 "time": time.strftime("%H:%M", mtime),
-                "camera": camera
+                "camera": camera or "Unbekannt"
             }
         except Exception as e:
             self.logger.error(f"Error getting metadata for {path}: {e}")
@@ -429,11 +1177,12 @@ class DuplicateDetector:
                 counter += 1
             
             shutil.move(str(src), str(dst))
+            self.hash_cache.relocate(str(src), str(dst))
             self.logger.info(f"Moved to trash: {src} -> {dst}")
             
             # Update session stats
             if self.session_manager:
-                self.session_manager.update_deleted_stats(session_id, file_size)
+                self.session_manager.update_deleted_stats(session_id, file_size, str(src), dst)
             
             return True
         except Exception as e:
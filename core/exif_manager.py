@@ -1,10 +1,40 @@
+import io
 import logging
+import os
+import shutil
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 import piexif
 from PIL import Image
 from .metadata_extractor import MetadataExtractor
 
+def _read_jpeg_header(f):
+    """
+    Reads the marker segments between SOI and the image data of a JPEG whose SOI was consumed.
+    Returns (segments as raw bytes including marker and length, offset where the image data starts).
+    """
+    f.seek(2)
+    segments = []
+    while True:
+        marker = f.read(2)
+        while marker[:1] == b"\xff" and marker[1:] == b"\xff":
+            marker = b"\xff" + f.read(1)  # Fill bytes before a marker
+        if len(marker) < 2 or marker[0] != 0xFF:
+            raise ValueError("Corrupt JPEG header")
+        if marker[1] in (0xDA, 0xD9):  # Start of scan / end of image
+            return segments, f.tell() - 2
+        length_bytes = f.read(2)
+        length = struct.unpack(">H", length_bytes)[0]
+        segments.append(marker + length_bytes + f.read(length - 2))
+
+
+def _is_exif_segment(segment):
+    return segment[:2] == b"\xff\xe1" and segment[4:10] == b"Exif\x00\x00"
+
+
 class ExifManager(MetadataExtractor):
     """
     Manages reading and writing of EXIF metadata.
@@ -16,30 +46,57 @@ class ExifManager(MetadataExtractor):
 
     def get_metadata(self, file_path):
         """
-        Returns a dictionary of relevant metadata.
+        Returns a dictionary of relevant metadata (see MetadataExtractor.read_metadata).
+        Raises FileNotFoundError if the file is gone.
         """
-        date_taken = self.get_date_taken(file_path)
-        camera_model = self._get_camera_model(file_path)
-        
-        return {
-            "date_taken": date_taken,
-            "camera_model": camera_model,
-            "filename": Path(file_path).name,
-            "filesize": Path(file_path).stat().st_size,
-            # Add resolution if needed, can be read from Image.open()
-        }
+        metadata = self.read_metadata(file_path)
+        if metadata is None:
+            raise FileNotFoundError(file_path)
+        metadata["camera_model"] = metadata["camera_model"] or "Unknown"
+        return metadata
 
     def _get_camera_model(self, file_path):
+        metadata = self.read_metadata(file_path)
+        return (metadata and metadata["camera_model"]) or "Unknown"
+
+    def _write_exif(self, path, exif_bytes):
+        """
+        Replaces the EXIF block of a file via a temp file next to it and a rename,
+        so a crash never leaves a half-written photo.
+        JPEG: only the header segments are rewritten; the compressed image data is
+        streamed through byte for byte and other segments (ICC profile, XMP, ...) are kept.
+        WebP: the EXIF chunk is swapped with piexif.insert. Other formats are re-saved by Pillow.
+        """
+        tmp_path = path.with_name(f".{path.name}.exif.tmp")
         try:
-            img = Image.open(file_path)
-            if "exif" in img.info:
-                exif_dict = piexif.load(img.info["exif"])
-                model = exif_dict.get("0th", {}).get(piexif.ImageIFD.Model)
-                if model:
-                    return model.decode("utf-8").strip()
-        except Exception:
-            pass
-        return "Unknown"
+            with open(path, "rb") as src, open(tmp_path, "wb") as dst:
+                magic = src.read(12)
+                if magic[:2] == b"\xff\xd8":
+                    segments, data_offset = _read_jpeg_header(src)
+                    segments = [seg for seg in segments if not _is_exif_segment(seg)]
+                    app1 = b"\xff\xe1" + struct.pack(">H", len(exif_bytes) + 2) + exif_bytes
+                    # EXIF goes first, or right after a JFIF APP0 segment
+                    segments.insert(1 if segments and segments[0][:2] == b"\xff\xe0" else 0, app1)
+                    dst.write(b"\xff\xd8")
+                    dst.writelines(segments)
+                    src.seek(data_offset)
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+                elif magic[:4] == b"RIFF" and magic[8:12] == b"WEBP":
+                    src.seek(0)
+                    output = io.BytesIO()
+                    piexif.insert(exif_bytes, src.read(), output)
+                    dst.write(output.getbuffer())
+                else:
+                    dst.close()
+                    with Image.open(path) as img:
+                        img.save(tmp_path, format=img.format, exif=exif_bytes)
+                if not dst.closed:
+                    dst.flush()
+                    os.fsync(dst.fileno())
+            shutil.copymode(path, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
 
     def supports_exif(self, file_path):
         """
@@ -64,14 +121,12 @@ class ExifManager(MetadataExtractor):
             return False
 
         try:
-            img = Image.open(path)
             exif_dict = {"0th": {}, "Exif": {}, "1st": {}, "thumbnail": None, "GPS": {}}
-            
-            if "exif" in img.info:
-                try:
-                    exif_dict = piexif.load(img.info["exif"])
-                except Exception:
-                    pass # Start fresh if corrupt
+            try:
+                # Reads only the EXIF segment, not the image data
+                exif_dict = piexif.load(str(path))
+            except Exception:
+                pass # Start fresh if corrupt
 
             # Update Date Taken
             if "date_taken" in new_data and isinstance(new_data["date_taken"], datetime):
@@ -85,9 +140,82 @@ class ExifManager(MetadataExtractor):
                 exif_dict["0th"][piexif.ImageIFD.Model] = new_data["camera_model"].encode("utf-8")
 
             exif_bytes = piexif.dump(exif_dict)
-            img.save(path, exif=exif_bytes)
+            self._write_exif(path, exif_bytes)
+            self.invalidate_metadata(path)
             return True
 
         except Exception as e:
             self.logger.error(f"Failed to update EXIF for {path}: {e}")
             return False
+
+    def select_files(self, file_paths, folder=None, date_from=None, date_to=None, metadata_lookup=None,
+                     should_cancel=None):
+        """
+        Filters file_paths to those inside folder (including subfolders) whose date taken
+        lies within [date_from, date_to]. Each criterion is optional.
+        metadata_lookup(path) may return already known metadata (e.g. MetadataIndex.lookup)
+        or None; only files it does not know are read. Returns [] once should_cancel() is True.
+        """
+        folder = os.path.join(os.path.abspath(folder), "") if folder else None
+        selected = []
+        for file_path in file_paths:
+            if should_cancel and should_cancel():
+                return []
+            if folder and not os.path.abspath(file_path).startswith(folder):
+                continue
+            if date_from or date_to:
+                metadata = metadata_lookup(file_path) if metadata_lookup else None
+                date_taken = metadata["date_taken"] if metadata else self.get_date_taken(file_path)
+                if date_taken is None or (date_from and date_taken < date_from) or (date_to and date_taken > date_to):
+                    continue
+            selected.append(file_path)
+        return selected
+
+    def batch_update(self, file_paths, date_taken=None, time_offset=None, camera_model=None,
+                     progress_callback=None, should_cancel=None, max_workers=4):
+        """
+        Applies one edit to many files on a thread pool, each written losslessly by update_metadata.
+        date_taken sets a fixed date, time_offset (timedelta) shifts each file's recorded date taken,
+        camera_model sets the camera. Files without EXIF support are skipped, and so are files
+        without a recorded date when shifting (their modification time is no date to shift).
+
+        progress_callback(done, total) is called from worker threads. should_cancel() is
+        polled before each file; once it returns True the remaining files are skipped.
+        Returns {"updated": [...], "failed": [...], "skipped": [...]}.
+        """
+        result = {"updated": [], "failed": [], "skipped": []}
+        lock = threading.Lock()
+        total = len(file_paths)
+
+        def edit(file_path):
+            if (should_cancel and should_cancel()) or not self.supports_exif(file_path):
+                outcome = "skipped"
+            else:
+                new_data = {}
+                if camera_model:
+                    new_data["camera_model"] = camera_model
+                if date_taken is not None:
+                    new_data["date_taken"] = date_taken
+                elif time_offset is not None:
+                    current = self.get_recorded_date_taken(file_path)
+                    try:
+                        new_data["date_taken"] = current + time_offset
+                    except (TypeError, OverflowError):
+                        pass  # No date, or shifted out of range
+                if not new_data:
+                    outcome = "skipped"
+                else:
+                    outcome = "updated" if self.update_metadata(file_path, new_data) else "failed"
+            with lock:
+                result[outcome].append(file_path)
+                done = sum(len(paths) for paths in result.values())
+            if progress_callback:
+                progress_callback(done, total)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for future in [executor.submit(edit, file_path) for file_path in file_paths]:
+                future.result()
+
+        self.logger.info(f"Batch EXIF edit: {len(result['updated'])} updated, "
+                         f"{len(result['failed'])} failed, {len(result['skipped'])} skipped")
+        return result
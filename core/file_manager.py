@@ -2,13 +2,14 @@ import os
 import logging
 import time
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Set
+from .format_handlers import handler_for, handled_extensions
 
 class FileManager:
+    VIDEO_EXTENSIONS = {'.mp4', '.mov', '.avi', '.3gp'}
     VALID_EXTENSIONS = {
         '.jpg', '.jpeg', '.png', '.gif', '.webp',  # Images
-        '.mp4', '.mov', '.avi', '.3gp'             # Videos
-    }
+    } | VIDEO_EXTENSIONS
 
     def __init__(self):
         self.logger = logging.getLogger("FotoSortierer.FileManager")
@@ -18,35 +19,38 @@ class FileManager:
         Recursively scans the directory for valid media files.
         Returns a list of dictionaries containing file metadata.
         """
+        media_files = list(self.iter_directory(source_path))
+        self.logger.info(f"Found {len(media_files)} media files in {source_path}")
+        return media_files
+
+    def iter_directory(self, source_path: str, dir_mtimes: Optional[Dict[str, int]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Generator mode of scan_directory: yields each file's metadata dictionary
+        as soon as it is found, so consumers can start before the walk finishes.
+        If dir_mtimes is given, it is filled with {directory: st_mtime_ns} for every
+        directory walked (used by session manifests).
+        """
         path = Path(source_path)
-        media_files = []
 
         if not path.exists() or not path.is_dir():
             self.logger.error(f"Invalid source path: {source_path}")
-            return []
+            return
 
         self.logger.info(f"Starting recursive scan of {source_path}")
 
         try:
             # Using os.walk for robust recursive scanning
             for root, _, files in os.walk(path):
+                if dir_mtimes is not None:
+                    try:
+                        dir_mtimes[root] = os.stat(root).st_mtime_ns
+                    except OSError:
+                        pass
                 for file in files:
                     try:
-                        file_path = Path(root) / file
-                        
-                        # Check extension (case-insensitive)
-                        if file_path.suffix.lower() in self.VALID_EXTENSIONS:
-                            # Get basic metadata
-                            stat = file_path.stat()
-                            
-                            file_info = {
-                                "path": str(file_path),
-                                "size": stat.st_size,
-                                "mtime": stat.st_mtime,
-                                "extension": file_path.suffix.lower(),
-                                "type": "video" if file_path.suffix.lower() in {'.mp4', '.mov', '.avi', '.3gp'} else "image"
-                            }
-                            media_files.append(file_info)
+                        file_info = self._file_info(Path(root) / file)
+                        if file_info:
+                            yield file_info
                             
                     except (PermissionError, OSError) as e:
                         self.logger.warning(f"Skipping file {file}: {e}")
@@ -57,8 +61,116 @@ class FileManager:
         except Exception as e:
             self.logger.error(f"Error scanning directory {source_path}: {e}")
 
-        self.logger.info(f"Found {len(media_files)} media files in {source_path}")
-        return media_files
+    def media_extensions(self) -> Set[str]:
+        """All extensions that are scanned, including those read through format handlers."""
+        return self.VALID_EXTENSIONS | handled_extensions()
+
+    def _file_info(self, file_path: Path) -> Optional[Dict[str, Any]]:
+        """Metadata dictionary for a media file, or None if the extension is not supported."""
+        # Check extension (case-insensitive); RAW, HEIC etc. are read through format handlers
+        if file_path.suffix.lower() not in self.VALID_EXTENSIONS and handler_for(file_path) is None:
+            return None
+
+        # Get basic metadata
+        stat = file_path.stat()
+        return {
+            "path": str(file_path),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "extension": file_path.suffix.lower(),
+            "type": "video" if file_path.suffix.lower() in self.VIDEO_EXTENSIONS else "image"
+        }
+
+    def build_manifest(self, source_path: str) -> Dict[str, Any]:
+        """
+        Full walk of the source tree into a session manifest:
+        pending files in order as [path, size, mtime], plus the mtime of every directory.
+        size and mtime are as of discovery and are not kept current (see refresh_manifest);
+        nothing relies on them, everything that reads a file stats it itself.
+        """
+        dir_mtimes = {}
+        files = [[f["path"], f["size"], f["mtime"]] for f in self.iter_directory(source_path, dir_mtimes)]
+        return {"source_path": str(source_path), "dirs": dir_mtimes, "files": files, "kept": [],
+                "extensions": sorted(self.media_extensions())}
+
+    def refresh_manifest(self, manifest: Dict[str, Any], ignore: Optional[Set[str]] = None) -> Dict[str, Any]:
+        """
+        Cheap incremental diff of a manifest against the disk.
+        Adding or removing a file changes its directory's mtime, so only directories
+        whose mtime changed are listed again; everything else is trusted as-is.
+        New files are appended to the pending list, vanished ones are dropped.
+        Paths in ignore (files with a move still queued) are never added as new.
+        If the supported extensions changed since the manifest was built (e.g. HEIC support
+        was installed), every directory is listed again.
+        A file rewritten in place leaves its directory's mtime alone, so the size and mtime
+        stored with pending files can be stale; they are informational only.
+        """
+        dirs = manifest.get("dirs", {})
+        kept = set(manifest.get("kept", []))
+        pending = manifest.get("files", [])
+        known = {entry[0] for entry in pending} | kept | (ignore or set())
+
+        extensions = sorted(self.media_extensions())
+        formats_changed = manifest.get("extensions") != extensions
+        manifest["extensions"] = extensions
+
+        changed_dirs = []
+        removed_dirs = set()
+        for directory, mtime_ns in list(dirs.items()):
+            try:
+                current = os.stat(directory).st_mtime_ns
+            except OSError:
+                removed_dirs.add(directory)
+                del dirs[directory]
+                continue
+            if current != mtime_ns or formats_changed:
+                dirs[directory] = current
+                changed_dirs.append(directory)
+
+        present = {}  # changed directory -> media paths currently in it
+        added = []
+        for directory in changed_dirs:
+            names = set()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        entry_path = str(Path(entry.path))
+                        if entry.is_dir():
+                            if entry_path not in dirs:
+                                # New subtree: walk it completely
+                                for file_info in self.iter_directory(entry_path, dirs):
+                                    if file_info["path"] not in known:
+                                        added.append([file_info["path"], file_info["size"], file_info["mtime"]])
+                            continue
+                        try:
+                            file_info = self._file_info(Path(entry_path))
+                        except OSError:
+                            continue
+                        if file_info:
+                            names.add(entry_path)
+                            if entry_path not in known:
+                                added.append([file_info["path"], file_info["size"], file_info["mtime"]])
+            except OSError as e:
+                self.logger.warning(f"Could not list {directory}: {e}")
+                continue
+            present[directory] = names
+
+        def still_there(path: str) -> bool:
+            parent = os.path.dirname(path)
+            if parent in removed_dirs or parent not in dirs:
+                return False
+            return parent not in present or path in present[parent]
+
+        remaining = [entry for entry in pending if still_there(entry[0])]
+        removed = len(pending) - len(remaining)
+        manifest["files"] = remaining + added
+        manifest["kept"] = [path for path in kept if still_there(path)]
+        manifest["dirs"] = dirs
+
+        self.logger.info(
+            f"Manifest refreshed: {len(changed_dirs)} changed folders, {len(added)} new, {removed} removed files"
+        )
+        return manifest
 
     def list_subfolders(self, path: Path) -> List[Path]:
         """
@@ -0,0 +1,203 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import queue
+from collections import OrderedDict
+from pathlib import Path
+from PyQt6.QtCore import QObject, pyqtSignal
+
+
+PARTIAL_SUFFIX = ".partial"
+
+
+def move_file(source, destination):
+    """
+    Moves a file so the destination never exists half-written. Within a volume it is
+    renamed; across volumes it is copied to a temporary name next to the destination
+    and renamed once complete, and only then is the source removed. An interrupted
+    move thus leaves the source plus at most a stale temporary file.
+    """
+    try:
+        os.rename(source, destination)
+        return
+    except OSError:
+        pass
+    partial = Path(destination).with_name(Path(destination).name + PARTIAL_SUFFIX)
+    try:
+        shutil.copy2(source, partial)
+        os.replace(partial, destination)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    os.unlink(source)
+
+
+class FileOperationQueue(QObject):
+    """
+    Runs file moves (and folder removals) on a background thread, one after another
+    in submission order.
+    The UI continues immediately; results come back as signals on the main thread.
+    Operations still pending when the app closes are written to a JSON file and
+    resumed on the next start.
+    """
+    operation_finished = pyqtSignal(dict)  # operation
+    operation_failed = pyqtSignal(dict, str)  # operation, error message
+    pending_changed = pyqtSignal(int)  # number of unfinished operations
+
+    def __init__(self, hash_cache=None, state_file="data/pending_operations.json"):
+        super().__init__()
+        self.logger = logging.getLogger("FotoSortierer.FileOperationQueue")
+        self.hash_cache = hash_cache
+        self.state_file = Path(state_file)
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = OrderedDict()  # id -> operation, in submission order
+        self._next_id = 0
+        self._idle = threading.Event()
+        self._idle.set()
+        self._stopping = False
+
+        self._worker = threading.Thread(target=self._run, name="FileOperationQueue", daemon=True)
+        self._worker.start()
+
+    def move(self, source, destination, **context):
+        """
+        Queues a move. Extra keyword arguments (session id, file size, ...) are kept
+        in the operation dict that the signals carry, and must be JSON serializable.
+        """
+        return self._enqueue("move", source, destination, context)
+
+    def remove_tree(self, path, **context):
+        """Queues the removal of a folder, after all moves queued before it (e.g. into that folder)."""
+        return self._enqueue("remove_tree", path, None, context)
+
+    def _enqueue(self, kind, source, destination, context):
+        with self._lock:
+            self._next_id += 1
+            operation = {"id": self._next_id, "kind": kind, "source": str(source),
+                         "destination": str(destination) if destination else None, **context}
+            self._pending[operation["id"]] = operation
+            self._idle.clear()
+            count = len(self._pending)
+        self._queue.put(operation)
+        self.pending_changed.emit(count)
+        return operation
+
+    def is_reserved(self, path) -> bool:
+        """True if a queued move will create this path (for collision handling)."""
+        path_str = str(path)
+        with self._lock:
+            return any(op["destination"] == path_str for op in self._pending.values())
+
+    def pending_operations(self):
+        """Copies of the unfinished operations, in submission order."""
+        with self._lock:
+            return [dict(op) for op in self._pending.values()]
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def wait_idle(self, timeout=None) -> bool:
+        """Blocks until all queued operations are done. Returns False on timeout."""
+        return self._idle.wait(timeout)
+
+    def _run(self):
+        while True:
+            operation = self._queue.get()
+            # After shutdown, queued operations are left for the next start
+            if operation is None or self._stopping:
+                break
+            try:
+                source, destination = operation["source"], operation["destination"]
+                if operation["kind"] == "remove_tree":
+                    shutil.rmtree(source)
+                else:
+                    Path(destination).parent.mkdir(parents=True, exist_ok=True)
+                    move_file(source, destination)
+
+                    # Keep the cached hash attached to the file at its new location
+                    if self.hash_cache:
+                        self.hash_cache.relocate(source, destination)
+                if not self._stopping:
+                    self.operation_finished.emit(operation)
+            except Exception as e:
+                if operation["kind"] == "remove_tree":
+                    self.logger.error(f"Error removing {operation['source']}: {e}")
+                else:
+                    self.logger.error(f"Error moving {operation['source']} to {operation['destination']}: {e}")
+                if not self._stopping:
+                    self.operation_failed.emit(operation, str(e))
+            finally:
+                with self._lock:
+                    self._pending.pop(operation["id"], None)
+                    count = len(self._pending)
+                if not self._stopping:
+                    self.pending_changed.emit(count)
+                if not count:
+                    self._idle.set()
+
+    def shutdown(self, timeout=10) -> bool:
+        """
+        Waits up to timeout seconds for queued operations, then stops the worker.
+        Whatever is unfinished is persisted. Returns False if something had to be persisted.
+        The worker starts no further operation once stopped. A move still running is
+        persisted too: move_file never leaves a partial destination behind, and
+        resume_persisted skips it if it completed after all.
+        """
+        finished = self.wait_idle(timeout)
+        # No signals into a UI that is being torn down, and no new operations
+        self._stopping = True
+        if not finished:
+            self.persist_pending()
+        self._queue.put(None)
+        if finished:
+            self._worker.join(timeout=1)
+        return finished
+
+    def persist_pending(self):
+        """Writes unfinished operations to the state file, so resume_persisted can finish them."""
+        with self._lock:
+            operations = list(self._pending.values())
+        if not operations:
+            return
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            with open(self.state_file, "w", encoding="utf-8") as f:
+                json.dump(operations, f, indent=4)
+            self.logger.info(f"Saved {len(operations)} unfinished file operations")
+        except IOError as e:
+            self.logger.error(f"Error saving pending file operations: {e}")
+
+    def resume_persisted(self):
+        """Queues the operations left over from the last run."""
+        if not self.state_file.exists():
+            return
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                operations = json.load(f)
+            self.state_file.unlink()
+        except (json.JSONDecodeError, IOError) as e:
+            self.logger.error(f"Error loading pending file operations: {e}")
+            return
+
+        resumed = 0
+        for operation in operations:
+            operation.pop("id", None)
+            source = operation.pop("source")
+            destination = operation.pop("destination")
+            kind = operation.pop("kind", "move")
+            if kind == "remove_tree":
+                if Path(source).exists():
+                    self.remove_tree(source, **operation)
+                    resumed += 1
+                continue
+            # Already moved before the app was closed
+            if not Path(source).exists() and Path(destination).exists():
+                continue
+            self.move(source, destination, **operation)
+            resumed += 1
+        if resumed:
+            self.logger.info(f"Resumed {resumed} unfinished file operations")
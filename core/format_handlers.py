@@ -0,0 +1,297 @@
+import io
+import logging
+import struct
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from PIL import Image, ImageOps
+
+try:
+    import pillow_heif
+except ImportError:
+    pillow_heif = None
+
+logger = logging.getLogger("FotoSortierer.FormatHandlers")
+
+# EXIF orientation -> transpose that shows the image upright (as in ImageOps.exif_transpose)
+ORIENTATION_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+ROTATED_ORIENTATIONS = {5, 6, 7, 8}
+
+# TIFF field types: byte size and struct format (ASCII and UNDEFINED are kept as bytes)
+TIFF_TYPES = {1: (1, "B"), 2: (1, None), 3: (2, "H"), 4: (4, "I"), 6: (1, "b"), 7: (1, None),
+              8: (2, "h"), 9: (4, "i"), 13: (4, "I")}
+TIFF_TAGS = {
+    254: "subfile_type", 256: "width", 257: "height", 259: "compression", 271: "make", 272: "model",
+    273: "strip_offsets", 274: "orientation", 279: "strip_byte_counts", 306: "date_time",
+    330: "sub_ifds", 513: "jpeg_offset", 514: "jpeg_length", 34665: "exif_ifd", 36867: "date_time_original",
+}
+TIFF_MAX_IFDS = 16  # Guards against loops and garbage offsets in broken files
+JPEG_DECODABLE_FRAMES = {0xC0, 0xC1, 0xC2}  # Baseline, extended and progressive; not lossless (raw data)
+
+
+def _parse_date(value) -> Optional[datetime]:
+    try:
+        return datetime.strptime(value.decode("ascii").strip("\x00 "), "%Y:%m:%d %H:%M:%S")
+    except (ValueError, AttributeError, UnicodeDecodeError):
+        return None
+
+
+def _parse_text(value) -> Optional[str]:
+    if not isinstance(value, bytes):
+        return None
+    return value.decode("utf-8", errors="replace").strip("\x00 ") or None
+
+
+def _read_ifd(f, offset: int, byte_order: str) -> Tuple[Dict, int]:
+    """
+    Reads the entries of one TIFF IFD that are listed in TIFF_TAGS.
+    Returns ({name: tuple of numbers or bytes}, offset of the next IFD).
+    Values stored elsewhere in the file are read with one seek each; others are skipped.
+    """
+    f.seek(offset)
+    count = struct.unpack(byte_order + "H", f.read(2))[0]
+    data = f.read(count * 12 + 4)
+    if len(data) < count * 12 + 4:
+        raise ValueError("Truncated TIFF directory")
+    entries = {}
+    for i in range(count):
+        tag, field_type, n = struct.unpack_from(byte_order + "HHI", data, i * 12)
+        name = TIFF_TAGS.get(tag)
+        if name is None or field_type not in TIFF_TYPES:
+            continue
+        item_size, item_format = TIFF_TYPES[field_type]
+        size = item_size * n
+        if size <= 4:
+            raw = data[i * 12 + 8:i * 12 + 8 + size]
+        else:
+            f.seek(struct.unpack_from(byte_order + "I", data, i * 12 + 8)[0])
+            raw = f.read(size)
+            if len(raw) < size:
+                continue
+        entries[name] = raw if item_format is None else struct.unpack(byte_order + item_format * n, raw)
+    return entries, struct.unpack_from(byte_order + "I", data, count * 12)[0]
+
+
+def _jpeg_frame_size(f, offset: int, length: int) -> Optional[Tuple[int, int]]:
+    """(width, height) of an embedded JPEG from its frame header, or None if Pillow cannot decode it."""
+    end = offset + length
+    f.seek(offset)
+    if f.read(2) != b"\xff\xd8":
+        return None
+    position = offset + 2
+    while position + 4 <= end:
+        f.seek(position)
+        header = f.read(4)
+        if len(header) < 4 or header[0] != 0xFF:
+            return None
+        marker = header[1]
+        if marker in (0xD9, 0xDA):  # End of image / start of scan before any frame header
+            return None
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            if marker not in JPEG_DECODABLE_FRAMES:
+                return None
+            height, width = struct.unpack(">HH", f.read(5)[1:5])
+            return (width, height) if width and height else None
+        position += 2 + struct.unpack(">H", header[2:4])[0]
+    return None
+
+
+class FormatHandler:
+    """
+    Reads a file format the rest of the app cannot open directly.
+    probe() returns what MetadataExtractor shows about a file, open_preview() a decoded image
+    for the sorter, duplicate hashing and thumbnails, both as cheaply as the format allows.
+
+    The base class serves formats that Pillow reads through a plugin: probe() defers to
+    Pillow's header parsing and the preview is the image itself.
+    """
+    extensions: Set[str] = set()
+
+    def probe(self, path: str) -> Optional[Dict]:
+        """
+        Header-only metadata: width and height (as stored), orientation, date_taken,
+        camera_make and camera_model; missing keys are left to the caller's defaults.
+        None means the file can be probed with Image.open like any other image.
+        """
+        return None
+
+    def preview_size(self, path: str) -> Optional[Tuple[int, int]]:
+        """(width, height) of the largest preview, as displayed (after EXIF rotation)."""
+        with Image.open(path) as img:
+            width, height = img.size
+            orientation = img.getexif().get(274, 1)
+        return (height, width) if orientation in ROTATED_ORIENTATIONS else (width, height)
+
+    def open_preview(self, path: str, max_edge: Optional[int] = None, upright: bool = True) -> Optional[Image.Image]:
+        """
+        Decoded preview whose long side is at least max_edge (None: the largest available).
+        With upright, the EXIF orientation is applied. None if the file has no usable preview.
+        """
+        return self.load_preview(path, max_edge, upright)[0]
+
+    def load_preview(self, path: str, max_edge: Optional[int] = None,
+                     upright: bool = True) -> Tuple[Optional[Image.Image], Optional[Tuple[int, int]]]:
+        """open_preview and preview_size from one read of the file: (preview, size)."""
+        with Image.open(path) as img:
+            width, height = img.size
+            orientation = img.getexif().get(274, 1)
+            if max_edge:
+                img.draft("RGB", (max_edge, max_edge))
+            img.load()
+            preview = ImageOps.exif_transpose(img) if upright else img.copy()
+        return preview, ((height, width) if orientation in ROTATED_ORIENTATIONS else (width, height))
+
+
+class RawHandler(FormatHandler):
+    """
+    Camera RAW files built on TIFF (Canon CR2, Nikon NEF, Sony ARW, Adobe DNG).
+    Nothing is demosaiced: metadata comes from the TIFF directories and the image is
+    the JPEG preview the camera embedded, found by walking IFD0, its chain, SubIFDs
+    and the EXIF directory with seeks. Only the directories and the chosen preview are read.
+    """
+    extensions = {'.cr2', '.nef', '.arw', '.dng'}
+
+    def _scan(self, f) -> Tuple[Dict, List[Tuple[int, int, int, int]]]:
+        """Returns (metadata, previews as (offset, length, width, height) sorted by size)."""
+        try:
+            return self._scan_tiff(f)
+        except struct.error as e:
+            raise ValueError(f"Corrupt TIFF structure: {e}")
+
+    def _scan_tiff(self, f):
+        header = f.read(8)
+        if header[:4] == b"II*\x00":
+            byte_order = "<"
+        elif header[:4] == b"MM\x00*":
+            byte_order = ">"
+        else:
+            raise ValueError("Not a TIFF-based RAW file")
+
+        metadata = {"orientation": 1}
+        previews = {}
+        image_size = None
+        pending = [struct.unpack(byte_order + "I", header[4:8])[0]]
+        visited = set()
+        while pending and len(visited) < TIFF_MAX_IFDS:
+            offset = pending.pop(0)
+            if not offset or offset in visited:
+                continue
+            entries, next_offset = _read_ifd(f, offset, byte_order)
+            if not visited:
+                # Camera and orientation live in IFD0
+                metadata["camera_make"] = _parse_text(entries.get("make"))
+                metadata["camera_model"] = _parse_text(entries.get("model"))
+                metadata["orientation"] = entries.get("orientation", (1,))[0]
+                metadata["date_taken"] = _parse_date(entries.get("date_time"))
+            visited.add(offset)
+            pending.append(next_offset)
+            pending.extend(entries.get("sub_ifds", ()))
+            pending.extend(entries.get("exif_ifd", ()))
+            if "date_time_original" in entries:
+                metadata["date_taken"] = _parse_date(entries["date_time_original"]) or metadata.get("date_taken")
+
+            if "jpeg_offset" in entries and "jpeg_length" in entries:
+                candidate = (entries["jpeg_offset"][0], entries["jpeg_length"][0])
+            elif entries.get("compression", (0,))[0] in (6, 7) and len(entries.get("strip_offsets", ())) == 1:
+                candidate = (entries["strip_offsets"][0], entries.get("strip_byte_counts", (0,))[0])
+            else:
+                candidate = None
+            if candidate and candidate[1] and candidate[0] not in previews:
+                size = _jpeg_frame_size(f, *candidate)
+                if size:
+                    previews[candidate[0]] = (*candidate, *size)
+
+            # The full-size image: the largest main-image directory (subfile type 0)
+            if entries.get("subfile_type", (0,))[0] == 0 and "width" in entries and "height" in entries:
+                size = (entries["width"][0], entries["height"][0])
+                if image_size is None or size[0] * size[1] > image_size[0] * image_size[1]:
+                    image_size = size
+
+        previews = sorted(previews.values(), key=lambda p: p[2] * p[3])
+        if previews and (image_size is None or previews[-1][2] * previews[-1][3] > image_size[0] * image_size[1]):
+            image_size = previews[-1][2:]
+        if image_size:
+            metadata["width"], metadata["height"] = image_size
+        return metadata, previews
+
+    def probe(self, path: str) -> Optional[Dict]:
+        with open(path, "rb") as f:
+            metadata, _ = self._scan(f)
+        return metadata
+
+    @staticmethod
+    def _displayed_size(metadata, previews) -> Optional[Tuple[int, int]]:
+        if not previews:
+            return None
+        width, height = previews[-1][2:]
+        return (height, width) if metadata["orientation"] in ROTATED_ORIENTATIONS else (width, height)
+
+    def preview_size(self, path: str) -> Optional[Tuple[int, int]]:
+        with open(path, "rb") as f:
+            metadata, previews = self._scan(f)
+        return self._displayed_size(metadata, previews)
+
+    def load_preview(self, path: str, max_edge: Optional[int] = None,
+                     upright: bool = True) -> Tuple[Optional[Image.Image], Optional[Tuple[int, int]]]:
+        with open(path, "rb") as f:
+            metadata, previews = self._scan(f)
+            if not previews:
+                return None, None
+            # The smallest preview that is large enough, else the largest one
+            chosen = previews[-1]
+            if max_edge:
+                chosen = next((p for p in previews if max(p[2], p[3]) >= max_edge), chosen)
+            offset, length, width, height = chosen
+            f.seek(offset)
+            data = f.read(length)
+
+        img = Image.open(io.BytesIO(data))
+        if max_edge and max(width, height) > max_edge:
+            # Keep the long side at least max_edge while libjpeg decodes at a reduced scale
+            scale = max_edge / max(width, height)
+            img.draft("RGB", (max(1, int(width * scale)), max(1, int(height * scale))))
+        img.load()
+        transpose = ORIENTATION_TRANSPOSE.get(metadata["orientation"])
+        if upright and transpose is not None:
+            img = img.transpose(transpose)
+        return img, self._displayed_size(metadata, previews)
+
+
+class HeifHandler(FormatHandler):
+    """HEIC/HEIF photos (phones), decoded by the optional pillow_heif plugin for Pillow."""
+    extensions = {'.heic', '.heif'}
+
+
+_handlers: Dict[str, FormatHandler] = {}
+
+
+def register_handler(handler: FormatHandler):
+    """Makes the app read the handler's extensions through it (later registrations win)."""
+    for extension in handler.extensions:
+        _handlers[extension] = handler
+
+
+def handler_for(file_path) -> Optional[FormatHandler]:
+    """The handler for a file's extension, or None if Pillow and Qt read it directly."""
+    return _handlers.get(Path(file_path).suffix.lower())
+
+
+def handled_extensions() -> Set[str]:
+    return set(_handlers)
+
+
+register_handler(RawHandler())
+if pillow_heif is not None:
+    pillow_heif.register_heif_opener()
+    register_handler(HeifHandler())
+else:
+    logger.debug("pillow_heif not installed, HEIC/HEIF files are not supported")
@@ -0,0 +1,244 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+CONTENT_SAMPLE_SIZE = 64 * 1024
+
+
+def content_key(path: str, size: int) -> Optional[str]:
+    """
+    Cheap content identity: file size plus a digest of the first and last 64 KiB.
+    Survives moves and renames, unlike the path.
+    """
+    try:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            if size <= 2 * CONTENT_SAMPLE_SIZE:
+                digest.update(f.read())
+            else:
+                digest.update(f.read(CONTENT_SAMPLE_SIZE))
+                f.seek(-CONTENT_SAMPLE_SIZE, os.SEEK_END)
+                digest.update(f.read(CONTENT_SAMPLE_SIZE))
+        return f"{size}:{digest.hexdigest()}"
+    except OSError:
+        return None
+
+
+class HashCache:
+    """
+    SQLite-backed store for perceptual hashes.
+    Entries are validated against (path, size, mtime), so a changed file is
+    simply re-hashed. Writes from worker threads are buffered and committed in
+    batches; lookups query single rows instead of loading the whole cache.
+
+    Each entry also stores a content key and the inode/device pair, so a file
+    that was moved or renamed (or a copy shared with another session) is found
+    again without re-hashing.
+
+    Hashes also depend on how they were computed (hash size, decode mode), so
+    each entry records those parameters and a lookup with different ones is a miss.
+    """
+    def __init__(self, db_path="cache/hash_cache.db", legacy_json_path="cache/hash_cache.json", batch_size=500):
+        self.logger = logging.getLogger("FotoSortierer.HashCache")
+        self.db_path = Path(db_path)
+        self.legacy_json_path = Path(legacy_json_path)
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Tuple] = {}  # path -> (size, mtime, hash, content_key, inode, device, params)
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS hashes (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                hash TEXT NOT NULL
+            )
+        """)
+        self._ensure_identity_columns()
+        self._conn.commit()
+
+        self._migrate_legacy_json()
+
+    def _ensure_identity_columns(self):
+        """Add the content identity and hash parameter columns to databases created before they existed."""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(hashes)")}
+        for name, sql_type in (("content_key", "TEXT"), ("inode", "INTEGER"), ("device", "INTEGER"),
+                               ("params", "TEXT")):
+            if name not in columns:
+                self._conn.execute(f"ALTER TABLE hashes ADD COLUMN {name} {sql_type}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_hashes_content ON hashes (content_key)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_hashes_inode ON hashes (device, inode)")
+
+    def _migrate_legacy_json(self):
+        """One-time import of the old cache/hash_cache.json file."""
+        if not self.legacy_json_path.exists():
+            return
+
+        try:
+            with open(self.legacy_json_path, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+        except Exception as e:
+            self.logger.error(f"Error reading legacy hash cache: {e}")
+            return
+
+        rows = []
+        for key, hash_val in legacy.items():
+            # Legacy key format: f"{path}_{size}_{mtime}"
+            try:
+                path, size, mtime = key.rsplit("_", 2)
+                rows.append((path, int(size), float(mtime), hash_val))
+            except ValueError:
+                continue
+
+        try:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO hashes (path, size, mtime, hash) VALUES (?, ?, ?, ?)", rows
+                )
+                self._conn.commit()
+            self.legacy_json_path.rename(self.legacy_json_path.with_suffix(".json.migrated"))
+            self.logger.info(f"Migrated {len(rows)} entries from {self.legacy_json_path}")
+        except Exception as e:
+            self.logger.error(f"Error migrating legacy hash cache: {e}")
+
+    def get(self, path: str, size: int, mtime: float, params: Optional[str] = None) -> Optional[str]:
+        """Return the cached hash for the file, otherwise None."""
+        return self.lookup(path, size, mtime, params=params)[0]
+
+    def lookup(self, path: str, size: int, mtime: float, key: Optional[str] = None,
+               params: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Return (hash, content key) for the file; hash is None on a miss.
+        Falls back to inode and content identity when the path is unknown,
+        and re-attaches a hit found that way to the new path.
+        The content key is the stored one or the one read for the lookup (None if
+        neither was needed); pass it on to put() so the file is not sampled twice.
+        A key the caller already computed is used instead of reading the file.
+        Only entries hashed with the same params count; entries from before params
+        were stored (NULL) miss once and are then overwritten.
+        """
+        with self._lock:
+            pending = self._pending.get(path)
+            if pending:
+                if pending[:2] == (size, mtime) and pending[6] == params:
+                    return pending[2], pending[3]
+                return None, key
+
+            row = self._conn.execute(
+                "SELECT hash, content_key FROM hashes WHERE path = ? AND size = ? AND mtime = ? AND params IS ?",
+                (path, size, mtime, params)
+            ).fetchone()
+        if row:
+            return row[0], row[1] or key
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None, key
+
+        # Same inode with unchanged size and mtime: renamed on the same volume
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT hash, content_key, path FROM hashes "
+                "WHERE device = ? AND inode = ? AND size = ? AND mtime = ? AND params IS ?",
+                (stat.st_dev, stat.st_ino, size, mtime, params)
+            ).fetchone()
+        if row:
+            if os.path.exists(row[2]):
+                self.put(path, size, mtime, row[0], key=row[1] or key, stat=stat, params=params)
+            else:
+                self.relocate(row[2], path)
+            return row[0], row[1] or key
+
+        if key is None:
+            key = content_key(path, size)
+            if key is None:
+                return None, None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT hash FROM hashes WHERE content_key = ? AND params IS ? LIMIT 1", (key, params)
+            ).fetchone()
+        if row:
+            self.put(path, size, mtime, row[0], key=key, stat=stat, params=params)
+            return row[0], key
+        return None, key
+
+    def put(self, path: str, size: int, mtime: float, hash_val: str, key: Optional[str] = None, stat=None,
+            params: Optional[str] = None):
+        """
+        Queue a hash for writing. Commits once batch_size entries are pending.
+        params describes how the hash was computed; lookups must pass the same value.
+        """
+        # Identity is computed outside the lock, since it touches the disk
+        if key is None:
+            key = content_key(path, size)
+        if stat is None:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                stat = None
+        inode = stat.st_ino if stat else None
+        device = stat.st_dev if stat else None
+
+        with self._lock:
+            self._pending[path] = (size, mtime, hash_val, key, inode, device, params)
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+
+    def relocate(self, old_path: str, new_path: str):
+        """
+        Re-key an entry after the file was moved, instead of orphaning it.
+        Size and mtime are refreshed from the file at its new location.
+        """
+        try:
+            stat = os.stat(new_path)
+        except OSError:
+            stat = None
+
+        with self._lock:
+            self._flush_locked()
+            try:
+                self._conn.execute("DELETE FROM hashes WHERE path = ?", (new_path,))
+                if stat:
+                    self._conn.execute(
+                        "UPDATE hashes SET path = ?, size = ?, mtime = ?, inode = ?, device = ? WHERE path = ?",
+                        (new_path, stat.st_size, stat.st_mtime, stat.st_ino, stat.st_dev, old_path)
+                    )
+                else:
+                    self._conn.execute("UPDATE hashes SET path = ? WHERE path = ?", (new_path, old_path))
+                self._conn.commit()
+            except sqlite3.Error as e:
+                self.logger.error(f"Error relocating hash cache entry {old_path}: {e}")
+
+    def flush(self):
+        """Commit all pending entries."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        try:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO hashes (path, size, mtime, hash, content_key, inode, device, params) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(path, *entry) for path, entry in self._pending.items()]
+            )
+            self._conn.commit()
+            self._pending.clear()
+        except sqlite3.Error as e:
+            self.logger.error(f"Error writing hash cache: {e}")
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
@@ -1,9 +1,11 @@
 import logging
+from collections import OrderedDict
 from pathlib import Path
-from PyQt6.QtGui import QPixmap, QImage, QImageReader
-from PyQt6.QtCore import QObject, pyqtSignal, QThread, Qt
+from PyQt6.QtGui import QPixmap, QImage, QImageReader, QImageIOHandler
+from PyQt6.QtCore import QObject, pyqtSignal, QThread, Qt, QSize
 from concurrent.futures import ThreadPoolExecutor
 import functools
+from .format_handlers import handler_for
 
 class MediaLoader(QObject):
     """
@@ -12,36 +14,110 @@ class MediaLoader(QObject):
     image_loaded = pyqtSignal(str, QPixmap) # path, pixmap
     error_occurred = pyqtSignal(str, str) # path, error message
 
-    image_ready_internal = pyqtSignal(str, QImage) # Internal signal to transfer QImage to main thread
+    preview_loaded = pyqtSignal(str, QImage) # path, cached preview found by load_preview
 
-    def __init__(self, cache_size=20):
+    image_ready_internal = pyqtSignal(str, bool, QImage) # Internal signal to transfer QImage to main thread (path, full resolution, image)
+
+    def __init__(self, cache_budget_mb=500, thumbnail_cache=None):
         super().__init__()
+        self.thumbnail_cache = thumbnail_cache
         self.logger = logging.getLogger("FotoSortierer.MediaLoader")
-        self.cache = {} # Simple LRU-like dict: path -> QPixmap
-        self.cache_size = cache_size
+        self.cache = OrderedDict() # LRU, least recently used first: (path, full resolution) -> QPixmap
+        self.cache_budget = cache_budget_mb * 1024 * 1024 # Limit on total pixel bytes
+        self.cache_bytes = 0
+        self.pinned_path = None # Image on screen, never evicted
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
         self.executor = ThreadPoolExecutor(max_workers=2)
-        self.loading_tasks = {} # path -> future
+        self.loading_tasks = {} # (path, full resolution) -> future
+        self.target_size = None # Default decode size in device pixels; None decodes at full resolution
+        self.original_sizes = {} # path -> QSize of the image as displayed (after EXIF rotation)
         
         # Connect internal signal to main thread slot
         self.image_ready_internal.connect(self._handle_loaded_image)
+        self.error_occurred.connect(self._handle_load_error)
+
+    def set_target_size(self, size):
+        """Sets the default decode size, normally the viewport of the image view in device pixels."""
+        self.target_size = size if size and not size.isEmpty() else None
 
-    def load_media(self, path, target_size=None):
+    def load_media(self, path, target_size=None, full_resolution=False):
         """
         Requests to load a media file. Emits image_loaded when done.
+        Images are decoded no larger than target_size (default: self.target_size),
+        unless full_resolution is set.
         For videos, it might just verify existence or load a thumbnail (future).
         """
         path_str = str(path)
+        target_size = None if full_resolution else (target_size or self.target_size)
+        key = (path_str, target_size is None)
         
         # Check cache first
-        if path_str in self.cache:
-            self.image_loaded.emit(path_str, self.cache[path_str])
+        pixmap = self.cache.get(key)
+        if pixmap is not None and not self._is_too_small(path_str, pixmap, target_size):
+            self.hits += 1
+            self.cache.move_to_end(key)
+            self.image_loaded.emit(path_str, pixmap)
             return
+        self.misses += 1
 
         # Submit to thread pool
-        if path_str not in self.loading_tasks:
+        if key not in self.loading_tasks:
             future = self.executor.submit(self._load_image_sync, path_str, target_size)
-            self.loading_tasks[path_str] = future
-            future.add_done_callback(functools.partial(self._on_load_complete, path_str))
+            self.loading_tasks[key] = future
+            future.add_done_callback(functools.partial(self._on_load_complete, key))
+
+    def load_preview(self, path):
+        """
+        Looks up the cached preview of a file the thumbnail cache does not know by
+        path (moved or copied). That reads the file's content key, so it runs on the
+        loader thread; preview_loaded is emitted if a preview is found.
+        """
+        if self.thumbnail_cache is not None:
+            self.executor.submit(self._load_preview_data, str(path))
+
+    def _load_preview_data(self, path):
+        try:
+            data = self.thumbnail_cache.get(path)
+            if data:
+                image = QImage.fromData(data)
+                if not image.isNull():
+                    self.preview_loaded.emit(path, image)
+        except Exception as e:
+            self.logger.warning(f"Error reading cached preview of {path}: {e}")
+
+    def _is_too_small(self, path, pixmap, target_size):
+        """True if a cached downscaled pixmap no longer covers the (grown) target size."""
+        original = self.original_sizes.get(path)
+        if target_size is None or original is None:
+            return False
+        return (pixmap.width() < original.width()
+                and pixmap.width() < target_size.width()
+                and pixmap.height() < target_size.height())
+
+    def original_size(self, path):
+        """Size of the image as displayed, read from the file header if it was not decoded yet."""
+        path_str = str(path)
+        handler = handler_for(path_str)
+        if path_str not in self.original_sizes and handler is not None:
+            try:
+                size = handler.preview_size(path_str)
+            except (ValueError, OSError):
+                size = None
+            if size is None:
+                return None
+            self.original_sizes[path_str] = QSize(*size)
+        if path_str not in self.original_sizes:
+            reader = QImageReader(path_str)
+            reader.setAutoTransform(True)
+            size = reader.size()
+            if not size.isValid():
+                return None
+            if reader.transformation() & QImageIOHandler.Transformation.TransformationRotate90:
+                size = size.transposed()
+            self.original_sizes[path_str] = size
+        return self.original_sizes[path_str]
 
     def _load_image_sync(self, path, target_size):
         """
@@ -49,13 +125,24 @@ class MediaLoader(QObject):
         Returns QImage to be converted to QPixmap in the main thread (for safety).
         """
         try:
+            handler = handler_for(path)
+            if handler is not None:
+                return self._load_preview_sync(path, handler, target_size)
+
             reader = QImageReader(path)
             reader.setAutoTransform(True)
             
-            if target_size:
-                # Scale while loading for performance if needed
-                # reader.setScaledSize(target_size) 
-                pass
+            size = reader.size()
+            if size.isValid():
+                rotated = bool(reader.transformation() & QImageIOHandler.Transformation.TransformationRotate90)
+                shown = size.transposed() if rotated else size
+                self.original_sizes[path] = shown
+                
+                if target_size and (shown.width() > target_size.width() or shown.height() > target_size.height()):
+                    # Scale while loading: JPEG decodes at a fraction of the full-size cost
+                    scaled = shown.scaled(target_size, Qt.AspectRatioMode.KeepAspectRatio)
+                    # The scaled size applies before the EXIF rotation
+                    reader.setScaledSize(scaled.transposed() if rotated else scaled)
 
             image = reader.read()
             if image.isNull():
@@ -66,13 +153,32 @@ class MediaLoader(QObject):
             self.logger.error(f"Error loading {path}: {e}")
             raise e
 
-    def _on_load_complete(self, path, future):
+    def _load_preview_sync(self, path, handler, target_size):
+        """RAW, HEIC: the format handler's (upright) preview, decoded and scaled to fit target_size."""
+        max_edge = max(target_size.width(), target_size.height()) if target_size else None
+        # The size of the largest preview comes from the same scan of the file
+        img, size = handler.load_preview(path, max_edge=max_edge)
+        if img is None:
+            raise ValueError(f"No preview image in {path}")
+        if size:
+            self.original_sizes[path] = QSize(*size)
+
+        img = img.convert("RGB")
+        image = QImage(img.tobytes(), img.width, img.height, img.width * 3, QImage.Format.Format_RGB888).copy()
+        if target_size and (image.width() > target_size.width() or image.height() > target_size.height()):
+            image = image.scaled(target_size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+        return image
+
+    def _on_load_complete(self, key, future):
         """
         Callback when loading is done.
         """
+        if future.cancelled():
+            return
+        path, full_resolution = key
         try:
             image = future.result()
-            self.image_ready_internal.emit(path, image)
+            self.image_ready_internal.emit(path, full_resolution, image)
         except Exception as e:
             self.error_occurred.emit(path, str(e))
         finally:
@@ -81,24 +187,46 @@ class MediaLoader(QObject):
             # Better to clean up in main thread.
             pass
 
-    def _handle_loaded_image(self, path, image):
+    def _handle_loaded_image(self, path, full_resolution, image):
         """
         Slot running on main thread. Converts QImage to QPixmap and caches it.
         """
-        if path in self.loading_tasks:
-            del self.loading_tasks[path]
+        key = (path, full_resolution)
+        if self.loading_tasks.pop(key, None) is None:
+            # Invalidated while decoding (file moved or deleted)
+            return
             
         pixmap = QPixmap.fromImage(image)
-        
-        # Cache management (Simple LRU)
-        if len(self.cache) >= self.cache_size:
-            # Remove first item (oldest)
-            first_key = next(iter(self.cache))
-            del self.cache[first_key]
-            
-        self.cache[path] = pixmap
+        self._cache_put(key, pixmap)
         self.image_loaded.emit(path, pixmap)
 
+    @staticmethod
+    def _pixmap_bytes(pixmap):
+        return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+    def _cache_put(self, key, pixmap):
+        """Adds a pixmap and evicts least recently used entries until the byte budget fits."""
+        old = self.cache.pop(key, None)
+        if old is not None:
+            self.cache_bytes -= self._pixmap_bytes(old)
+        self.cache[key] = pixmap
+        self.cache_bytes += self._pixmap_bytes(pixmap)
+
+        for candidate in list(self.cache):
+            if self.cache_bytes <= self.cache_budget:
+                break
+            if candidate == key or candidate[0] == self.pinned_path:
+                continue
+            self.cache_bytes -= self._pixmap_bytes(self.cache.pop(candidate))
+            self.evictions += 1
+
+    def _handle_load_error(self, path, message):
+        """Slot running on main thread. Forgets the failed task so the file can be requested again."""
+        for key in ((path, False), (path, True)):
+            future = self.loading_tasks.get(key)
+            if future is not None and future.done():
+                del self.loading_tasks[key]
+
     # To properly handle QPixmap creation on main thread, we need a slot on the main thread.
     # Since MediaLoader lives on main thread (created there), its slots run on main thread 
     # if connected with AutoConnection/QueuedConnection.
@@ -110,5 +238,62 @@ class MediaLoader(QObject):
         for path in paths:
             self.load_media(path)
 
+    def cancel_pending(self, keep_paths):
+        """
+        Cancels queued loads that are no longer wanted, e.g. prefetches for files
+        the user already skipped past. Loads that are already running finish and
+        end up in the cache.
+        """
+        keep = {str(p) for p in keep_paths}
+        for key, future in list(self.loading_tasks.items()):
+            if key[0] not in keep and future.cancel():
+                del self.loading_tasks[key]
+
+    def pin(self, path):
+        """Protects the cache entries of the displayed image from eviction by prefetches."""
+        self.pinned_path = str(path) if path else None
+
+    def invalidate(self, path):
+        """Drops cached pixmaps and pending loads of a file that was moved or deleted."""
+        path_str = str(path)
+        for key in ((path_str, False), (path_str, True)):
+            pixmap = self.cache.pop(key, None)
+            if pixmap is not None:
+                self.cache_bytes -= self._pixmap_bytes(pixmap)
+            future = self.loading_tasks.pop(key, None)
+            if future is not None:
+                future.cancel()
+        self.original_sizes.pop(path_str, None)
+        if self.pinned_path == path_str:
+            self.pinned_path = None
+
+    def is_busy(self):
+        """True while decodes are queued or running (background work should wait)."""
+        return bool(self.loading_tasks)
+
+    def cache_stats(self):
+        return {
+            "entries": len(self.cache),
+            "bytes": self.cache_bytes,
+            "budget": self.cache_budget,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def shutdown(self):
+        """
+        Cancels queued decodes and waits for the running ones. Call before the loader or the
+        thumbnail cache goes away: a finishing worker emits on this object and writes to the cache.
+        """
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
     def clear_cache(self):
+        """Drops all pixmaps (e.g. when a session is closed) and starts counting hits anew."""
+        self.logger.info(f"Clearing pixmap cache: {self.cache_stats()}")
         self.cache.clear()
+        self.cache_bytes = 0
+        self.pinned_path = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
@@ -1,43 +1,134 @@
 import logging
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime
 from PIL import Image, UnidentifiedImageError
 import piexif
+from .format_handlers import handler_for
+
+# EXIF orientations that rotate the image by 90 degrees (width and height swap)
+ROTATED_ORIENTATIONS = {5, 6, 7, 8}
+
 
 class MetadataExtractor:
+    METADATA_CACHE_SIZE = 4096  # Files kept in the metadata LRU
+
     def __init__(self):
         self.logger = logging.getLogger("FotoSortierer.MetadataExtractor")
+        self._metadata_cache = OrderedDict()  # path -> (size, mtime_ns, metadata), least recently used first
+        self._metadata_lock = threading.Lock()
 
-    def get_date_taken(self, file_path):
+    def read_metadata(self, file_path, cache=True):
         """
-        Extracts the date taken from EXIF or file modification time.
-        Returns a datetime object.
+        Reads everything shown about a file with one open and one EXIF parse:
+        date_taken, camera_make, camera_model, width, height (as displayed, after
+        EXIF rotation), orientation, filesize and mtime. date_estimated is True if
+        the file has no recorded date and date_taken is its modification time.
+        Results are cached per file (unless cache is False) and validated against
+        size and mtime. Returns None if the file does not exist.
         """
         path = Path(file_path)
-        if not path.exists():
-            self.logger.error(f"File not found: {path}")
+        try:
+            stat = path.stat()
+        except OSError as e:
+            self.logger.error(f"File not found: {path} ({e})")
             return None
 
-        # Try EXIF for images
-        if path.suffix.lower() in ['.jpg', '.jpeg', '.webp', '.tiff']:
+        key = str(path)
+        with self._metadata_lock:
+            entry = self._metadata_cache.get(key)
+            if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+                self._metadata_cache.move_to_end(key)
+                return dict(entry[2])
+
+        metadata = {
+            "filename": path.name,
+            "filesize": stat.st_size,
+            "mtime": stat.st_mtime,
+            "date_taken": None,
+            "camera_make": None,
+            "camera_model": None,
+            "width": None,
+            "height": None,
+            "orientation": 1,
+            "date_estimated": False,
+        }
+        handler = handler_for(path)
+        probed = None
+        if handler is not None:
             try:
-                img = Image.open(path)
-                if "exif" in img.info:
-                    exif_dict = piexif.load(img.info["exif"])
-                    # 36867 is DateTimeOriginal, 36868 is DateTimeDigitized
-                    date_str = exif_dict.get("Exif", {}).get(36867)
-                    if date_str:
-                        return self._parse_exif_date(date_str)
-            except (UnidentifiedImageError, ValueError, Exception) as e:
-                self.logger.warning(f"Could not read EXIF from {path}: {e}")
-
-        # Fallback: File modification time
+                probed = handler.probe(str(path))
+            except (ValueError, OSError) as e:
+                self.logger.warning(f"Could not probe {path}: {e}")
+                probed = {}
+        if probed is not None:
+            # RAW and similar formats: read from the file structure by the format handler
+            metadata.update({k: v for k, v in probed.items() if v is not None})
+        else:
+            try:
+                # Image.open only reads the header; no pixel data is decoded
+                with Image.open(path) as img:
+                    metadata["width"], metadata["height"] = img.size
+                    exif_bytes = img.info.get("exif")
+                if exif_bytes:
+                    self._apply_exif(metadata, exif_bytes, path)
+            except (UnidentifiedImageError, OSError):
+                pass  # Videos and unreadable files keep the file system values
+
+        if metadata["orientation"] in ROTATED_ORIENTATIONS and metadata["width"]:
+            metadata["width"], metadata["height"] = metadata["height"], metadata["width"]
+        if metadata["date_taken"] is None:
+            # Fallback: File modification time
+            metadata["date_taken"] = datetime.fromtimestamp(stat.st_mtime)
+            metadata["date_estimated"] = True
+
+        if not cache:
+            return metadata
+        with self._metadata_lock:
+            self._metadata_cache[key] = (stat.st_size, stat.st_mtime_ns, metadata)
+            self._metadata_cache.move_to_end(key)
+            while len(self._metadata_cache) > self.METADATA_CACHE_SIZE:
+                self._metadata_cache.popitem(last=False)
+        return dict(metadata)
+
+    def _apply_exif(self, metadata, exif_bytes, path):
+        """Fills date, camera and orientation from a raw EXIF block."""
         try:
-            timestamp = path.stat().st_mtime
-            return datetime.fromtimestamp(timestamp)
-        except OSError as e:
-            self.logger.error(f"Error reading file stats for {path}: {e}")
-            return datetime.now() # Absolute fallback
+            exif_dict = piexif.load(exif_bytes)
+        except Exception as e:
+            self.logger.warning(f"Could not read EXIF from {path}: {e}")
+            return
+        zeroth = exif_dict.get("0th", {})
+        # 36867 is DateTimeOriginal, 36868 is DateTimeDigitized
+        date_str = exif_dict.get("Exif", {}).get(36867)
+        if date_str:
+            metadata["date_taken"] = self._parse_exif_date(date_str)
+        for field, tag in (("camera_make", piexif.ImageIFD.Make), ("camera_model", piexif.ImageIFD.Model)):
+            value = zeroth.get(tag)
+            if value:
+                metadata[field] = value.decode("utf-8", errors="replace").strip("\x00 ") or None
+        metadata["orientation"] = zeroth.get(piexif.ImageIFD.Orientation, 1)
+
+    def invalidate_metadata(self, file_path):
+        """Forgets the cached metadata of a file, e.g. after its EXIF was rewritten."""
+        with self._metadata_lock:
+            self._metadata_cache.pop(str(Path(file_path)), None)
+
+    def get_date_taken(self, file_path):
+        """
+        Extracts the date taken from EXIF or file modification time.
+        Returns a datetime object.
+        """
+        metadata = self.read_metadata(file_path)
+        return metadata["date_taken"] if metadata else None
+
+    def get_recorded_date_taken(self, file_path):
+        """The date taken stored in the file (EXIF or RAW header), or None; never the modification time."""
+        metadata = self.read_metadata(file_path)
+        if not metadata or metadata["date_estimated"]:
+            return None
+        return metadata["date_taken"]
 
     def _parse_exif_date(self, date_bytes):
         """Parses EXIF date string (b'YYYY:MM:DD HH:MM:SS') to datetime."""
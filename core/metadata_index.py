@@ -0,0 +1,197 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .file_manager import FileManager
+
+# Columns of the file_metadata table besides session_id and path
+METADATA_COLUMNS = ["filesize", "mtime", "date_taken", "camera_make", "camera_model",
+                    "width", "height", "orientation", "duration", "date_estimated"]
+
+
+def _video_metadata(path: str) -> Dict:
+    """Width, height and duration (seconds) of a video from its container header."""
+    import cv2  # Only loaded once a session with videos is indexed
+
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            return {}
+        frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        return {
+            "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or None,
+            "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or None,
+            "duration": frame_count / fps if frame_count > 0 and fps > 0 else None,
+        }
+    finally:
+        cap.release()
+
+
+class MetadataIndex:
+    """
+    Per-session table of file metadata (date taken, camera, dimensions, video duration),
+    filled by a background thread. The file_metadata table lives in the session database
+    and is created and cleaned up by SessionManager.
+
+    The indexer runs at the lowest CPU priority and pauses while the foreground is
+    busy (is_busy, e.g. the media loader decoding), so it never delays the sorter.
+    Rows are validated against size and mtime, so an edited file is simply read again.
+    """
+    def __init__(self, metadata_extractor, db_path="data/sessions.db", is_busy: Optional[Callable[[], bool]] = None,
+                 batch_size=200):
+        self.logger = logging.getLogger("FotoSortierer.MetadataIndex")
+        self.metadata_extractor = metadata_extractor
+        self.is_busy = is_busy
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._generation = 0  # Bumped to cancel a running indexing pass
+        self._thread = None
+
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+    def index_session(self, session_id: str, paths: Iterable[str]):
+        """Indexes the files of a session in the background. Cancels a previous pass."""
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        self._thread = threading.Thread(target=self._run, args=(session_id, list(paths), generation),
+                                        name="MetadataIndex", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        with self._lock:
+            self._generation += 1
+
+    def _run(self, session_id, paths, generation):
+        try:
+            # Nice value of this thread only (Linux); elsewhere the busy check does the throttling
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except (AttributeError, OSError):
+            pass
+
+        with self._lock:
+            known = {
+                path: (size, mtime) for path, size, mtime in self._conn.execute(
+                    # Rows from before date_estimated existed are read again
+                    "SELECT path, filesize, mtime FROM file_metadata WHERE session_id = ? AND date_estimated IS NOT NULL",
+                    (session_id,)
+                )
+            }
+
+        started = time.monotonic()
+        rows = []
+        indexed = 0
+        for path in paths:
+            while self.is_busy and self.is_busy() and self._generation == generation:
+                time.sleep(0.05)
+            if self._generation != generation:
+                break
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if known.get(path) == (stat.st_size, stat.st_mtime):
+                continue
+            metadata = self._read(path)
+            if metadata is None:
+                continue
+            rows.append(self._row(session_id, path, metadata))
+            if len(rows) >= self.batch_size:
+                self._write(rows)
+                indexed += len(rows)
+                rows = []
+        if rows:
+            self._write(rows)
+            indexed += len(rows)
+        if indexed:
+            self.logger.info(f"Indexed metadata of {indexed} files in {time.monotonic() - started:.1f}s")
+
+    def _read(self, path: str) -> Optional[Dict]:
+        # cache=False: a full pass must not push the sorter's entries out of the LRU
+        metadata = self.metadata_extractor.read_metadata(path, cache=False)
+        if metadata is not None and Path(path).suffix.lower() in FileManager.VIDEO_EXTENSIONS:
+            try:
+                metadata.update(_video_metadata(path))
+            except Exception as e:
+                self.logger.warning(f"Could not read video metadata of {path}: {e}")
+        return metadata
+
+    @staticmethod
+    def _row(session_id, path, metadata):
+        values = dict(metadata)
+        if isinstance(values.get("date_taken"), datetime):
+            values["date_taken"] = values["date_taken"].isoformat()
+        return (session_id, path, *(values.get(column) for column in METADATA_COLUMNS))
+
+    def _write(self, rows):
+        placeholders = ", ".join("?" * (len(METADATA_COLUMNS) + 2))
+        with self._lock:
+            try:
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO file_metadata (session_id, path, {', '.join(METADATA_COLUMNS)}) "
+                    f"VALUES ({placeholders})", rows
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                self.logger.error(f"Error writing metadata index: {e}")
+
+    def store(self, session_id: str, path: str, metadata: Dict):
+        """Adds metadata read in the foreground, so the next lookup finds it."""
+        self._write([self._row(session_id, path, metadata)])
+
+    def lookup(self, session_id: str, path: str) -> Optional[Dict]:
+        """Indexed metadata of a file in the same shape as read_metadata, or None if missing or outdated."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(METADATA_COLUMNS)} FROM file_metadata WHERE session_id = ? AND path = ?",
+                (session_id, path)
+            ).fetchone()
+        if row is None:
+            return None
+        metadata = dict(zip(METADATA_COLUMNS, row))
+        if (metadata["filesize"], metadata["mtime"]) != (stat.st_size, stat.st_mtime) or metadata["date_estimated"] is None:
+            return None
+        metadata["date_estimated"] = bool(metadata["date_estimated"])
+        if metadata["date_taken"]:
+            metadata["date_taken"] = datetime.fromisoformat(metadata["date_taken"])
+        metadata["filename"] = Path(path).name
+        return metadata
+
+    def date_range(self, session_id: str):
+        """
+        (earliest, latest) recorded date taken over the indexed files, or (None, None).
+        Modification-time fallbacks are left out, like ExifManager.get_recorded_date_taken does.
+        """
+        with self._lock:
+            first, last = self._conn.execute(
+                "SELECT MIN(date_taken), MAX(date_taken) FROM file_metadata WHERE session_id = ? AND date_estimated = 0",
+                (session_id,)
+            ).fetchone()
+        return (datetime.fromisoformat(first) if first else None, datetime.fromisoformat(last) if last else None)
+
+    def camera_counts(self, session_id: str) -> List:
+        """(camera model, number of files) over the indexed files, most frequent first."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COALESCE(camera_model, ''), COUNT(*) FROM file_metadata WHERE session_id = ? "
+                "GROUP BY camera_model ORDER BY COUNT(*) DESC", (session_id,)
+            ).fetchall()
+
+    def close(self):
+        self.cancel()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        with self._lock:
+            self._conn.close()
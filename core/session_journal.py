@@ -0,0 +1,123 @@
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Counter deltas of each journaled action: (sorted_files, deleted_count)
+ACTION_COUNTERS = {
+    "keep": (1, 0),
+    "move": (1, 0),
+    "delete": (0, 1),
+}
+
+
+class SessionJournal:
+    """
+    Append-only log of sort actions for one session, one JSON object per line:
+    {"op": "keep" | "move" | "delete" | "undo" | "failed", "src", "dst", "size", "index", "ts"}.
+
+    Appending a line replaces rewriting whole JSON documents on every keypress.
+    Lines are flushed immediately but fsync'ed in batches (every fsync_every
+    records or fsync_interval seconds), so a crash loses at most the last moment.
+    The journal covers the actions since the last checkpoint (the session's
+    manifest); replaying it on top of the checkpoint restores the session.
+    """
+    def __init__(self, path, fsync_every=32, fsync_interval=1.0):
+        self.logger = logging.getLogger("FotoSortierer.SessionJournal")
+        self.path = Path(path)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def append(self, op: str, src: str, dst: Optional[str] = None, size: int = 0,
+               index: Optional[int] = None, reverts: Optional[str] = None) -> Dict:
+        record = {"op": op, "src": str(src), "dst": str(dst) if dst else None,
+                  "size": size, "index": index, "ts": time.time()}
+        if reverts:
+            # For "failed": the op of the reverted action, which may predate the journal
+            record["reverts"] = reverts
+        try:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self.sync()
+        except IOError as e:
+            self.logger.error(f"Error writing journal {self.path}: {e}")
+        return record
+
+    def sync(self):
+        """Forces appended records to disk."""
+        if self._file is None or not self._unsynced:
+            return
+        try:
+            os.fsync(self._file.fileno())
+        except OSError as e:
+            self.logger.error(f"Error syncing journal {self.path}: {e}")
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def read(self) -> List[Dict]:
+        """All records of the journal. A torn last line (crash during write) is skipped."""
+        if not self.path.exists():
+            return []
+        records = []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        self.logger.warning(f"Skipping damaged journal line in {self.path}")
+        except IOError as e:
+            self.logger.error(f"Error reading journal {self.path}: {e}")
+        return records
+
+    @staticmethod
+    def effective_actions(records: List[Dict]) -> List[Dict]:
+        """
+        Resolves "undo" and "failed" records (each reverts the latest action on
+        its file), leaving the actions still in effect. An undo of a move is only
+        journaled once the file is back, so other actions may come in between.
+        A "failed" record whose action was checkpointed already stays in the
+        result, since it has to be reverted on top of the checkpoint.
+        """
+        actions = []
+        for record in records:
+            op = record.get("op")
+            if op == "undo":
+                for i in range(len(actions) - 1, -1, -1):
+                    if actions[i]["op"] != "failed" and actions[i]["src"] == record["src"]:
+                        del actions[i]
+                        break
+            elif op == "failed":
+                for i in range(len(actions) - 1, -1, -1):
+                    if actions[i]["op"] != "failed" and actions[i]["src"] == record["src"]:
+                        del actions[i]
+                        break
+                else:
+                    actions.append(record)
+            elif op in ACTION_COUNTERS:
+                actions.append(record)
+        return actions
+
+    def truncate(self):
+        """Empties the journal after a checkpoint."""
+        self.close()
+        try:
+            self.path.unlink(missing_ok=True)
+        except OSError as e:
+            self.logger.error(f"Error truncating journal {self.path}: {e}")
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
@@ -2,34 +2,248 @@ import json
 import logging
 import time
 import os
+import sqlite3
+import threading
 from pathlib import Path
 
+
+def write_json_atomic(path, data, **dump_kwargs):
+    """Writes JSON to a temp file next to path and renames it over path, so readers never see half a file."""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, **dump_kwargs)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+# Session fields stored as columns; any other keys go into the "extra" JSON column
+SESSION_COLUMNS = [
+    "id", "name", "source_path", "target_path", "created_at", "last_accessed", "status",
+    "detect_duplicates", "progress", "initial_filecount", "sorted_files", "deleted_count",
+    "deleted_size_bytes",
+]
+
+# File states in the file_state table
+FILE_STATES = ("pending", "kept", "moved", "deleted")
+
+STAT_KEYS = ("sorted_files", "deleted_count", "deleted_size_bytes")
+
+
+def _state_counts(state, size):
+    """Contribution of one file_state row to the STAT_KEYS counters."""
+    if state in ("kept", "moved"):
+        return (1, 0, 0)
+    if state == "deleted":
+        return (0, 1, size or 0)
+    return (0, 0, 0)
+
+
 class SessionManager:
-    def __init__(self, sessions_file="data/sessions.json"):
-        self.sessions_file = Path(sessions_file)
+    """
+    Sessions live in a SQLite database (data/sessions.db) with tables for the
+    sessions, the per-file state of sorted files, duplicate pairs and their
+    review decisions. Only the small sessions table is read at startup.
+
+    self.sessions stays a dict of plain session dicts that callers update;
+    save_sessions() coalesces those changes into one write per save_delay.
+    The sorted/deleted counters are not part of them: they are derived from
+    the file history, see get_session_stats.
+    """
+    def __init__(self, db_path="data/sessions.db", legacy_json_path="data/sessions.json", save_delay=1.0):
+        self.db_path = Path(db_path)
+        self.data_dir = self.db_path.parent
+        self.legacy_json_path = Path(legacy_json_path)
         self.logger = logging.getLogger("FotoSortierer.SessionManager")
+        
+        # Coalesced saving: save_sessions only marks the data dirty and a timer
+        # writes it at most save_delay seconds later, however many changes came in
+        self.save_delay = save_delay
+        self._dirty = False
+        self._save_timer = None
+        self._save_lock = threading.RLock()
+        self._pending_file_states = {}  # (session_id, path) -> (state, destination, size, updated_at)
+        self._stats = {}  # session_id -> [sorted, deleted, deleted bytes] over file_state, kept up to date by record_file_state
+        self.writes = 0
+        self.writes_avoided = 0
+        
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+        self._migrate_legacy_json()
         self.sessions = self.load_sessions()
 
-    def load_sessions(self):
-        """Loads sessions from JSON file."""
-        if not self.sessions_file.exists():
-            return {}
-        
+    def _create_tables(self):
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                id TEXT PRIMARY KEY,
+                name TEXT,
+                source_path TEXT,
+                target_path TEXT,
+                created_at REAL,
+                last_accessed REAL,
+                status TEXT,
+                detect_duplicates INTEGER,
+                progress INTEGER,
+                initial_filecount INTEGER,
+                sorted_files INTEGER,
+                deleted_count INTEGER,
+                deleted_size_bytes INTEGER,
+                extra TEXT
+            );
+            CREATE TABLE IF NOT EXISTS file_state (
+                session_id TEXT NOT NULL,
+                path TEXT NOT NULL,
+                state TEXT NOT NULL,
+                destination TEXT,
+                size INTEGER,
+                updated_at REAL,
+                PRIMARY KEY (session_id, path)
+            );
+            CREATE TABLE IF NOT EXISTS duplicate_pairs (
+                session_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                left_path TEXT NOT NULL,
+                right_path TEXT NOT NULL,
+                decision TEXT,
+                PRIMARY KEY (session_id, position)
+            );
+            CREATE TABLE IF NOT EXISTS file_metadata (
+                session_id TEXT NOT NULL,
+                path TEXT NOT NULL,
+                filesize INTEGER,
+                mtime REAL,
+                date_taken TEXT,
+                camera_make TEXT,
+                camera_model TEXT,
+                width INTEGER,
+                height INTEGER,
+                orientation INTEGER,
+                duration REAL,
+                date_estimated INTEGER,
+                PRIMARY KEY (session_id, path)
+            );
+        """)
+        self._ensure_metadata_columns()
+        self._conn.commit()
+
+    def _ensure_metadata_columns(self):
+        """Add file_metadata columns to databases created before they existed (their rows are indexed again)."""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(file_metadata)")}
+        if "date_estimated" not in columns:
+            self._conn.execute("ALTER TABLE file_metadata ADD COLUMN date_estimated INTEGER")
+
+    def _migrate_legacy_json(self):
+        """One-time import of data/sessions.json and the session_*_duplicates.json files."""
+        if not self.legacy_json_path.exists():
+            return
         try:
-            with open(self.sessions_file, "r", encoding="utf-8") as f:
-                return json.load(f)
+            with open(self.legacy_json_path, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
         except (json.JSONDecodeError, IOError) as e:
+            self.logger.error(f"Error reading legacy sessions file: {e}")
+            return
+
+        # Without a per-file history, the counters so far become the base the history adds to
+        for session in legacy.values():
+            session["stats_baseline"] = {key: session.get(key, 0) for key in STAT_KEYS}
+
+        try:
+            with self._save_lock:
+                self._write_sessions(legacy.values())
+                for session_id, session in legacy.items():
+                    dupe_file = Path(session.get("duplicate_file") or
+                                     self.data_dir / f"session_{session_id}_duplicates.json")
+                    if dupe_file.exists():
+                        with open(dupe_file, "r", encoding="utf-8") as f:
+                            self._write_pairs(session_id, json.load(f))
+                        dupe_file.rename(dupe_file.with_suffix(".json.migrated"))
+                self._conn.commit()
+            self.legacy_json_path.rename(self.legacy_json_path.with_suffix(".json.migrated"))
+            self.logger.info(f"Migrated {len(legacy)} sessions from {self.legacy_json_path}")
+        except (sqlite3.Error, json.JSONDecodeError, IOError, OSError) as e:
+            self.logger.error(f"Error migrating legacy sessions: {e}")
+
+    def load_sessions(self):
+        """Loads sessions from the database."""
+        sessions = {}
+        try:
+            cursor = self._conn.execute(f"SELECT {', '.join(SESSION_COLUMNS)}, extra FROM sessions")
+            for row in cursor:
+                session = dict(zip(SESSION_COLUMNS, row[:-1]))
+                session["detect_duplicates"] = bool(session["detect_duplicates"])
+                # Counters stored by older versions; they are derived from file_state now
+                for key in STAT_KEYS:
+                    session.pop(key, None)
+                if row[-1]:
+                    session.update(json.loads(row[-1]))
+                sessions[session["id"]] = session
+        except (sqlite3.Error, json.JSONDecodeError) as e:
             self.logger.error(f"Error loading sessions: {e}")
-            return {}
+        return sessions
 
     def save_sessions(self):
-        """Saves sessions to JSON file."""
-        self.sessions_file.parent.mkdir(parents=True, exist_ok=True)
-        try:
-            with open(self.sessions_file, "w", encoding="utf-8") as f:
-                json.dump(self.sessions, f, indent=4)
-        except IOError as e:
-            self.logger.error(f"Error saving sessions: {e}")
+        """
+        Marks sessions as changed. The database is written by a timer within save_delay
+        seconds (not pushed back by further changes), or by flush().
+        """
+        with self._save_lock:
+            if self._dirty:
+                self.writes_avoided += 1
+                return
+            self._dirty = True
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        self._save_timer = threading.Timer(self.save_delay, self.flush)
+        self._save_timer.daemon = True
+        self._save_timer.start()
+
+    def flush(self):
+        """Writes pending session and file state changes now. Called on session close and app exit."""
+        with self._save_lock:
+            if self._save_timer:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self._dirty and not self._pending_file_states:
+                return
+            try:
+                if self._dirty:
+                    # Snapshot in one pass of the C encoder, since the timer thread runs
+                    # while the GUI thread may be updating counters
+                    self._write_sessions(json.loads(json.dumps(list(self.sessions.values()))))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO file_state (session_id, path, state, destination, size, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(*key, *value) for key, value in self._pending_file_states.items()]
+                )
+                self._conn.commit()
+                self._dirty = False
+                self._pending_file_states.clear()
+                self.writes += 1
+            except Exception as e:
+                # Also what the timer thread raises; left uncaught, _dirty would stay set with no
+                # timer running, and every later save_sessions() would be dropped as coalesced
+                self.logger.error(f"Error saving sessions, retrying in {self.save_delay}s: {e}")
+                try:
+                    self._conn.rollback()
+                except sqlite3.Error:
+                    pass
+                self._dirty = True
+                self._schedule_flush()
+
+    def _write_sessions(self, sessions):
+        rows = []
+        for session in sessions:
+            extra = {key: value for key, value in session.items() if key not in SESSION_COLUMNS}
+            rows.append([session.get(column) for column in SESSION_COLUMNS] + [json.dumps(extra) if extra else None])
+        placeholders = ", ".join("?" * (len(SESSION_COLUMNS) + 1))
+        self._conn.executemany(
+            f"INSERT OR REPLACE INTO sessions ({', '.join(SESSION_COLUMNS)}, extra) VALUES ({placeholders})", rows
+        )
 
     def create_session(self, name, source_path, target_path, detect_duplicates=False):
         """Creates a new session and saves it."""
@@ -43,12 +257,8 @@ class SessionManager:
             "last_accessed": time.time(),
             "status": "new", # new, scanning, sorting, completed
             "detect_duplicates": detect_duplicates,
-            "detect_duplicates": detect_duplicates,
             "progress": 0,
-            "initial_filecount": 0,
-            "sorted_files": 0,
-            "deleted_count": 0,
-            "deleted_size_bytes": 0
+            "initial_filecount": 0
         }
         self.sessions[session_id] = session_data
         self.save_sessions()
@@ -56,18 +266,176 @@ class SessionManager:
         return session_id
 
     def get_all_sessions(self):
-        """Returns a list of all sessions sorted by last accessed."""
-        return sorted(self.sessions.values(), key=lambda x: x.get("last_accessed", 0), reverse=True)
+        """Returns a list of all sessions sorted by last accessed, with counters from the file history."""
+        stats = self.get_session_stats()
+        sessions = [{**session, **stats.get(session["id"], {})} for session in self.sessions.values()]
+        return sorted(sessions, key=lambda x: x.get("last_accessed", 0), reverse=True)
 
     def delete_session(self, session_id):
         """Deletes a session by its ID."""
         if session_id in self.sessions:
             del self.sessions[session_id]
-            self.save_sessions()
+            with self._save_lock:
+                self._pending_file_states = {
+                    key: value for key, value in self._pending_file_states.items() if key[0] != session_id
+                }
+                self._stats.pop(session_id, None)
+                try:
+                    for table, column in (("sessions", "id"), ("file_state", "session_id"), ("duplicate_pairs", "session_id"),
+                                          ("file_metadata", "session_id")):
+                        self._conn.execute(f"DELETE FROM {table} WHERE {column} = ?", (session_id,))
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    self.logger.error(f"Error deleting session {session_id}: {e}")
+            self.manifest_path(session_id).unlink(missing_ok=True)
+            self.journal_path(session_id).unlink(missing_ok=True)
             self.logger.info(f"Deleted session {session_id}")
             return True
         return False
 
+    def record_file_state(self, session_id, path, state, destination=None, size=0):
+        """
+        Records what happened to a file (see FILE_STATES). Buffered and written
+        together with the next session save. The session's counters follow along.
+        """
+        key = (session_id, str(path))
+        with self._save_lock:
+            totals = self._stats.get(session_id)
+            if totals is not None:
+                previous = self._pending_file_states.get(key)
+                if previous is None:
+                    previous = self._conn.execute(
+                        "SELECT state, destination, size FROM file_state WHERE session_id = ? AND path = ?", key
+                    ).fetchone()
+                removed = _state_counts(previous[0], previous[2]) if previous else (0, 0, 0)
+                added = _state_counts(state, size)
+                for i in range(len(STAT_KEYS)):
+                    totals[i] += added[i] - removed[i]
+            self._pending_file_states[key] = (
+                state, str(destination) if destination else None, size, time.time()
+            )
+        self.save_sessions()
+
+    def get_session_stats(self, session_id=None):
+        """
+        Counters aggregated from the per-file history: {session_id: {"sorted_files",
+        "deleted_count", "deleted_size_bytes"}}, or a single session's dict if session_id is given.
+        Sessions migrated from JSON add their counters from before the migration.
+        A session is aggregated once; after that record_file_state keeps its totals
+        current, so this is cheap enough to call on every sort action.
+        """
+        session_ids = [session_id] if session_id is not None else list(self.sessions)
+        with self._save_lock:
+            missing = [sid for sid in session_ids if sid not in self._stats]
+        if missing:
+            self._aggregate_stats(session_id)
+
+        stats = {}
+        with self._save_lock:
+            for sid in session_ids:
+                baseline = self.sessions.get(sid, {}).get("stats_baseline", {})
+                values = self._stats.get(sid, [0, 0, 0])
+                stats[sid] = {key: baseline.get(key, 0) + value for key, value in zip(STAT_KEYS, values)}
+
+        if session_id is not None:
+            return stats[session_id]
+        return stats
+
+    def _aggregate_stats(self, session_id=None):
+        """Fills the counter cache from file_state, for one session or all of them."""
+        query = """
+            SELECT session_id,
+                   SUM(state IN ('kept', 'moved')),
+                   SUM(state = 'deleted'),
+                   SUM(CASE WHEN state = 'deleted' THEN size ELSE 0 END)
+            FROM file_state
+        """
+        params = ()
+        if session_id is not None:
+            query += " WHERE session_id = ?"
+            params = (session_id,)
+        query += " GROUP BY session_id"
+
+        try:
+            # Under the lock, so no file state recorded in between is missed by both the query and the cache
+            with self._save_lock:
+                self.flush()
+                rows = self._conn.execute(query, params).fetchall()
+                for sid in ([session_id] if session_id is not None else self.sessions):
+                    self._stats[sid] = [0, 0, 0]
+                for sid, *values in rows:
+                    self._stats[sid] = [value or 0 for value in values]
+        except sqlite3.Error as e:
+            self.logger.error(f"Error reading session stats: {e}")
+
+    def save_duplicate_pairs(self, session_id, pairs):
+        """Stores the soft duplicate pairs of a session for manual review, replacing earlier ones."""
+        with self._save_lock:
+            try:
+                self._conn.execute("DELETE FROM duplicate_pairs WHERE session_id = ?", (session_id,))
+                self._write_pairs(session_id, pairs)
+                self._conn.commit()
+            except sqlite3.Error as e:
+                self.logger.error(f"Error saving duplicate pairs for session {session_id}: {e}")
+
+    def _write_pairs(self, session_id, pairs):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO duplicate_pairs (session_id, position, left_path, right_path) VALUES (?, ?, ?, ?)",
+            [(session_id, position, str(left), str(right)) for position, (left, right) in enumerate(pairs)]
+        )
+
+    def load_duplicate_pairs(self, session_id):
+        """
+        Returns the stored pairs as [left, right, decision] lists, in review order
+        (the list index is the position record_pair_decision takes). decision is None
+        for pairs that were not reviewed yet.
+        """
+        with self._save_lock:
+            rows = self._conn.execute(
+                "SELECT left_path, right_path, decision FROM duplicate_pairs WHERE session_id = ? ORDER BY position",
+                (session_id,)
+            ).fetchall()
+        return [list(row) for row in rows]
+
+    def record_pair_decision(self, session_id, position, decision):
+        """Stores the review decision ("keep_left", "keep_right", "keep_both") of a pair."""
+        with self._save_lock:
+            try:
+                self._conn.execute(
+                    "UPDATE duplicate_pairs SET decision = ? WHERE session_id = ? AND position = ?",
+                    (decision, session_id, position)
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                self.logger.error(f"Error saving review decision for session {session_id}: {e}")
+
+    def manifest_path(self, session_id):
+        return self.data_dir / f"session_{session_id}_manifest.json"
+
+    def journal_path(self, session_id):
+        return self.data_dir / f"session_{session_id}_journal.jsonl"
+
+    def load_manifest(self, session_id):
+        """Loads the stored file manifest of a session, or None if there is none."""
+        path = self.manifest_path(session_id)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            self.logger.error(f"Error loading manifest for session {session_id}: {e}")
+            return None
+
+    def save_manifest(self, session_id, manifest):
+        """Saves the file manifest of a session (compact, since it lists every pending file)."""
+        path = self.manifest_path(session_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            write_json_atomic(path, manifest, separators=(",", ":"))
+        except (IOError, OSError) as e:
+            self.logger.error(f"Error saving manifest for session {session_id}: {e}")
+
     def run_duplicate_check(self, session_id, config_manager):
         """Runs the duplicate check for a specific session."""
         from .file_manager import FileManager
@@ -90,20 +458,19 @@ class SessionManager:
             file_manager = FileManager()
             detector = DuplicateDetector(config_manager, session_manager=self)
 
-            # 1. Scan Directory and store initial count
-            files = file_manager.scan_directory(session["source_path"])
-            session["initial_filecount"] = len(files)
-            self.save_sessions()
+            # 1. Scan Directory while hashing starts on the first file
+            discovered = []
+            def discovered_files():
+                for file_info in file_manager.iter_directory(session["source_path"]):
+                    discovered.append(file_info["path"])
+                    yield file_info
 
             # 2. Detect Duplicates
-            duplicates = detector.scan_and_process(files, session_id)
+            duplicates = detector.scan_and_process(discovered_files(), session_id)
+            session["initial_filecount"] = len(discovered)
             
             # 3. Save Results
-            dupe_file = self.sessions_file.parent / f"session_{session_id}_duplicates.json"
-            with open(dupe_file, "w", encoding="utf-8") as f:
-                json.dump(duplicates, f, indent=4)
-            
-            session["duplicate_file"] = str(dupe_file)
+            self.save_duplicate_pairs(session_id, duplicates)
             session["status"] = "review_duplicates" if duplicates else "ready_to_sort"
             self.save_sessions()
             
@@ -118,7 +485,7 @@ class SessionManager:
     def move_file(self, session_id, file_path, target_folder):
         """
         Moves a file to the target folder.
-        Note: Does NOT update sorted_files - caller is responsible for that.
+        Note: Does NOT record the file state - caller is responsible for that.
         """
         import shutil
         
@@ -140,17 +507,13 @@ class SessionManager:
             self.logger.error(f"Error moving file {source} to {destination}: {e}")
             return False
 
-    def update_deleted_stats(self, session_id, file_size):
+    def update_deleted_stats(self, session_id, file_size, file_path, destination=None):
         """
-        Updates the deleted file count and size for a session.
+        Records a deleted file in the file history, which the deleted count and size are derived from.
         """
-        session = self.sessions.get(session_id)
-        if not session:
+        if session_id not in self.sessions:
             return False
-        
-        session["deleted_count"] = session.get("deleted_count", 0) + 1
-        session["deleted_size_bytes"] = session.get("deleted_size_bytes", 0) + file_size
-        self.save_sessions()
+        self.record_file_state(session_id, file_path, "deleted", destination, file_size)
         return True
     
     def delete_file(self, session_id, file_path):
@@ -168,7 +531,7 @@ class SessionManager:
         success = self.move_file(session_id, file_path, str(trash_folder))
         
         if success:
-            self.update_deleted_stats(session_id, file_size)
+            self.update_deleted_stats(session_id, file_size, file_path, trash_folder / Path(file_path).name)
         
         return success
 
@@ -182,6 +545,6 @@ class SessionManager:
         
         return {
             "progress": session.get("progress", 0),
-            "processed": session.get("sorted_files", 0),
+            "processed": self.get_session_stats(session_id)["sorted_files"],
             "total": session.get("initial_filecount", 0)
         }
@@ -0,0 +1,236 @@
+import io
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, Optional
+
+from PIL import Image, ImageOps
+
+from .hash_cache import content_key
+from .format_handlers import handler_for
+
+THUMBNAIL_EDGE = 320
+THUMBNAIL_QUALITY = 80
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
+
+
+def _encode_thumbnail(img: Image.Image, edge: int) -> bytes:
+    img.thumbnail((edge, edge))
+    buffer = io.BytesIO()
+    img.convert("RGB").save(buffer, format="JPEG", quality=THUMBNAIL_QUALITY)
+    return buffer.getvalue()
+
+
+def make_thumbnail(path: str, edge: int = THUMBNAIL_EDGE) -> Optional[bytes]:
+    """JPEG preview of an image with its long side at most `edge` pixels, EXIF rotation applied."""
+    try:
+        handler = handler_for(path)
+        if handler is not None:
+            # RAW, HEIC: scale down the format's own preview (already upright)
+            img = handler.open_preview(path, max_edge=edge)
+            return _encode_thumbnail(img, edge) if img is not None else None
+        with Image.open(path) as img:
+            # JPEG: let libjpeg decode at a reduced scale instead of full size
+            img.draft("RGB", (edge * 2, edge * 2))
+            return _encode_thumbnail(ImageOps.exif_transpose(img), edge)
+    except Exception:
+        return None
+
+
+class ThumbnailCache:
+    """
+    Persistent store of small JPEG previews in a single SQLite file.
+    Entries are keyed by content identity (see hash_cache.content_key), with the
+    last known path, size and mtime as a fast lookup that avoids reading the file.
+    The total size is capped; least recently used previews are evicted first.
+    """
+    def __init__(self, db_path="cache/thumbnails.db", max_mb=1024, batch_size=50):
+        self.logger = logging.getLogger("FotoSortierer.ThumbnailCache")
+        self.db_path = Path(db_path)
+        self.max_bytes = max_mb * 1024 * 1024
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._pending = {}  # key -> (path, size, mtime, data)
+        self._touched = {}  # key -> last used
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._generation = 0  # Bumped to cancel a running prefill
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS thumbnails (
+                key TEXT PRIMARY KEY,
+                path TEXT,
+                size INTEGER,
+                mtime REAL,
+                data BLOB NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_thumbnails_path ON thumbnails (path)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_thumbnails_used ON thumbnails (last_used)")
+        self._conn.commit()
+        # Running size of all stored previews, so flushes need not sum the table
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM thumbnails").fetchone()[0]
+
+    def get(self, path: str, by_content: bool = True) -> Optional[bytes]:
+        """
+        Return the cached preview bytes for the file, otherwise None.
+        by_content=False skips the fallback for moved or copied files, which reads
+        the file's content key; the GUI thread leaves that to MediaLoader.load_preview.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT key, data FROM thumbnails WHERE path = ? AND size = ? AND mtime = ?",
+                (path, stat.st_size, stat.st_mtime)
+            ).fetchone()
+            if row is None:
+                for key, entry in self._pending.items():
+                    if entry[:3] == (path, stat.st_size, stat.st_mtime):
+                        return entry[3]
+        if row is None and by_content:
+            # Unknown path: the file may have been moved or copied
+            key = content_key(path, stat.st_size)
+            if key is None:
+                return None
+            with self._lock:
+                row = self._conn.execute("SELECT key, data FROM thumbnails WHERE key = ?", (key,)).fetchone()
+                if row:
+                    self._conn.execute(
+                        "UPDATE thumbnails SET path = ?, size = ?, mtime = ? WHERE key = ?",
+                        (path, stat.st_size, stat.st_mtime, key)
+                    )
+        if row is None:
+            return None
+
+        with self._lock:
+            self._touched[row[0]] = time.time()
+        return row[1]
+
+    def put(self, path: str, data: bytes, stat=None):
+        """Queue a preview for writing. Commits once batch_size entries are pending."""
+        if stat is None:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return
+        key = content_key(path, stat.st_size)
+        if key is None:
+            return
+        with self._lock:
+            self._pending[key] = (path, stat.st_size, stat.st_mtime, data)
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+
+    def contains(self, path: str, stat) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM thumbnails WHERE path = ? AND size = ? AND mtime = ?",
+                (path, stat.st_size, stat.st_mtime)
+            ).fetchone()
+        return row is not None
+
+    def prefill(self, paths: Iterable[str]):
+        """
+        Generates missing previews on a background thread, in the given order.
+        A new call cancels the previous prefill.
+        """
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        self._executor.submit(self._prefill, list(paths), generation)
+
+    def cancel_prefill(self):
+        with self._lock:
+            self._generation += 1
+
+    def _prefill(self, paths, generation):
+        created = 0
+        for path in paths:
+            if self._generation != generation:
+                break
+            if Path(path).suffix.lower() not in IMAGE_EXTENSIONS and handler_for(path) is None:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if self.contains(path, stat):
+                continue
+            data = make_thumbnail(path)
+            if data:
+                self.put(path, data, stat=stat)
+                created += 1
+        self.flush()
+        if created:
+            self.logger.info(f"Created {created} thumbnails")
+
+    def flush(self):
+        """Commit pending previews and recency updates, then enforce the size cap."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending and not self._touched:
+            return
+        now = time.time()
+        try:
+            total = self._total_bytes + sum(len(entry[3]) for entry in self._pending.values())
+            for key in self._pending:
+                # Replaced previews no longer count
+                row = self._conn.execute("SELECT LENGTH(data) FROM thumbnails WHERE key = ?", (key,)).fetchone()
+                if row:
+                    total -= row[0]
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO thumbnails (key, path, size, mtime, data, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                [(key, *entry, now) for key, entry in self._pending.items()]
+            )
+            self._conn.executemany(
+                "UPDATE thumbnails SET last_used = ? WHERE key = ?",
+                [(used, key) for key, used in self._touched.items()]
+            )
+            self._pending.clear()
+            self._touched.clear()
+            total = self._evict_locked(total)
+            self._conn.commit()
+            self._total_bytes = total
+        except sqlite3.Error as e:
+            self.logger.error(f"Error writing thumbnail cache: {e}")
+
+    def _evict_locked(self, total: int) -> int:
+        """
+        Deletes least recently used previews until the store is back under 90% of the cap.
+        Takes and returns the total size of the stored previews.
+        """
+        if total <= self.max_bytes:
+            return total
+        target = self.max_bytes * 0.9
+        evicted = 0
+        for key, length in self._conn.execute(
+            "SELECT key, LENGTH(data) FROM thumbnails ORDER BY last_used"
+        ).fetchall():
+            if total <= target:
+                break
+            self._conn.execute("DELETE FROM thumbnails WHERE key = ?", (key,))
+            total -= length
+            evicted += 1
+        self.logger.info(f"Evicted {evicted} thumbnails to stay under {self.max_bytes // (1024 * 1024)} MB")
+        return total
+
+    def close(self):
+        self.cancel_prefill()
+        self._executor.shutdown(wait=True)
+        self.flush()
+        with self._lock:
+            self._conn.close()
@@ -1,4 +1,5 @@
 import sys
+import multiprocessing
 from PyQt6.QtWidgets import QApplication
 from ui.main_window import MainWindow
 from core.logger import setup_logger
@@ -22,4 +23,6 @@ def main():
     sys.exit(app.exec())
 
 if __name__ == "__main__":
+    # Required for the process-pool hashing backend in frozen builds
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,9 @@
+import os
+import sys
+from pathlib import Path
+
+# Tests import the app packages (core, ui) from the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Qt widgets are created without a display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
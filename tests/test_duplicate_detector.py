@@ -0,0 +1,99 @@
+import random
+import shutil
+
+import pytest
+from PIL import Image
+
+from core.config_manager import ConfigManager
+from core.duplicate_detector import DuplicateDetector, IdenticalFileIndex
+from core.file_manager import FileManager
+from core.hash_cache import HashCache
+
+
+def noise_image(path, seed, size=(320, 240)):
+    rng = random.Random(seed)
+    # Coarse blocks, so the picture survives JPEG compression and has a stable pHash
+    small = Image.new("RGB", (16, 12))
+    small.putdata([tuple(rng.randrange(256) for _ in range(3)) for _ in range(16 * 12)])
+    small.resize(size, Image.Resampling.NEAREST).save(path, quality=90)
+
+
+@pytest.fixture
+def library(tmp_path, monkeypatch):
+    # Auto-deleted files go to ~/Foto-Sortierer/gelöscht_<session>
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    source = tmp_path / "source"
+    (source / "sub").mkdir(parents=True)
+    for i in range(6):
+        noise_image(source / f"img_{i}.jpg", seed=i)
+    shutil.copyfile(source / "img_0.jpg", source / "sub" / "img_0_copy.jpg")
+    shutil.copyfile(source / "img_1.jpg", source / "sub" / "img_1_copy.jpg")
+    return source
+
+
+def make_detector(tmp_path, backend):
+    config = ConfigManager(tmp_path / f"config_{backend}.json")
+    config.config.update({"hash_backend": backend, "hash_workers": 2})
+    cache = HashCache(tmp_path / f"cache_{backend}.db", tmp_path / "none.json")
+    return DuplicateDetector(config, hash_cache=cache)
+
+
+@pytest.mark.parametrize("backend", ["threads", "processes"])
+def test_scan_removes_identical_copies(tmp_path, library, backend):
+    detector = make_detector(tmp_path, backend)
+    pairs = detector.scan_and_process(FileManager().iter_directory(str(library)), "test")
+    detector.hash_cache.close()
+
+    remaining = sorted(p.name for p in library.rglob("*.jpg"))
+    assert remaining == [f"img_{i}.jpg" for i in range(6)]
+    assert pairs == []
+
+
+@pytest.mark.parametrize("backend", ["threads", "processes"])
+def test_hashes_are_cached(tmp_path, library, backend):
+    detector = make_detector(tmp_path, backend)
+    detector.scan_and_process(FileManager().iter_directory(str(library)), "test")
+
+    params = detector._hash_params("image")
+    for path in library.rglob("*.jpg"):
+        stat = path.stat()
+        assert detector.hash_cache.get(str(path), stat.st_size, stat.st_mtime, params=params) is not None
+    detector.hash_cache.close()
+
+
+@pytest.mark.parametrize("setting, value", [("hash_size", 16), ("hash_fast_decode", False)])
+def test_other_hash_params_are_a_cache_miss(tmp_path, library, setting, value):
+    detector = make_detector(tmp_path, "threads")
+    detector.scan_and_process(FileManager().iter_directory(str(library)), "test")
+    path = library / "img_0.jpg"
+    file_info = {"path": str(path), "size": path.stat().st_size, "mtime": path.stat().st_mtime, "type": "image"}
+    old_hash = detector._get_file_hash(file_info)[1]
+
+    detector.config.config[setting] = value
+    changed = DuplicateDetector(detector.config, hash_cache=detector.hash_cache)
+    assert changed.hash_cache.get(str(path), file_info["size"], file_info["mtime"],
+                                  params=changed._hash_params("image")) is None
+    new_hash = changed._get_file_hash(file_info)[1]
+    assert new_hash == changed.calculate_phash_image(str(path))
+    if setting == "hash_size":
+        assert len(new_hash) != len(old_hash)
+    detector.hash_cache.close()
+
+
+def test_identical_files_are_compared_on_the_workers(tmp_path):
+    paths = []
+    for name in ("a", "b", "c", "d"):
+        path = tmp_path / f"{name}.jpg"
+        path.write_bytes(b"other" * 100 if name == "c" else b"same" * 125)
+        paths.append(str(path))
+
+    identical = IdenticalFileIndex()
+    # Registering only buckets the files, it reads nothing
+    earlier = [identical.register(path, 500) for path in paths]
+    assert identical._partial == {}
+
+    # Workers finish in any order; every copy still points at the first file
+    for path, candidates in reversed(list(zip(paths, earlier))):
+        identical.find_original(path, 500, candidates)
+    assert identical.copies == {paths[0]: [paths[1], paths[3]]}
+    assert identical.content_key(paths[3]) is not None
@@ -0,0 +1,59 @@
+import os
+import stat
+from datetime import datetime, timedelta
+
+import piexif
+from PIL import Image
+
+from core.exif_manager import ExifManager
+
+
+def save_photo(path, date_taken=None):
+    exif = {"0th": {}, "Exif": {}}
+    if date_taken:
+        exif["Exif"][piexif.ExifIFD.DateTimeOriginal] = date_taken.strftime("%Y:%m:%d %H:%M:%S")
+    Image.new("RGB", (40, 30), (200, 0, 0)).save(path, exif=piexif.dump(exif))
+    return str(path)
+
+
+def test_time_offset_skips_files_without_recorded_date(tmp_path):
+    taken = datetime(2024, 5, 1, 12, 0, 0)
+    dated = save_photo(tmp_path / "dated.jpg", taken)
+    undated = save_photo(tmp_path / "undated.jpg")
+    manager = ExifManager()
+
+    result = manager.batch_update([dated, undated], time_offset=timedelta(hours=2))
+
+    assert result == {"updated": [dated], "failed": [], "skipped": [undated]}
+    assert manager.get_date_taken(dated) == taken + timedelta(hours=2)
+    assert manager.get_recorded_date_taken(undated) is None
+
+
+def test_select_files_prefers_indexed_metadata(tmp_path):
+    paths = [save_photo(tmp_path / f"{i}.jpg", datetime(2024, 5, i + 1)) for i in range(3)]
+    indexed = {paths[0]: {"date_taken": datetime(2020, 1, 1)}}
+    manager = ExifManager()
+
+    selected = manager.select_files(paths, date_from=datetime(2024, 1, 1), date_to=datetime(2024, 12, 31),
+                                    metadata_lookup=indexed.get)
+
+    # The index wins for the file it knows; the others are read
+    assert selected == paths[1:]
+
+
+def test_date_edit_keeps_image_data_and_permissions(tmp_path):
+    path = save_photo(tmp_path / "photo.jpg", datetime(2024, 5, 1, 12, 0, 0))
+    os.chmod(path, 0o640)
+    with open(path, "rb") as f:
+        before = f.read()
+    manager = ExifManager()
+
+    assert manager.update_metadata(path, {"date_taken": datetime(2021, 3, 4, 5, 6, 7)})
+
+    with open(path, "rb") as f:
+        after = f.read()
+    # From the first start-of-scan marker to EOI: the compressed data, copied byte for byte
+    assert after[after.index(b"\xff\xda"):] == before[before.index(b"\xff\xda"):]
+    assert after != before
+    assert manager.get_recorded_date_taken(path) == datetime(2021, 3, 4, 5, 6, 7)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
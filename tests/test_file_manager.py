@@ -0,0 +1,97 @@
+import os
+
+from core.file_manager import FileManager
+
+
+def touch(path, data=b"data"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return str(path)
+
+
+def restore_mtime(directory, manifest):
+    """Sets a directory's mtime back to the manifest's, as if nothing was added or removed."""
+    mtime_ns = manifest["dirs"][str(directory)]
+    os.utime(directory, ns=(mtime_ns, mtime_ns))
+
+
+def bump_mtime(directory):
+    stat = os.stat(directory)
+    os.utime(directory, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def pending(manifest):
+    return sorted(entry[0] for entry in manifest["files"])
+
+
+def library(tmp_path):
+    source = tmp_path / "source"
+    paths = [touch(source / "a.jpg"), touch(source / "2023" / "b.jpg"), touch(source / "2024" / "c.jpg")]
+    touch(source / "notes.txt")
+    return source, paths
+
+
+def test_new_file_is_found_only_in_changed_directories(tmp_path):
+    source, paths = library(tmp_path)
+    file_manager = FileManager()
+    manifest = file_manager.build_manifest(str(source))
+    assert pending(manifest) == sorted(paths)
+
+    new = touch(source / "2023" / "new.jpg")
+    bump_mtime(source / "2023")
+    # Unchanged mtime: the directory is trusted and not listed again
+    hidden = touch(source / "2024" / "hidden.jpg")
+    restore_mtime(source / "2024", manifest)
+
+    manifest = file_manager.refresh_manifest(manifest)
+    assert pending(manifest) == sorted(paths + [new])
+    assert hidden not in pending(manifest)
+    # New files go to the end, after the files that were already pending
+    assert manifest["files"][-1][0] == new
+
+
+def test_new_and_removed_directories(tmp_path):
+    source, paths = library(tmp_path)
+    file_manager = FileManager()
+    manifest = file_manager.build_manifest(str(source))
+    manifest["kept"] = [paths[2]]
+    manifest["files"] = [entry for entry in manifest["files"] if entry[0] != paths[2]]
+
+    for name in os.listdir(source / "2024"):
+        os.remove(source / "2024" / name)
+    os.rmdir(source / "2024")
+    added = [touch(source / "2025" / "d.jpg"), touch(source / "2025" / "deep" / "e.jpg")]
+    bump_mtime(source)
+
+    manifest = file_manager.refresh_manifest(manifest)
+    assert pending(manifest) == sorted(paths[:2] + added)
+    assert manifest["kept"] == []
+    assert str(source / "2024") not in manifest["dirs"]
+    assert str(source / "2025" / "deep") in manifest["dirs"]
+
+
+def test_ignored_paths_are_not_added(tmp_path):
+    source, paths = library(tmp_path)
+    file_manager = FileManager()
+    manifest = file_manager.build_manifest(str(source))
+    # A move of a.jpg is still queued: it is in the folder, but no longer pending
+    manifest["files"] = [entry for entry in manifest["files"] if entry[0] != paths[0]]
+    new = touch(source / "f.jpg")
+    bump_mtime(source)
+
+    manifest = file_manager.refresh_manifest(manifest, ignore={paths[0]})
+    assert pending(manifest) == sorted(paths[1:] + [new])
+
+
+def test_extension_change_lists_everything_again(tmp_path):
+    source, paths = library(tmp_path)
+    file_manager = FileManager()
+    manifest = file_manager.build_manifest(str(source))
+
+    hidden = touch(source / "2024" / "g.jpg")
+    restore_mtime(source / "2024", manifest)
+    manifest["extensions"] = [".jpg"]  # Built before the other formats were supported
+
+    manifest = file_manager.refresh_manifest(manifest)
+    assert hidden in pending(manifest)
+    assert manifest["extensions"] == sorted(file_manager.media_extensions())
@@ -0,0 +1,92 @@
+import json
+import os
+import threading
+
+import pytest
+
+import core.file_operation_queue as queue_module
+from core.file_operation_queue import FileOperationQueue, move_file
+
+
+def no_rename(monkeypatch):
+    """Makes every rename fail like one across volumes."""
+    def cross_device(source, destination):
+        raise OSError(18, "Invalid cross-device link")
+    monkeypatch.setattr(queue_module.os, "rename", cross_device)
+
+
+def test_move_across_volumes_copies_then_renames(tmp_path, monkeypatch):
+    source = tmp_path / "a.jpg"
+    source.write_bytes(b"data")
+    destination = tmp_path / "target" / "a.jpg"
+    destination.parent.mkdir()
+    no_rename(monkeypatch)
+
+    move_file(str(source), str(destination))
+
+    assert destination.read_bytes() == b"data"
+    assert not source.exists()
+    assert list(destination.parent.iterdir()) == [destination]
+
+
+def test_interrupted_copy_leaves_no_destination(tmp_path, monkeypatch):
+    source = tmp_path / "a.jpg"
+    source.write_bytes(b"data")
+    destination = tmp_path / "target" / "a.jpg"
+    destination.parent.mkdir()
+    no_rename(monkeypatch)
+
+    def failing_copy(src, dst):
+        with open(dst, "wb") as f:
+            f.write(b"da")
+        raise OSError("disk removed")
+    monkeypatch.setattr(queue_module.shutil, "copy2", failing_copy)
+
+    with pytest.raises(OSError):
+        move_file(str(source), str(destination))
+    assert source.read_bytes() == b"data"
+    assert list(destination.parent.iterdir()) == []
+
+
+def test_shutdown_persists_and_starts_nothing_new(tmp_path, monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+    moved = []
+
+    def slow_move(source, destination):
+        moved.append(source)
+        started.set()
+        release.wait(5)
+    monkeypatch.setattr(queue_module, "move_file", slow_move)
+
+    state_file = tmp_path / "pending.json"
+    file_queue = FileOperationQueue(state_file=str(state_file))
+    for name in ("a", "b", "c"):
+        file_queue.move(tmp_path / name, tmp_path / "target" / name)
+    assert started.wait(5)
+
+    assert file_queue.shutdown(timeout=0.1) is False
+    release.set()
+    file_queue._worker.join(5)
+
+    # The running move is persisted as well; resume_persisted skips it if it completed
+    assert [op["source"] for op in json.loads(state_file.read_text())] == [
+        os.path.join(tmp_path, name) for name in ("a", "b", "c")
+    ]
+    assert moved == [os.path.join(tmp_path, "a")]
+
+
+def test_remove_tree_runs_after_queued_moves(tmp_path):
+    trash = tmp_path / "trash"
+    trash.mkdir()
+    source = tmp_path / "a.jpg"
+    source.write_bytes(b"data")
+
+    file_queue = FileOperationQueue(state_file=str(tmp_path / "pending.json"))
+    file_queue.move(source, trash / "a.jpg")
+    operation = file_queue.remove_tree(trash, file_count=1)
+    assert file_queue.wait_idle(5)
+    file_queue.shutdown()
+
+    assert operation["kind"] == "remove_tree" and operation["file_count"] == 1
+    assert not trash.exists() and not source.exists()
@@ -0,0 +1,144 @@
+import io
+import struct
+from datetime import datetime
+
+import pytest
+from PIL import Image
+
+from core.format_handlers import RawHandler, handler_for
+
+# TIFF field types used below
+ASCII, SHORT, LONG = 2, 3, 4
+RED, BLUE = (255, 0, 0), (0, 0, 255)
+
+
+def jpeg(size, color):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def lossless_jpeg(width, height):
+    """Start of a lossless (SOF3) JPEG, as RAW files store their sensor data; only the frame header is read."""
+    return b"\xff\xd8\xff\xc3\x00\x0b\x08" + struct.pack(">HH", height, width) + b"\x01\x01\x11\x00" + b"\x00" * 64
+
+
+class TiffBuilder:
+    """Little-endian TIFF assembled blob by blob; IFDs are written after the data they point at."""
+
+    def __init__(self):
+        self.buf = bytearray(b"II*\x00\x00\x00\x00\x00")
+
+    def blob(self, data):
+        offset = len(self.buf)
+        self.buf += data
+        if len(self.buf) % 2:
+            self.buf += b"\x00"
+        return offset
+
+    def ifd(self, entries, next_offset=0):
+        """entries: {tag: (type, values)}; ASCII values are bytes. Returns the IFD's offset."""
+        formats = {SHORT: "H", LONG: "I"}
+        packed = []
+        for tag, (field_type, values) in sorted(entries.items()):
+            if field_type == ASCII:
+                raw, count = values, len(values)
+            else:
+                raw, count = struct.pack("<" + formats[field_type] * len(values), *values), len(values)
+            if len(raw) > 4:
+                value = struct.pack("<I", self.blob(raw))
+            else:
+                value = raw.ljust(4, b"\x00")
+            packed.append(struct.pack("<HHI", tag, field_type, count) + value)
+        return self.blob(struct.pack("<H", len(packed)) + b"".join(packed) + struct.pack("<I", next_offset))
+
+    def finish(self, ifd0, path):
+        self.buf[4:8] = struct.pack("<I", ifd0)
+        path.write_bytes(bytes(self.buf))
+        return str(path)
+
+
+def build_raw(path, loop=False):
+    """
+    A CR2/NEF-like file: IFD0 is the full-size lossless sensor image (4000x3000, rotated by
+    orientation 6) with a 160x120 red preview in a SubIFD and an 800x600 blue one in the
+    chain after it. With loop, the last IFD of the chain points back at IFD0.
+    """
+    tiff = TiffBuilder()
+    small, large, sensor = jpeg((160, 120), RED), jpeg((800, 600), BLUE), lossless_jpeg(4000, 3000)
+    small_offset, large_offset, sensor_offset = tiff.blob(small), tiff.blob(large), tiff.blob(sensor)
+
+    exif = tiff.ifd({36867: (ASCII, b"2024:05:01 12:30:00\x00")})
+    small_ifd = tiff.ifd({254: (LONG, [1]), 513: (LONG, [small_offset]), 514: (LONG, [len(small)])})
+    large_ifd = tiff.ifd({254: (LONG, [1]), 259: (SHORT, [6]), 273: (LONG, [large_offset]),
+                          279: (LONG, [len(large)])})
+    ifd0 = tiff.ifd({
+        254: (LONG, [0]), 256: (LONG, [4000]), 257: (LONG, [3000]), 259: (SHORT, [7]),
+        271: (ASCII, b"Canon\x00"), 272: (ASCII, b"Canon EOS R6\x00"), 273: (LONG, [sensor_offset]),
+        274: (SHORT, [6]), 279: (LONG, [len(sensor)]), 306: (ASCII, b"2024:06:01 08:00:00\x00"),
+        330: (LONG, [small_ifd]), 34665: (LONG, [exif]),
+    }, next_offset=large_ifd)
+    if loop:
+        # Patched afterwards, since IFD0 is written last; large_ifd has 4 entries
+        next_position = large_ifd + 2 + 4 * 12
+        tiff.buf[next_position:next_position + 4] = struct.pack("<I", ifd0)
+    return tiff.finish(ifd0, path)
+
+
+@pytest.fixture
+def raw_file(tmp_path):
+    return build_raw(tmp_path / "photo.cr2")
+
+
+def test_probe_reads_the_tiff_directories(raw_file):
+    assert isinstance(handler_for(raw_file), RawHandler)
+    metadata = RawHandler().probe(raw_file)
+
+    assert (metadata["width"], metadata["height"]) == (4000, 3000)
+    assert metadata["orientation"] == 6
+    # DateTimeOriginal from the EXIF directory wins over IFD0's DateTime
+    assert metadata["date_taken"] == datetime(2024, 5, 1, 12, 30)
+    assert (metadata["camera_make"], metadata["camera_model"]) == ("Canon", "Canon EOS R6")
+
+
+@pytest.mark.parametrize("max_edge, color, size", [
+    (100, RED, (120, 160)),  # The small preview covers it
+    (500, BLUE, (600, 800)),
+    (2000, BLUE, (600, 800)),  # Nothing covers it: the largest preview
+    (None, BLUE, (600, 800)),
+])
+def test_open_preview_picks_smallest_sufficient_preview(raw_file, max_edge, color, size):
+    img = RawHandler().open_preview(raw_file, max_edge=max_edge)
+
+    # Upright: orientation 6 turns the landscape previews to portrait
+    assert img.size == size
+    assert all(abs(a - b) < 16 for a, b in zip(img.getpixel((img.width // 2, img.height // 2)), color))
+
+
+def test_lossless_sensor_data_is_not_a_preview(raw_file):
+    handler = RawHandler()
+    # The 4000x3000 SOF3 strip would be the largest candidate if it were taken
+    assert handler.preview_size(raw_file) == (600, 800)
+    img, size = handler.load_preview(raw_file, max_edge=100, upright=False)
+    assert img.size == (160, 120)
+    assert size == (600, 800)
+
+
+def test_ifd_loop_ends(tmp_path):
+    path = build_raw(tmp_path / "loop.nef", loop=True)
+    handler = RawHandler()
+
+    assert handler.probe(path)["camera_model"] == "Canon EOS R6"
+    assert handler.preview_size(path) == (600, 800)
+
+
+@pytest.mark.parametrize("cut", ["header", "entry_count", "entries"])
+def test_truncated_file_raises_value_error(raw_file, tmp_path, cut):
+    data = open(raw_file, "rb").read()
+    ifd0 = struct.unpack("<I", data[4:8])[0]
+    end = {"header": 4, "entry_count": ifd0 + 1, "entries": ifd0 + 40}[cut]
+    path = tmp_path / "truncated.cr2"
+    path.write_bytes(data[:end])
+
+    with pytest.raises(ValueError):
+        RawHandler().probe(str(path))
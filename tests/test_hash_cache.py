@@ -0,0 +1,77 @@
+import core.hash_cache as hash_cache_module
+from core.hash_cache import HashCache, content_key
+
+
+def make_file(path, data=b"x" * 300_000):
+    path.write_bytes(data)
+    stat = path.stat()
+    return str(path), stat.st_size, stat.st_mtime
+
+
+def counting_content_key(monkeypatch):
+    calls = []
+
+    def counted(path, size):
+        calls.append(path)
+        return content_key(path, size)
+
+    monkeypatch.setattr(hash_cache_module, "content_key", counted)
+    return calls
+
+
+def test_miss_reads_content_key_once(tmp_path, monkeypatch):
+    cache = HashCache(tmp_path / "cache.db", tmp_path / "none.json")
+    path, size, mtime = make_file(tmp_path / "a.jpg")
+    calls = counting_content_key(monkeypatch)
+
+    cached, key = cache.lookup(path, size, mtime)
+    assert cached is None and key == content_key(path, size)
+    cache.put(path, size, mtime, "abcd", key=key)
+    cache.flush()
+    assert calls == [path]
+
+    # A path hit returns the stored key without touching the file
+    assert cache.lookup(path, size, mtime) == ("abcd", key)
+    assert calls == [path]
+    cache.close()
+
+
+def test_known_key_is_not_read_again(tmp_path, monkeypatch):
+    cache = HashCache(tmp_path / "cache.db", tmp_path / "none.json")
+    path, size, mtime = make_file(tmp_path / "a.jpg")
+    key = content_key(path, size)
+    calls = counting_content_key(monkeypatch)
+
+    assert cache.lookup(path, size, mtime, key=key) == (None, key)
+    assert calls == []
+    cache.close()
+
+
+def test_moved_file_found_by_content(tmp_path):
+    cache = HashCache(tmp_path / "cache.db", tmp_path / "none.json")
+    path, size, mtime = make_file(tmp_path / "a.jpg")
+    cache.put(path, size, mtime, "abcd")
+    cache.flush()
+
+    copy, copy_size, copy_mtime = make_file(tmp_path / "b.jpg")
+    assert cache.lookup(copy, copy_size, copy_mtime) == ("abcd", content_key(copy, copy_size))
+    assert cache.get(copy, copy_size, copy_mtime) == "abcd"
+    cache.close()
+
+
+def test_other_params_are_a_miss(tmp_path):
+    cache = HashCache(tmp_path / "cache.db", tmp_path / "none.json")
+    path, size, mtime = make_file(tmp_path / "a.jpg")
+    cache.put(path, size, mtime, "abcd", params="8:draft")
+
+    # Pending and committed entries alike
+    assert cache.get(path, size, mtime, params="16:draft") is None
+    cache.flush()
+    assert cache.get(path, size, mtime, params="8:full") is None
+    assert cache.get(path, size, mtime, params="8:draft") == "abcd"
+
+    # Nor is a copy matched by content key
+    copy, copy_size, copy_mtime = make_file(tmp_path / "b.jpg")
+    assert cache.get(copy, copy_size, copy_mtime, params="8:full") is None
+    assert cache.get(copy, copy_size, copy_mtime, params="8:draft") == "abcd"
+    cache.close()
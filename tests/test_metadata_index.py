@@ -0,0 +1,96 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+import piexif
+import pytest
+from PIL import Image
+
+from core.metadata_extractor import MetadataExtractor
+from core.metadata_index import MetadataIndex
+from core.session_manager import SessionManager
+
+SESSION = "s1"
+
+
+def save_photo(path, date_taken=None, model=None):
+    exif = {"0th": {}, "Exif": {}}
+    if date_taken:
+        exif["Exif"][piexif.ExifIFD.DateTimeOriginal] = date_taken.strftime("%Y:%m:%d %H:%M:%S")
+    if model:
+        exif["0th"][piexif.ImageIFD.Model] = model
+    Image.new("RGB", (40, 30), (0, 120, 0)).save(path, exif=piexif.dump(exif))
+    return str(path)
+
+
+@pytest.fixture
+def index(tmp_path):
+    # The file_metadata table belongs to the session database
+    SessionManager(tmp_path / "sessions.db", tmp_path / "none.json").flush()
+    index = MetadataIndex(MetadataExtractor(), tmp_path / "sessions.db")
+    yield index
+    index.close()
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_store_lookup_round_trip(tmp_path, index):
+    path = save_photo(tmp_path / "a.jpg", datetime(2024, 5, 1, 12, 0), b"Pixel 8")
+    metadata = MetadataExtractor().read_metadata(path)
+    index.store(SESSION, path, metadata)
+
+    # Same shape as read_metadata (plus the video duration), including whether the date is only the modification time
+    assert index.lookup(SESSION, path) == {**metadata, "duration": None}
+    assert index.lookup("other", path) is None
+
+
+def test_changed_file_is_not_served(tmp_path, index):
+    path = save_photo(tmp_path / "a.jpg", datetime(2024, 5, 1))
+    index.store(SESSION, path, MetadataExtractor().read_metadata(path))
+
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    assert index.lookup(SESSION, path) is None
+
+    index.store(SESSION, path, MetadataExtractor().read_metadata(path))
+    assert index.lookup(SESSION, path) is not None
+    with open(path, "ab") as f:
+        f.write(b"\x00")  # Size changes too
+    assert index.lookup(SESSION, path) is None
+
+
+def test_indexer_waits_while_busy(tmp_path, index):
+    paths = [save_photo(tmp_path / f"{i}.jpg", datetime(2024, 5, i + 1)) for i in range(3)]
+    busy = threading.Event()
+    busy.set()
+    index.is_busy = busy.is_set
+    index.batch_size = 1
+
+    index.index_session(SESSION, paths)
+    time.sleep(0.3)
+    assert all(index.lookup(SESSION, path) is None for path in paths)
+
+    busy.clear()
+    assert wait_until(lambda: all(index.lookup(SESSION, path) for path in paths))
+
+
+def test_date_range_and_cameras_leave_out_estimates(tmp_path, index):
+    paths = [
+        save_photo(tmp_path / "a.jpg", datetime(2023, 7, 1), b"Pixel 8"),
+        save_photo(tmp_path / "b.jpg", datetime(2024, 2, 1), b"Pixel 8"),
+        save_photo(tmp_path / "c.jpg", model=b"EOS R6"),  # No recorded date: only its mtime (today)
+    ]
+    index.index_session(SESSION, paths)
+    assert wait_until(lambda: all(index.lookup(SESSION, path) for path in paths))
+
+    assert index.lookup(SESSION, paths[2])["date_estimated"] is True
+    assert index.date_range(SESSION) == (datetime(2023, 7, 1), datetime(2024, 2, 1))
+    assert index.camera_counts(SESSION) == [("Pixel 8", 2), ("EOS R6", 1)]
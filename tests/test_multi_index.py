@@ -0,0 +1,88 @@
+import random
+
+import pytest
+
+from core.duplicate_detector import HashMatrix, MultiIndexHash
+
+
+def brute_force_pairs(hashes, radius):
+    """Reference result: every (i, j, dist) with i < j and dist <= radius."""
+    values = [int(h, 16) for h in hashes.values()]
+    return [
+        (i, j, (values[i] ^ values[j]).bit_count())
+        for i in range(len(values))
+        for j in range(i + 1, len(values))
+        if (values[i] ^ values[j]).bit_count() <= radius
+    ]
+
+
+def clustered_hashes(count, hash_size, max_flips, seed):
+    """Random hashes plus near copies, so plenty of pairs land close to the radius."""
+    rng = random.Random(seed)
+    bits = hash_size * hash_size
+    hex_length = (bits + 3) // 4
+    values = []
+    while len(values) < count:
+        base = rng.getrandbits(bits)
+        values.append(base)
+        for _ in range(rng.randint(0, 3)):
+            variant = base
+            for bit in rng.sample(range(bits), rng.randint(0, min(max_flips, bits))):
+                variant ^= 1 << bit
+            values.append(variant)
+    return {f"img_{i}.jpg": format(v, f"0{hex_length}x") for i, v in enumerate(values[:count])}
+
+
+def multi_index_pairs(hashes, hash_size, radius):
+    matrix = HashMatrix(hashes, hash_size=hash_size)
+    return MultiIndexHash(matrix, hash_size, radius).find_pairs()
+
+
+@pytest.mark.parametrize("hash_size", [4, 5, 8, 12, 16])
+@pytest.mark.parametrize("radius", [0, 1, 4, 10, 11])
+def test_matches_brute_force(hash_size, radius):
+    hashes = clustered_hashes(300, hash_size, max_flips=radius + 2, seed=hash_size * 100 + radius)
+    expected = brute_force_pairs(hashes, radius)
+
+    assert multi_index_pairs(hashes, hash_size, radius) == expected
+    assert HashMatrix(hashes, hash_size=hash_size).find_pairs(radius) == expected
+
+
+@pytest.mark.parametrize("radius", [0, 5, 10])
+def test_pairs_exactly_at_radius(radius):
+    # Distance radius is in, radius + 1 is out
+    rng = random.Random(radius)
+    base = rng.getrandbits(64)
+    flipped = rng.sample(range(64), radius + 1)
+    at_radius = base
+    for bit in flipped[:radius]:
+        at_radius ^= 1 << bit
+    beyond = at_radius ^ (1 << flipped[radius])
+    hashes = {"a": format(base, "016x"), "b": format(at_radius, "016x"), "c": format(beyond, "016x")}
+
+    found = {(i, j): dist for i, j, dist in multi_index_pairs(hashes, 8, radius)}
+    assert (base ^ at_radius).bit_count() == radius
+    assert (base ^ beyond).bit_count() == radius + 1
+    assert found.get((0, 1)) == radius
+    assert (0, 2) not in found
+    assert list(found.items()) == [((i, j), d) for i, j, d in brute_force_pairs(hashes, radius)]
+
+
+def test_duplicate_hashes_reported_once():
+    hashes = {f"img_{i}.jpg": "ffff0000ffff0000" for i in range(5)}
+    pairs = multi_index_pairs(hashes, 8, 10)
+    assert pairs == [(i, j, 0) for i in range(5) for j in range(i + 1, 5)]
+
+
+@pytest.mark.parametrize("radius", [63, 64, 80])
+def test_radius_at_or_above_hash_length(radius):
+    # Complementary hashes share no bit, so no block can collide; they still lie within the radius
+    hashes = clustered_hashes(40, 8, max_flips=64, seed=radius)
+    hashes["zeros"] = "0" * 16
+    hashes["ones"] = "f" * 16
+    assert multi_index_pairs(hashes, 8, radius) == brute_force_pairs(hashes, radius)
+
+
+def test_empty_and_single():
+    assert multi_index_pairs({}, 8, 10) == []
+    assert multi_index_pairs({"a": "0123456789abcdef"}, 8, 10) == []
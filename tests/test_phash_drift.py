@@ -0,0 +1,107 @@
+import io
+import random
+
+import piexif
+import pytest
+from PIL import Image, ImageDraw, ImageFilter
+
+from core.duplicate_detector import compute_image_phash
+
+HASH_SIZE = 8
+THRESHOLD_HARD = 4  # ConfigManager default; fast paths must stay well below it
+SAMPLE_COUNT = 12
+
+
+def photo_like(seed, size=(2400, 1600)):
+    """Soft shapes on a gradient: structure at the scales phash looks at, like a photo."""
+    rng = random.Random(seed)
+    img = Image.linear_gradient("L").resize(size).convert("RGB")
+    draw = ImageDraw.Draw(img)
+    for _ in range(25):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        r = rng.randrange(60, 500)
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=tuple(rng.randrange(256) for _ in range(3)))
+    return img.filter(ImageFilter.GaussianBlur(6))
+
+
+def exif_bytes(thumbnail, date_time="2024:05:01 12:00:00", original="2024:05:01 12:00:00", software=None):
+    buffer = io.BytesIO()
+    thumbnail.save(buffer, "JPEG", quality=85)
+    zeroth = {piexif.ImageIFD.DateTime: date_time}
+    if software:
+        zeroth[piexif.ImageIFD.Software] = software
+    exif = {"0th": zeroth, "Exif": {piexif.ExifIFD.DateTimeOriginal: original}, "1st": {}, "thumbnail": buffer.getvalue()}
+    return piexif.dump(exif)
+
+
+def save_with_thumbnail(img, path, thumbnail=None, **exif_fields):
+    if thumbnail is None:
+        thumbnail = img.copy()
+        thumbnail.thumbnail((160, 160))
+    img.save(path, "JPEG", quality=90, exif=exif_bytes(thumbnail, **exif_fields))
+
+
+@pytest.fixture(scope="module")
+def samples(tmp_path_factory):
+    folder = tmp_path_factory.mktemp("drift")
+    paths = []
+    for seed in range(SAMPLE_COUNT):
+        path = folder / f"sample_{seed}.jpg"
+        save_with_thumbnail(photo_like(seed), path)
+        paths.append(str(path))
+    return paths
+
+
+def test_draft_decode_drift(samples):
+    # ImageHash subtraction is the Hamming distance
+    drifts = [
+        compute_image_phash(p, HASH_SIZE) - compute_image_phash(p, HASH_SIZE, fast_decode=True)
+        for p in samples
+    ]
+    # Measured on these samples: max 2, mean 0.17
+    assert max(drifts) <= 2
+    assert sum(drifts) / len(drifts) <= 0.5
+
+
+def test_exif_thumbnail_drift(samples):
+    drifts = [
+        compute_image_phash(p, HASH_SIZE)
+        - compute_image_phash(p, HASH_SIZE, fast_decode=True, use_exif_thumbnail=True)
+        for p in samples
+    ]
+    # Measured on these samples: max 2, mean 0.50
+    assert max(drifts) < THRESHOLD_HARD
+    assert sum(drifts) / len(drifts) <= 1
+
+
+@pytest.mark.parametrize("exif_fields", [
+    {"date_time": "2024:06:10 08:30:00"},  # Saved again after it was taken
+    {"software": "Adobe Photoshop 25.0 (Windows)"},
+    {"original": ""},  # No capture date to compare against
+])
+def test_stale_thumbnail_of_edited_photo_is_ignored(tmp_path, exif_fields):
+    original = photo_like(1)
+    stale_thumbnail = original.copy()
+    stale_thumbnail.thumbnail((160, 160))
+    # The edit changes the picture, but the editor kept the camera's thumbnail
+    edited = photo_like(2)
+
+    path = tmp_path / "edited.jpg"
+    save_with_thumbnail(edited, path, thumbnail=stale_thumbnail, **exif_fields)
+
+    full = compute_image_phash(str(path), HASH_SIZE)
+    fast = compute_image_phash(str(path), HASH_SIZE, fast_decode=True, use_exif_thumbnail=True)
+    assert full - fast <= 2
+
+
+def test_unmarked_edit_still_uses_stale_thumbnail(tmp_path):
+    original = photo_like(1)
+    stale_thumbnail = original.copy()
+    stale_thumbnail.thumbnail((160, 160))
+    path = tmp_path / "edited.jpg"
+    save_with_thumbnail(photo_like(2), path, thumbnail=stale_thumbnail)
+
+    # Unmarked edits cannot be detected and the thumbnail then describes the original,
+    # which is why hash_use_exif_thumbnail is off by default
+    fast = compute_image_phash(str(path), HASH_SIZE, fast_decode=True, use_exif_thumbnail=True)
+    assert compute_image_phash(str(path), HASH_SIZE) - fast > THRESHOLD_HARD
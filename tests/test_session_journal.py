@@ -0,0 +1,33 @@
+from core.session_journal import SessionJournal
+
+
+def record(op, src, dst=None):
+    return {"op": op, "src": src, "dst": dst}
+
+
+def test_undo_reverts_latest_action_on_its_file():
+    # A move is undone on the file queue, so later actions can be journaled before the undo
+    records = [
+        record("move", "a.jpg", "t/a.jpg"),
+        record("keep", "b.jpg"),
+        record("undo", "a.jpg"),
+    ]
+    assert SessionJournal.effective_actions(records) == [record("keep", "b.jpg")]
+
+
+def test_failed_reverts_action_and_survives_checkpoint():
+    records = [
+        record("move", "a.jpg", "t/a.jpg"),
+        record("failed", "a.jpg", "t/a.jpg"),
+        record("failed", "c.jpg", "t/c.jpg"),  # Its move was checkpointed already
+    ]
+    assert SessionJournal.effective_actions(records) == [record("failed", "c.jpg", "t/c.jpg")]
+
+
+def test_read_skips_torn_line(tmp_path):
+    journal = SessionJournal(tmp_path / "journal.jsonl")
+    journal.append("keep", "a.jpg")
+    journal.close()
+    with open(tmp_path / "journal.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"op": "mo')
+    assert [r["src"] for r in journal.read()] == ["a.jpg"]
@@ -0,0 +1,115 @@
+import sqlite3
+import time
+
+import pytest
+
+from core.session_manager import SessionManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = SessionManager(tmp_path / "sessions.db", tmp_path / "none.json")
+    yield manager
+    manager.flush()
+
+
+def aggregated(tmp_path, manager, session_id):
+    """Counters of a fresh manager, which has to aggregate them from the database."""
+    manager.flush()
+    reopened = SessionManager(tmp_path / "sessions.db", tmp_path / "none.json")
+    return reopened.get_session_stats(session_id)
+
+
+def stored_name(tmp_path, session_id):
+    """The session's name as another connection sees it on disk."""
+    conn = sqlite3.connect(str(tmp_path / "sessions.db"))
+    try:
+        row = conn.execute("SELECT name FROM sessions WHERE id = ?", (session_id,)).fetchone()
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_changes_are_coalesced_into_one_write(tmp_path):
+    manager = SessionManager(tmp_path / "sessions.db", tmp_path / "none.json", save_delay=0.3)
+    session_id = manager.create_session("v0", str(tmp_path), str(tmp_path))
+    first_change = time.monotonic()
+
+    # Changes keep coming in, but the deadline is not pushed back
+    changes = 0
+    while time.monotonic() - first_change < 2:
+        # Under the save lock, so no write happens between the check and the change
+        with manager._save_lock:
+            if manager.writes:
+                break
+            changes += 1
+            manager.sessions[session_id]["name"] = f"v{changes}"
+            manager.save_sessions()
+        time.sleep(0.02)
+    written_at = time.monotonic()
+
+    assert written_at - first_change < 0.3 + 0.2
+    assert changes > 5
+    assert (manager.writes, manager.writes_avoided) == (1, changes)
+    assert stored_name(tmp_path, session_id) == f"v{changes}"
+    time.sleep(0.4)
+    assert manager.writes == 1  # Nothing left to write
+
+
+def test_failed_write_is_retried(tmp_path, monkeypatch):
+    manager = SessionManager(tmp_path / "sessions.db", tmp_path / "none.json", save_delay=0.05)
+    write_sessions = manager._write_sessions
+    failures = []
+
+    def fail_once(sessions):
+        if not failures:
+            failures.append(sessions)
+            raise sqlite3.OperationalError("database is locked")
+        write_sessions(sessions)
+    monkeypatch.setattr(manager, "_write_sessions", fail_once)
+
+    session_id = manager.create_session("first", str(tmp_path), str(tmp_path))
+    assert wait_until(lambda: failures)
+    manager.sessions[session_id]["name"] = "renamed"
+    manager.save_sessions()
+
+    assert wait_until(lambda: stored_name(tmp_path, session_id) == "renamed")
+    assert not manager._dirty
+
+
+def test_counters_follow_file_states(tmp_path, manager):
+    session_id = manager.create_session("test", str(tmp_path), str(tmp_path))
+    manager.get_session_stats(session_id)  # Aggregated now, updated incrementally from here
+
+    manager.record_file_state(session_id, "a.jpg", "kept")
+    manager.record_file_state(session_id, "b.jpg", "moved", "A/b.jpg")
+    manager.record_file_state(session_id, "c.jpg", "deleted", "trash/c.jpg", 300)
+    manager.flush()
+    # Changing a state that is already on disk replaces its contribution
+    manager.record_file_state(session_id, "b.jpg", "pending")
+    manager.record_file_state(session_id, "a.jpg", "deleted", "trash/a.jpg", 100)
+    manager.record_file_state(session_id, "c.jpg", "deleted", "trash/c.jpg", 300)
+
+    expected = {"sorted_files": 0, "deleted_count": 2, "deleted_size_bytes": 400}
+    assert manager.get_session_stats(session_id) == expected
+    assert aggregated(tmp_path, manager, session_id) == expected
+    assert "sorted_files" not in manager.sessions[session_id]
+
+
+def test_resume_returns_pair_decisions(manager, tmp_path):
+    session_id = manager.create_session("test", str(tmp_path), str(tmp_path))
+    manager.save_duplicate_pairs(session_id, [("a", "b"), ("c", "d"), ("e", "f")])
+    manager.record_pair_decision(session_id, 1, "keep_both")
+
+    assert manager.load_duplicate_pairs(session_id) == [
+        ["a", "b", None], ["c", "d", "keep_both"], ["e", "f", None]
+    ]
@@ -0,0 +1,86 @@
+import time
+
+import pytest
+from PIL import Image
+from PyQt6.QtWidgets import QApplication
+
+from core.exif_manager import ExifManager
+from core.file_operation_queue import FileOperationQueue
+from core.media_loader import MediaLoader
+from core.session_manager import SessionManager
+from ui.sorter_view import SorterView
+
+
+def wait_for(app, condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        app.processEvents()
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def sorter(tmp_path, monkeypatch):
+    # Deleted files go to ~/Foto-Sortierer/gelöscht_<session>
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    app = QApplication.instance() or QApplication([])
+    source = tmp_path / "source"
+    source.mkdir()
+    for i in range(3):
+        Image.new("RGB", (40, 30), (i * 80, 0, 0)).save(source / f"{i}.jpg")
+    target = tmp_path / "target"
+    (target / "A").mkdir(parents=True)
+
+    session_manager = SessionManager(tmp_path / "data" / "sessions.db", tmp_path / "data" / "none.json")
+    file_queue = FileOperationQueue(state_file=str(tmp_path / "data" / "pending.json"))
+    view = SorterView(session_manager, MediaLoader(), ExifManager(), file_queue=file_queue)
+    session_id = session_manager.create_session("test", str(source), str(target))
+    view.load_session(session_id)
+    yield app, view, session_id, target
+    file_queue.shutdown()
+    # A decode finishing after the view is collected would emit on a deleted QObject
+    view.media_loader.shutdown()
+    view.journal.close()
+
+
+def processed(view, session_id):
+    stats = view.session_manager.get_session_stats(session_id)
+    return stats["sorted_files"] + stats["deleted_count"]
+
+
+def test_undo_move_does_not_block(sorter):
+    app, view, session_id, target = sorter
+    first = view.files[0]
+    view.move_current_file(str(target / "A"))
+    view.undo_last_action()
+
+    # Nothing is reverted until the queue has moved the file back
+    assert first not in view.files
+    assert wait_for(app, lambda: first in view.files)
+    assert view.files[view.current_file_index] == first
+    assert list((target / "A").iterdir()) == []
+    assert processed(view, session_id) == 0
+
+
+def test_undo_keep_is_immediate(sorter):
+    app, view, session_id, target = sorter
+    first = view.files[0]
+    view.keep_current_file()
+    assert processed(view, session_id) == 1
+    view.undo_last_action()
+    assert view.files[0] == first
+    assert processed(view, session_id) == 0
+
+
+def test_action_between_move_and_undo_stays(sorter):
+    app, view, session_id, target = sorter
+    first, second = view.files[:2]
+    view.move_current_file(str(target / "A"))
+    view.undo_last_action()
+    view.keep_current_file()  # Keeps the second file while the undo is still queued
+
+    assert wait_for(app, lambda: first in view.files)
+    assert second not in view.files
+    assert processed(view, session_id) == 1
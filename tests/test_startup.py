@@ -0,0 +1,14 @@
+from benchmarks.bench_startup import parse_json_line, prepare_work_dir, run_probe
+
+# Far above the ~0.3 s measured offscreen, so only a gross regression (an eager
+# OpenCV/numpy import, a blocking scan on startup) trips it on a slow machine
+FIRST_PAINT_BUDGET = 5.0
+
+
+def test_startup_defers_heavy_modules(tmp_path):
+    prepare_work_dir(tmp_path)
+    result = parse_json_line(run_probe(tmp_path).stdout)
+
+    # Loaded on the first scan or video instead
+    assert result["heavy"] == []
+    assert result["first_paint"] < FIRST_PAINT_BUDGET
@@ -0,0 +1,50 @@
+import os
+import shutil
+
+from core.thumbnail_cache import ThumbnailCache
+
+
+def stored_bytes(cache):
+    return cache._conn.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM thumbnails").fetchone()[0]
+
+
+def make_files(folder, count, size=1000):
+    paths = []
+    for i in range(count):
+        path = folder / f"img_{i}.jpg"
+        path.write_bytes(os.urandom(size))
+        paths.append(str(path))
+    return paths
+
+
+def test_running_total_matches_table(tmp_path):
+    cache = ThumbnailCache(tmp_path / "thumbs.db", max_mb=1, batch_size=10)
+    paths = make_files(tmp_path, 30)
+    for path in paths:
+        cache.put(path, os.urandom(20_000))
+    # Replacing a preview must not count its old size twice
+    cache.put(paths[-1], os.urandom(5_000))
+    cache.flush()
+
+    assert cache._total_bytes == stored_bytes(cache)
+    assert cache._total_bytes <= cache.max_bytes
+    cache.close()
+
+    reopened = ThumbnailCache(tmp_path / "thumbs.db", max_mb=1)
+    assert reopened._total_bytes == stored_bytes(reopened)
+    reopened.close()
+
+
+def test_moved_file_needs_content_lookup(tmp_path):
+    cache = ThumbnailCache(tmp_path / "thumbs.db")
+    (path,) = make_files(tmp_path, 1)
+    cache.put(path, b"preview")
+    cache.flush()
+    moved = str(tmp_path / "moved.jpg")
+    shutil.move(path, moved)
+
+    assert cache.get(moved, by_content=False) is None
+    assert cache.get(moved) == b"preview"
+    # The entry now points at the new path, so the fast lookup finds it
+    assert cache.get(moved, by_content=False) == b"preview"
+    cache.close()
@@ -0,0 +1,79 @@
+import cv2
+import numpy as np
+import pytest
+
+from core.duplicate_detector import (compute_video_fingerprint, is_video_fingerprint, parse_video_fingerprint,
+                                     video_fingerprint_distance)
+
+
+class FakeCapture:
+    """Stands in for cv2.VideoCapture: 300 frames at 30 fps, each a flat grey of its index."""
+    FRAMES = 300
+
+    def __init__(self, path):
+        self.position = 0
+        self.calls = []
+        FakeCapture.last = self
+
+    def isOpened(self):
+        return True
+
+    def get(self, prop):
+        return {cv2.CAP_PROP_FRAME_COUNT: self.FRAMES, cv2.CAP_PROP_FPS: 30.0}.get(prop, 0)
+
+    def set(self, prop, value):
+        self.calls.append(("set", prop, value))
+        return True
+
+    def grab(self):
+        self.calls.append(("grab",))
+        self.position += 1
+        return self.position <= self.FRAMES
+
+    def read(self):
+        self.calls.append(("read", self.position))
+        frame = np.full((36, 64, 3), self.position % 256, dtype=np.uint8)
+        # A bar whose place depends on the frame, so the pHashes differ
+        frame[:, self.position % 64:] = 255
+        self.position += 1
+        return True, frame
+
+    def release(self):
+        pass
+
+
+def test_frames_are_stepped_with_grab_only(monkeypatch):
+    monkeypatch.setattr(cv2, "VideoCapture", FakeCapture)
+    fingerprint = compute_video_fingerprint("clip.mp4", hash_size=8, frames=8)
+    calls = FakeCapture.last.calls
+
+    assert not [c for c in calls if c[0] == "set"]
+    # Centres of 8 equal segments of 300 frames
+    assert [c[1] for c in calls if c[0] == "read"] == [18, 56, 93, 131, 168, 206, 243, 281]
+    duration, hashes = parse_video_fingerprint(fingerprint)
+    assert duration == 10_000 and len(hashes) == 8
+
+
+def test_parse_video_fingerprint():
+    fingerprint = "v:61500:00ff00ff00ff00ff,ffffffffffffffff"
+    assert is_video_fingerprint(fingerprint)
+    assert not is_video_fingerprint("00ff00ff00ff00ff")
+    assert parse_video_fingerprint(fingerprint) == (61500, [0x00ff00ff00ff00ff, 2 ** 64 - 1])
+
+
+@pytest.mark.parametrize("a, b, expected", [
+    # Mean Hamming distance of the frames at the same positions: (0 + 8 + 4) / 3
+    ((60_000, [0, 0xff, 0xf0]), (60_000, [0, 0, 0]), 4),
+    # Same clip re-encoded slightly shorter: within 5% of the duration
+    ((60_000, [0b1, 0b11]), (57_500, [0b1, 0b11]), 0),
+    # Different lengths are never the same clip, however similar the frames
+    ((60_000, [0, 0]), (40_000, [0, 0]), None),
+    # Short clips get the 1 s tolerance
+    ((3_000, [0b111]), (3_900, [0]), 3),
+    # A fingerprint with fewer frames (a clip that ended early) compares its frames only
+    ((60_000, [0, 0b1111]), (60_000, [0]), 0),
+    ((60_000, []), (60_000, [0]), None),
+])
+def test_sequence_distance(a, b, expected):
+    assert video_fingerprint_distance(a, b) == expected
+    assert video_fingerprint_distance(b, a) == expected
@@ -0,0 +1,287 @@
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QComboBox, QCompleter,
+                             QDateTimeEdit, QSpinBox, QLineEdit, QProgressBar, QFileDialog, QWidget)
+from PyQt6.QtCore import QThread, pyqtSignal, QDateTime
+from datetime import timedelta
+
+
+class BatchExifThread(QThread):
+    """
+    Runs ExifManager.select_files and batch_update off the UI thread: selecting by
+    date reads the metadata of every file the metadata index does not know yet.
+    """
+    files_selected = pyqtSignal(int)  # number of files to edit
+    progress_update = pyqtSignal(int, int)  # done, total
+    batch_complete = pyqtSignal(dict)  # {"updated", "failed", "skipped"}
+
+    def __init__(self, exif_manager, file_paths, edit, selection=None, metadata_lookup=None):
+        super().__init__()
+        self.exif_manager = exif_manager
+        self.file_paths = file_paths
+        self.edit = edit
+        self.selection = selection  # Keyword arguments for select_files, None for all files
+        self.metadata_lookup = metadata_lookup
+        self.is_cancelled = False
+
+    def run(self):
+        files = self.file_paths
+        if self.selection:
+            files = self.exif_manager.select_files(
+                files, metadata_lookup=self.metadata_lookup, should_cancel=lambda: self.is_cancelled,
+                **self.selection
+            )
+        self.files_selected.emit(len(files))
+        result = self.exif_manager.batch_update(
+            files,
+            progress_callback=self.progress_update.emit,
+            should_cancel=lambda: self.is_cancelled,
+            **self.edit
+        )
+        self.batch_complete.emit(result)
+
+    def cancel(self):
+        self.is_cancelled = True
+
+
+class BatchExifDialog(QDialog):
+    """
+    Applies a fixed date, a time offset or a camera model to many files at once:
+    all pending files of the session, or those in a folder or a date range.
+    """
+    batch_finished = pyqtSignal(dict)
+
+    SCOPES = ["Alle ausstehenden Dateien", "Nur Dateien in Ordner", "Nur Dateien im Zeitraum"]
+    EDITS = ["Festes Datum setzen", "Zeit verschieben", "Kamera setzen"]
+
+    def __init__(self, exif_manager, file_paths, default_folder="", metadata_lookup=None, date_range=(None, None),
+                 camera_models=(), parent=None):
+        super().__init__(parent)
+        self.exif_manager = exif_manager
+        self.file_paths = list(file_paths)
+        self.folder = default_folder
+        self.metadata_lookup = metadata_lookup  # path -> indexed metadata or None, see ExifManager.select_files
+        # From the metadata index: the session's (earliest, latest) date taken and its cameras, most used first
+        self.date_range = date_range
+        self.camera_models = list(camera_models)
+        self.thread = None
+        self.selected_count = 0
+        self.setWindowTitle("Infos für mehrere Dateien bearbeiten")
+        self.setModal(True)
+        self.init_ui()
+
+    def init_ui(self):
+        self.setFixedWidth(420)
+        self.setStyleSheet("""
+            QDialog { background-color: #2A2A2C; }
+            QLabel { color: #E0E0E0; font-size: 13px; }
+            QComboBox, QDateTimeEdit, QSpinBox, QLineEdit {
+                background-color: #1A1A1C; color: #E0E0E0; border: 1px solid #3A3A3C;
+                border-radius: 4px; padding: 4px; font-size: 13px;
+            }
+            QPushButton {
+                background-color: #3A3A3C; color: white; border: none;
+                padding: 8px 14px; border-radius: 6px; font-size: 13px;
+            }
+            QPushButton:hover { background-color: #4A4A4C; }
+            QPushButton#primary { background-color: #2D7DFF; }
+            QPushButton#primary:hover { background-color: #3B82F6; }
+            QProgressBar { background-color: #1A1A1C; border: none; border-radius: 3px; max-height: 6px; }
+            QProgressBar::chunk { background-color: #2D7DFF; border-radius: 3px; }
+        """)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(20, 20, 20, 20)
+        layout.setSpacing(12)
+
+        # Scope
+        layout.addWidget(QLabel("Dateien"))
+        self.scope_combo = QComboBox()
+        self.scope_combo.addItems(self.SCOPES)
+        self.scope_combo.currentIndexChanged.connect(self.update_visibility)
+        layout.addWidget(self.scope_combo)
+
+        self.folder_row = QWidget()
+        folder_layout = QHBoxLayout(self.folder_row)
+        folder_layout.setContentsMargins(0, 0, 0, 0)
+        self.folder_label = QLabel(self.folder or "—")
+        self.folder_label.setWordWrap(True)
+        folder_btn = QPushButton("Ordner wählen…")
+        folder_btn.clicked.connect(self.choose_folder)
+        folder_layout.addWidget(self.folder_label, 1)
+        folder_layout.addWidget(folder_btn)
+        layout.addWidget(self.folder_row)
+
+        self.range_row = QWidget()
+        range_layout = QHBoxLayout(self.range_row)
+        range_layout.setContentsMargins(0, 0, 0, 0)
+        now = QDateTime.currentDateTime()
+        first, last = self.date_range
+        self.range_from = QDateTimeEdit(QDateTime(first) if first else now.addDays(-1))
+        self.range_to = QDateTimeEdit(QDateTime(last) if last else now)
+        for edit in (self.range_from, self.range_to):
+            edit.setDisplayFormat("dd.MM.yyyy HH:mm:ss")
+            edit.setCalendarPopup(True)
+        range_layout.addWidget(QLabel("Von"))
+        range_layout.addWidget(self.range_from, 1)
+        range_layout.addWidget(QLabel("Bis"))
+        range_layout.addWidget(self.range_to, 1)
+        layout.addWidget(self.range_row)
+
+        # Edit
+        layout.addWidget(QLabel("Änderung"))
+        self.edit_combo = QComboBox()
+        self.edit_combo.addItems(self.EDITS)
+        self.edit_combo.currentIndexChanged.connect(self.update_visibility)
+        layout.addWidget(self.edit_combo)
+
+        self.date_edit = QDateTimeEdit(now)
+        self.date_edit.setDisplayFormat("dd.MM.yyyy HH:mm:ss")
+        self.date_edit.setCalendarPopup(True)
+        layout.addWidget(self.date_edit)
+
+        self.offset_row = QWidget()
+        offset_layout = QHBoxLayout(self.offset_row)
+        offset_layout.setContentsMargins(0, 0, 0, 0)
+        self.offset_spins = {}
+        for unit, label, limit in (("days", "Tage", 36500), ("hours", "Std", 23), ("minutes", "Min", 59), ("seconds", "Sek", 59)):
+            spin = QSpinBox()
+            spin.setRange(-limit, limit)
+            self.offset_spins[unit] = spin
+            offset_layout.addWidget(spin)
+            offset_layout.addWidget(QLabel(label))
+        layout.addWidget(self.offset_row)
+
+        self.camera_edit = QLineEdit()
+        self.camera_edit.setPlaceholderText(self.camera_models[0] if self.camera_models else "z.B. iPhone 13 Pro")
+        if self.camera_models:
+            self.camera_edit.setCompleter(QCompleter(self.camera_models, self))
+        layout.addWidget(self.camera_edit)
+
+        # Progress
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setTextVisible(False)
+        self.progress_bar.hide()
+        layout.addWidget(self.progress_bar)
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: #AAAAAA; font-size: 12px;")
+        layout.addWidget(self.status_label)
+
+        # Buttons
+        button_row = QHBoxLayout()
+        button_row.addStretch()
+        self.cancel_btn = QPushButton("Abbrechen")
+        self.cancel_btn.clicked.connect(self.cancel)
+        self.apply_btn = QPushButton("Anwenden")
+        self.apply_btn.setObjectName("primary")
+        self.apply_btn.clicked.connect(self.apply)
+        button_row.addWidget(self.cancel_btn)
+        button_row.addWidget(self.apply_btn)
+        layout.addLayout(button_row)
+
+        self.update_visibility()
+
+    def update_visibility(self):
+        scope = self.scope_combo.currentIndex()
+        self.folder_row.setVisible(scope == 1)
+        self.range_row.setVisible(scope == 2)
+        edit = self.edit_combo.currentIndex()
+        self.date_edit.setVisible(edit == 0)
+        self.offset_row.setVisible(edit == 1)
+        self.camera_edit.setVisible(edit == 2)
+        self.adjustSize()
+
+    def choose_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Ordner wählen", self.folder)
+        if folder:
+            self.folder = folder
+            self.folder_label.setText(folder)
+
+    def selected_scope(self):
+        """Keyword arguments for ExifManager.select_files, {} for all pending files."""
+        scope = self.scope_combo.currentIndex()
+        if scope == 1:
+            return {"folder": self.folder}
+        if scope == 2:
+            return {
+                "date_from": self.range_from.dateTime().toPyDateTime(),
+                "date_to": self.range_to.dateTime().toPyDateTime(),
+            }
+        return {}
+
+    def selected_edit(self):
+        """Keyword arguments for ExifManager.batch_update, or None if nothing would change."""
+        edit = self.edit_combo.currentIndex()
+        if edit == 0:
+            return {"date_taken": self.date_edit.dateTime().toPyDateTime()}
+        if edit == 1:
+            offset = timedelta(**{unit: spin.value() for unit, spin in self.offset_spins.items()})
+            return {"time_offset": offset} if offset else None
+        camera = self.camera_edit.text().strip()
+        return {"camera_model": camera} if camera else None
+
+    def apply(self):
+        edit = self.selected_edit()
+        if edit is None:
+            self.status_label.setText("Keine Änderung angegeben.")
+            return
+        selection = self.selected_scope()
+        if not self.file_paths or selection.get("folder") == "":
+            self.status_label.setText("Keine passenden Dateien gefunden.")
+            return
+
+        self.apply_btn.setEnabled(False)
+        self.scope_combo.setEnabled(False)
+        self.edit_combo.setEnabled(False)
+        # Busy indicator until the thread has selected the files
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.show()
+        self.status_label.setText("Dateien werden ausgewählt…")
+
+        self.thread = BatchExifThread(self.exif_manager, self.file_paths, edit, selection, self.metadata_lookup)
+        self.thread.files_selected.connect(self.on_files_selected)
+        self.thread.progress_update.connect(self.on_progress)
+        self.thread.batch_complete.connect(self.on_complete)
+        self.thread.start()
+
+    def on_files_selected(self, count):
+        self.selected_count = count
+        self.progress_bar.setRange(0, max(count, 1))
+        self.progress_bar.setValue(0)
+        self.status_label.setText(f"0 von {count} Dateien bearbeitet")
+
+    def on_progress(self, done, total):
+        self.progress_bar.setValue(done)
+        self.status_label.setText(f"{done} von {total} Dateien bearbeitet")
+
+    def on_complete(self, result):
+        self.thread.wait()
+        self.thread = None
+        self.progress_bar.hide()
+        self.apply_btn.setEnabled(True)
+        self.scope_combo.setEnabled(True)
+        self.edit_combo.setEnabled(True)
+        if not self.selected_count:
+            self.status_label.setText("Keine passenden Dateien gefunden.")
+            return
+
+        self.batch_finished.emit(result)
+        text = f"{len(result['updated'])} Dateien geändert"
+        if result["failed"]:
+            text += f", {len(result['failed'])} fehlgeschlagen"
+        if result["skipped"]:
+            text += f", {len(result['skipped'])} übersprungen"
+        self.status_label.setText(text + ".")
+        self.cancel_btn.setText("Schließen")
+
+    def cancel(self):
+        if self.thread is not None:
+            self.thread.cancel()
+            self.status_label.setText("Wird abgebrochen…")
+        else:
+            self.reject()
+
+    def reject(self):
+        # Closing while running waits for the files already being written
+        if self.thread is not None:
+            self.thread.cancel()
+            self.thread.wait()
+        super().reject()
@@ -1,7 +1,7 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                              QPushButton, QFrame, QSizePolicy)
 from PyQt6.QtCore import Qt, pyqtSignal, QSize, QByteArray, QTimer
-from PyQt6.QtGui import QPixmap, QIcon, QKeySequence, QShortcut, QMovie
+from PyQt6.QtGui import QPixmap, QImage, QIcon, QKeySequence, QShortcut, QMovie
 from pathlib import Path
 from utils.path_utils import resource_path
 
@@ -12,12 +12,19 @@ class DuplicateReviewScreen(QWidget):
     keep_both = pyqtSignal()
     review_completed = pyqtSignal()
     
-    def __init__(self):
+    def __init__(self, media_loader=None, thumbnail_cache=None):
         super().__init__()
         self.current_pair = None
+        self.media_loader = media_loader
+        self.thumbnail_cache = thumbnail_cache
         self.load_stylesheet()
         self.init_ui()
         
+        if self.media_loader:
+            self.media_loader.image_loaded.connect(self.on_image_loaded)
+            self.media_loader.error_occurred.connect(self.on_image_load_error)
+            self.media_loader.preview_loaded.connect(self.on_preview_loaded)
+        
     def load_stylesheet(self):
         style_path = Path(resource_path("assets/style.qss"))
         if style_path.exists():
@@ -313,6 +320,7 @@ class DuplicateReviewScreen(QWidget):
         panel.date_label = date_label
         panel.time_label = time_label
         panel.camera_label = camera_label
+        panel.image_path = None
         
         return panel
     
@@ -328,18 +336,24 @@ class DuplicateReviewScreen(QWidget):
     
     def load_image_to_panel(self, panel, image_path: Path, metadata: dict):
         """Load an image and its metadata into a panel."""
-        # Load image
-        pixmap = QPixmap(str(image_path))
-        if not pixmap.isNull():
-            # Scale to fit the available space in the label
-            scaled_pixmap = pixmap.scaled(
-                panel.image_label.size(),
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation
-            )
-            panel.image_label.setPixmap(scaled_pixmap)
+        panel.image_path = str(image_path)
+        if self.media_loader:
+            # Show the cached preview at once, the decoded image replaces it when ready
+            preview = QPixmap()
+            data = self.thumbnail_cache.get(panel.image_path, by_content=False) if self.thumbnail_cache else None
+            if data and preview.loadFromData(data):
+                self.set_panel_pixmap(panel, preview)
+            else:
+                panel.image_label.clear()
+                self.media_loader.load_preview(panel.image_path)
+            self.media_loader.load_media(panel.image_path, target_size=panel.image_label.size() * self.devicePixelRatioF())
         else:
-            panel.image_label.setText("Bild konnte nicht geladen werden")
+            # Load image
+            pixmap = QPixmap(str(image_path))
+            if not pixmap.isNull():
+                self.set_panel_pixmap(panel, pixmap)
+            else:
+                panel.image_label.setText("Bild konnte nicht geladen werden")
         
         # Update metadata
         panel.filename_label.setText(f"Dateiname: {metadata.get('filename', '--')}")
@@ -347,6 +361,33 @@ class DuplicateReviewScreen(QWidget):
         panel.time_label.setText(f"Uhrzeit: {metadata.get('time', '--')}")
         panel.camera_label.setText(f"Kamera: {metadata.get('camera', '--')}")
     
+    def set_panel_pixmap(self, panel, pixmap: QPixmap):
+        # Scale to fit the available space in the label
+        scaled_pixmap = pixmap.scaled(
+            panel.image_label.size(),
+            Qt.AspectRatioMode.KeepAspectRatio,
+            Qt.TransformationMode.SmoothTransformation
+        )
+        panel.image_label.setPixmap(scaled_pixmap)
+    
+    def on_image_loaded(self, path: str, pixmap: QPixmap):
+        """Slot for MediaLoader.image_loaded; other screens' loads are ignored."""
+        for panel in (self.left_panel, self.right_panel):
+            if panel.image_path == path:
+                self.set_panel_pixmap(panel, pixmap)
+    
+    def on_preview_loaded(self, path: str, image: QImage):
+        """Slot for MediaLoader.preview_loaded; a panel that already shows an image keeps it."""
+        for panel in (self.left_panel, self.right_panel):
+            pixmap = panel.image_label.pixmap()
+            if panel.image_path == path and (pixmap is None or pixmap.isNull()):
+                self.set_panel_pixmap(panel, QPixmap.fromImage(image))
+    
+    def on_image_load_error(self, path: str, message: str):
+        for panel in (self.left_panel, self.right_panel):
+            if panel.image_path == path:
+                panel.image_label.setText("Bild konnte nicht geladen werden")
+    
     def update_progress(self, current: int, total: int):
         """Update progress display."""
         self.progress_label.setText(f"{current} von {total} Paaren")
@@ -17,6 +17,7 @@ class DuplicateScanScreen(QWidget):
         self.is_complete = False
         self.total_files = 0
         self.current_progress = 0
+        self.is_scanning = False  # Directory walk still running
         self.start_time = None
         self.elapsed_seconds = 0
         
@@ -145,10 +146,14 @@ class DuplicateScanScreen(QWidget):
         stats_row = QHBoxLayout()
         stats_row.setSpacing(20)
         
-        # Total files stat
+        # Total files stat (grows while the directory walk is running)
         self.total_card = self.create_stat_item("0", "Dateien gesamt")
         stats_row.addWidget(self.total_card)
         
+        # Hashed files stat
+        self.hashed_card = self.create_stat_item("0", "Analysiert")
+        stats_row.addWidget(self.hashed_card)
+        
         # Deleted duplicates stat
         self.deleted_card = self.create_stat_item("0", "Gelöschte Duplikate", highlight=True)
         stats_row.addWidget(self.deleted_card)
@@ -212,13 +217,21 @@ class DuplicateScanScreen(QWidget):
         
         return item
     
-    def update_progress(self, current: int, total: int, deleted: int = 0, to_review: int = 0, status: str = ""):
-        """Update progress display."""
+    def update_progress(self, current: int, total: int, deleted: int = 0, to_review: int = 0, status: str = "", scanning: bool = False):
+        """Update progress display. While scanning, total is the number of files discovered so far."""
         self.current_progress = current
         self.total_files = total
+        self.is_scanning = scanning
+        
+        # Discovered vs. hashed counts
+        self.total_card.value_label.setText(f"{total:,}")
+        self.hashed_card.value_label.setText(f"{min(current, total):,}")
         
         if total > 0:
             progress = int((current / total) * 100)
+            if scanning:
+                # Hashing may catch up with the walk; never report completion before it ends
+                progress = min(progress, 99)
             self.progress_bar.setValue(progress)
             self.progress_percent.setText(f"{progress}%")
             
@@ -237,6 +250,7 @@ class DuplicateScanScreen(QWidget):
         """Set total number of files."""
         self.total_files = total
         self.total_card.value_label.setText(f"{total:,}")
+        self.hashed_card.value_label.setText("0")
     
     def start_timer(self):
         """Start the elapsed time timer."""
@@ -258,6 +272,11 @@ class DuplicateScanScreen(QWidget):
         seconds = self.elapsed_seconds % 60
         elapsed_str = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
         
+        # Remaining time is unknown until the directory walk has finished
+        if self.is_scanning and not self.is_complete:
+            self.time_display.setText(f"Laufzeit: {elapsed_str}   |   Dateien werden gesucht...")
+            return
+        
         # Calculate remaining time
         if self.current_progress > 0 and self.current_progress < self.total_files and self.elapsed_seconds > 0:
             avg_time_per_file = self.elapsed_seconds / self.current_progress
@@ -6,9 +6,12 @@ from ui.duplicate_scan_screen import DuplicateScanScreen
 from ui.duplicate_review_screen import DuplicateReviewScreen
 from ui.sorter_view import SorterView
 from core.session_manager import SessionManager
-from core.duplicate_detector import DuplicateDetector
 from core.media_loader import MediaLoader
 from core.exif_manager import ExifManager
+from core.hash_cache import HashCache
+from core.thumbnail_cache import ThumbnailCache
+from core.file_operation_queue import FileOperationQueue
+from core.metadata_index import MetadataIndex
 from pathlib import Path
 
 
@@ -16,7 +19,7 @@ import glob
 from utils.path_utils import resource_path
 
 class DuplicateScanThread(QThread):
-    progress_update = pyqtSignal(int, int, int, int, str) # current, total, deleted, review, status
+    progress_update = pyqtSignal(int, int, int, int, str, bool) # current, total, deleted, review, status, scanning
     scan_complete = pyqtSignal(list)
     
     def __init__(self, source_path, detector, session_id):
@@ -25,23 +28,28 @@ class DuplicateScanThread(QThread):
         self.detector = detector
         self.session_id = session_id
         self.is_cancelled = False
+        self.discovered_count = 0
     
     def run(self):
         if self.is_cancelled:
             return
         
-        # Use FileManager to get initial list for progress
+        # Stream files from the directory walk straight into hashing
         from core.file_manager import FileManager
         file_manager = FileManager()
-        files = file_manager.scan_directory(self.source_path)
+        
+        def discovered_files():
+            for file_info in file_manager.iter_directory(self.source_path):
+                self.discovered_count += 1
+                yield file_info
         
         # Run duplicate detection
-        def progress_callback(current, total, deleted, review, status):
+        def progress_callback(current, total, deleted, review, status, scanning=False):
             if not self.is_cancelled:
-                self.progress_update.emit(current, total, deleted, review, status)
+                self.progress_update.emit(current, total, deleted, review, status, scanning)
         
         # New API returns list of soft duplicate pairs
-        soft_duplicates = self.detector.scan_and_process(files, self.session_id, progress_callback)
+        soft_duplicates = self.detector.scan_and_process(discovered_files(), self.session_id, progress_callback)
         
         if not self.is_cancelled:
             self.scan_complete.emit(soft_duplicates)
@@ -67,7 +75,10 @@ class MainWindow(QMainWindow):
         from core.config_manager import ConfigManager
         self.config_manager = ConfigManager()
         self.session_manager = SessionManager()
-        self.duplicate_detector = DuplicateDetector(self.config_manager, session_manager=self.session_manager)
+        self.hash_cache = HashCache()
+        self.file_queue = FileOperationQueue(hash_cache=self.hash_cache)
+        self.thumbnail_cache = ThumbnailCache(max_mb=self.config_manager.get("thumbnail_disk_cache_mb", 1024))
+        self._duplicate_detector = None
         
         # Logger
         import logging
@@ -78,6 +89,7 @@ class MainWindow(QMainWindow):
         self.duplicate_pairs = []
         self.total_duplicate_pairs = 0
         self.current_pair_index = 0
+        self.decided_pairs = set()  # Positions reviewed before the session was resumed
         self.scan_thread = None
         
         # Load global style
@@ -89,6 +101,40 @@ class MainWindow(QMainWindow):
         
         # Initialize Screens
         self.init_screens()
+        
+        # Finish moves that were still queued when the app was last closed
+        self.file_queue.resume_persisted()
+
+    @property
+    def duplicate_detector(self):
+        """Created on first use: importing it loads numpy and imagehash (with scipy)."""
+        if self._duplicate_detector is None:
+            from core.duplicate_detector import DuplicateDetector
+            self._duplicate_detector = DuplicateDetector(self.config_manager, session_manager=self.session_manager, hash_cache=self.hash_cache,
+                                                         metadata_extractor=self.exif_manager)
+        return self._duplicate_detector
+
+    def closeEvent(self, event):
+        """Persists the open session's file manifest before the app quits."""
+        if self.stack.currentWidget() is self.sorter_view:
+            self.sorter_view.save_manifest()
+        
+        # Give queued moves a moment to finish, keep the rest for the next start
+        from PyQt6.QtWidgets import QApplication
+        from PyQt6.QtCore import Qt
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        self.file_queue.shutdown(timeout=10)
+        QApplication.restoreOverrideCursor()
+        
+        self.session_manager.flush()
+        self.session_manager.logger.info(
+            f"Session file written {self.session_manager.writes} times, {self.session_manager.writes_avoided} writes avoided"
+        )
+        self.media_loader.logger.info(f"Pixmap cache: {self.media_loader.cache_stats()}")
+        self.media_loader.shutdown()
+        self.thumbnail_cache.close()
+        self.metadata_index.close()
+        super().closeEvent(event)
 
     def load_stylesheet(self):
         style_path = Path(resource_path("assets/style.qss"))
@@ -118,7 +164,9 @@ class MainWindow(QMainWindow):
         self.stack.addWidget(self.duplicate_scan_screen)
         
         # 4. Duplicate Review Screen
-        self.duplicate_review_screen = DuplicateReviewScreen()
+        self.media_loader = MediaLoader(cache_budget_mb=self.config_manager.get("thumbnail_cache_size", 500),
+                                        thumbnail_cache=self.thumbnail_cache)
+        self.duplicate_review_screen = DuplicateReviewScreen(self.media_loader, self.thumbnail_cache)
         self.duplicate_review_screen.keep_left.connect(self.keep_left_image)
         self.duplicate_review_screen.keep_right.connect(self.keep_right_image)
         self.duplicate_review_screen.keep_both.connect(self.keep_both_images)
@@ -126,16 +174,24 @@ class MainWindow(QMainWindow):
         self.stack.addWidget(self.duplicate_review_screen)
         
         # 5. Sorter View
-        self.media_loader = MediaLoader()
         self.exif_manager = ExifManager()
-        self.sorter_view = SorterView(self.session_manager, self.media_loader, self.exif_manager)
-        self.sorter_view.close_session_clicked.connect(self.show_start_screen)
+        self.metadata_index = MetadataIndex(self.exif_manager, self.session_manager.db_path, is_busy=self.media_loader.is_busy)
+        self.sorter_view = SorterView(self.session_manager, self.media_loader, self.exif_manager, hash_cache=self.hash_cache, config_manager=self.config_manager,
+                                      thumbnail_cache=self.thumbnail_cache, file_queue=self.file_queue,
+                                      metadata_index=self.metadata_index)
+        self.sorter_view.close_session_clicked.connect(self.close_session)
         self.stack.addWidget(self.sorter_view)
 
     def show_start_screen(self):
         self.start_screen.refresh_sessions()
         self.stack.setCurrentWidget(self.start_screen)
 
+    def close_session(self):
+        """Back to the start screen. The closed session's pixmaps are released and the cache stats logged."""
+        self.media_loader.cancel_pending([])
+        self.media_loader.clear_cache()
+        self.show_start_screen()
+
     def show_new_session_screen(self):
         self.new_session_screen.reset_form()
         self.stack.setCurrentWidget(self.new_session_screen)
@@ -163,23 +219,12 @@ class MainWindow(QMainWindow):
         """Start duplicate detection scan."""
         self.stack.setCurrentWidget(self.duplicate_scan_screen)
         
-        # Use FileManager to get accurate count (recursively)
-        from core.file_manager import FileManager
-        file_manager = FileManager()
-        files = file_manager.scan_directory(source_path)
-        total_files = len(files)
-        
-        # Store initial_filecount in session before scan
-        if self.current_session_id:
-            session = self.session_manager.sessions.get(self.current_session_id)
-            if session:
-                session["initial_filecount"] = total_files
-                self.session_manager.save_sessions()
-        
-        self.duplicate_scan_screen.set_total_files(total_files)
+        # The file count is discovered while hashing runs, see on_scan_complete
+        self.duplicate_scan_screen.set_total_files(0)
         
         # Reset UI and state
         self.duplicate_scan_screen.is_complete = False
+        self.duplicate_scan_screen.is_scanning = True
         self.duplicate_scan_screen.progress_bar.setValue(0)
         self.duplicate_scan_screen.progress_percent.setText("0%")
         self.duplicate_scan_screen.action_btn.setText("Scan abbrechen")
@@ -203,9 +248,23 @@ class MainWindow(QMainWindow):
     
     def on_scan_complete(self, soft_duplicates):
         """Handle completion of duplicate scan."""
+        # Store initial_filecount now that the walk has finished
+        if self.current_session_id and self.scan_thread:
+            session = self.session_manager.sessions.get(self.current_session_id)
+            if session:
+                session["initial_filecount"] = self.scan_thread.discovered_count
+                self.session_manager.save_sessions()
+        
         self.duplicate_pairs = soft_duplicates
         self.total_duplicate_pairs = len(soft_duplicates)
         self.current_pair_index = 0
+        self.decided_pairs = set()
+        
+        if self.current_session_id:
+            self.session_manager.save_duplicate_pairs(self.current_session_id, soft_duplicates)
+        
+        # Prepare previews for the review in pair order
+        self.thumbnail_cache.prefill(path for pair in soft_duplicates for path in pair)
         
         # Mark scan as complete
         self.duplicate_scan_screen.set_complete()
@@ -222,6 +281,10 @@ class MainWindow(QMainWindow):
     def show_next_duplicate_pair(self):
         """Show next duplicate pair for manual review."""
         while self.current_pair_index < len(self.duplicate_pairs):
+            if self.current_pair_index in self.decided_pairs:
+                self.current_pair_index += 1
+                continue
+            
             # Check if files still exist (one might have been deleted in previous step)
             left_path_str, right_path_str = self.duplicate_pairs[self.current_pair_index]
             left_path = Path(left_path_str)
@@ -261,6 +324,7 @@ class MainWindow(QMainWindow):
             # Move right to trash
             if not self.duplicate_detector.move_to_trash(right_path, self.current_session_id):
                 QMessageBox.warning(self, "Fehler", f"Konnte Datei nicht löschen: {right_path}")
+            self.session_manager.record_pair_decision(self.current_session_id, self.current_pair_index, "keep_left")
             
             self.duplicate_review_screen.reset_processing()
             self.current_pair_index += 1
@@ -278,6 +342,7 @@ class MainWindow(QMainWindow):
             # Move left to trash
             if not self.duplicate_detector.move_to_trash(left_path, self.current_session_id):
                 QMessageBox.warning(self, "Fehler", f"Konnte Datei nicht löschen: {left_path}")
+            self.session_manager.record_pair_decision(self.current_session_id, self.current_pair_index, "keep_right")
             
             self.duplicate_review_screen.reset_processing()
             self.current_pair_index += 1
@@ -289,6 +354,7 @@ class MainWindow(QMainWindow):
         QTimer.singleShot(10, self._process_keep_both)
 
     def _process_keep_both(self):
+        self.session_manager.record_pair_decision(self.current_session_id, self.current_pair_index, "keep_both")
         self.duplicate_review_screen.reset_processing()
         self.current_pair_index += 1
         self.show_next_duplicate_pair()
@@ -299,8 +365,17 @@ class MainWindow(QMainWindow):
         self.show_sorter_view(self.current_session_id)
 
     def resume_session(self, session_id):
-        """Resume a session by opening the sorter view."""
-        self.show_sorter_view(session_id)
+        """Resume a session, continuing an unfinished duplicate review before the sorter view."""
+        stored_pairs = self.session_manager.load_duplicate_pairs(session_id)
+        if any(decision is None for _, _, decision in stored_pairs):
+            self.current_session_id = session_id
+            self.duplicate_pairs = [(left, right) for left, right, _ in stored_pairs]
+            self.total_duplicate_pairs = len(stored_pairs)
+            self.decided_pairs = {position for position, (_, _, decision) in enumerate(stored_pairs) if decision}
+            self.current_pair_index = 0
+            self.show_next_duplicate_pair()
+        else:
+            self.show_sorter_view(session_id)
     
     def show_sorter_view(self, session_id):
         """Show the sorter view for the given session."""
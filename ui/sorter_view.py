@@ -4,13 +4,12 @@ from PyQt6.QtWidgets import (
     QProgressBar, QSlider, QMessageBox, QInputDialog
 )
 from PyQt6.QtCore import Qt, pyqtSignal, QRectF, QSize, QUrl
-from PyQt6.QtGui import QPixmap, QIcon, QPainter, QColor, QFont
-from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
-from PyQt6.QtMultimediaWidgets import QVideoWidget
+from PyQt6.QtGui import QPixmap, QImage, QIcon, QPainter, QColor, QFont
 from pathlib import Path
 import os
 from utils.path_utils import resource_path
-import shutil
+from core.file_operation_queue import FileOperationQueue
+from core.session_journal import SessionJournal
 
 # Import breadcrumb navigation components
 from ui.components.breadcrumb_bar import BreadcrumbBar
@@ -18,20 +17,38 @@ from ui.components.shortcut_folder_panel import ShortcutFolderPanel
 from ui.components.stats_popup import StatsPopup
 from ui.components.completion_popup import CompletionPopup
 from ui.components.clickable_slider import ClickableSlider
+from ui.components.batch_exif_dialog import BatchExifDialog
 
 class SorterView(QWidget):
     """Main Sorter View Interface - 1:1 Mockup Implementation"""
     close_session_clicked = pyqtSignal()
 
-    def __init__(self, session_manager, media_loader, exif_manager):
+    def __init__(self, session_manager, media_loader, exif_manager, hash_cache=None, config_manager=None,
+                 thumbnail_cache=None, file_queue=None, metadata_index=None):
         super().__init__()
         self.session_manager = session_manager
         self.media_loader = media_loader
         self.exif_manager = exif_manager
+        self.hash_cache = hash_cache
+        self.thumbnail_cache = thumbnail_cache
+        self.metadata_index = metadata_index
+        # Moves run in the background so slow target drives don't freeze sorting
+        self.file_queue = file_queue or FileOperationQueue(hash_cache=hash_cache)
+        self.file_queue.operation_finished.connect(self.on_file_operation_finished)
+        self.file_queue.operation_failed.connect(self.on_file_operation_failed)
+        self.file_queue.pending_changed.connect(self.on_pending_operations_changed)
         self.current_session_id = None
         self.current_file_index = 0
         self.files = []
+        self.manifest = None  # Persistent file list of the session, see load_session
+        self.journal = None  # Sort actions since the manifest was saved
+        self.undo_stack = []  # Journal records of this visit, newest last
         self.zoom_level = 1.0
+        self.pending_image_path = None  # Image requested from the MediaLoader, not displayed yet
+        self.pending_full_res_path = None  # Full-resolution decode requested by zooming in
+        self.current_pixmap = None
+        self.prefetch_next = config_manager.get("prefetch_next", 3) if config_manager else 3
+        self.prefetch_previous = config_manager.get("prefetch_previous", 1) if config_manager else 1
         self.current_file_supports_exif = False  # Track if current file supports EXIF
         
         # Navigation state for breadcrumb system
@@ -47,13 +64,18 @@ class SorterView(QWidget):
         self.current_media_type = 'image'  # 'image' or 'video'
         self.video_initialized = False
         
-        # Connect media loaded signal
-        self.media_loader.image_loaded.connect(self.on_media_loaded)
+        # Connect media loaded signal (also fires for prefetched neighbours)
+        self.media_loader.image_loaded.connect(self.on_image_loaded)
+        self.media_loader.error_occurred.connect(self.on_image_load_error)
+        self.media_loader.preview_loaded.connect(self.on_preview_loaded)
         self.current_stats_popup = None
         
         # Enable keyboard focus
         self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
         
+        # Persist the remaining file list before the main window switches away
+        self.close_session_clicked.connect(self.save_manifest)
+        
         self.init_ui()
 
     # ---------------------------------------------------------------------
@@ -69,7 +91,9 @@ class SorterView(QWidget):
             event.accept()  # Consume event to prevent button activation
             return
 
-        if Qt.Key.Key_1 <= key <= Qt.Key.Key_9:
+        if key == Qt.Key.Key_Z and event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            self.undo_last_action()
+        elif Qt.Key.Key_1 <= key <= Qt.Key.Key_9:
             self.move_to_folder_by_index(key - Qt.Key.Key_1)
         elif key == Qt.Key.Key_Delete:
             self.delete_current_file()
@@ -159,6 +183,12 @@ class SorterView(QWidget):
         
         top_layout.addStretch()
         
+        # Pending background moves
+        self.pending_ops_label = QLabel("")
+        self.pending_ops_label.setStyleSheet("color: #E0A040; font-size: 13px;")
+        self.pending_ops_label.hide()
+        top_layout.addWidget(self.pending_ops_label)
+        
         # Progress label
         self.progress_label = QLabel("0 / 0 Medien")
         self.progress_label.setStyleSheet("color: #777; font-size: 13px;")
@@ -297,6 +327,7 @@ class SorterView(QWidget):
         media_stack_layout = QVBoxLayout(media_stack)
         media_stack_layout.setContentsMargins(0, 0, 0, 0)
         media_stack_layout.setSpacing(0)
+        self.media_stack_layout = media_stack_layout
         
         # Graphics view for images
         self.scene = QGraphicsScene()
@@ -312,11 +343,7 @@ class SorterView(QWidget):
         self.view.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
         media_stack_layout.addWidget(self.view)
         
-        # Video widget
-        self.video_widget = QVideoWidget()
-        self.video_widget.setStyleSheet("background: transparent;")
-        self.video_widget.hide()  # Hidden by default
-        media_stack_layout.addWidget(self.video_widget)
+        # Video widget and player are created on the first video (see ensure_media_player)
         
         layout.addWidget(media_stack, 1)  # Stretch factor 1
         
@@ -403,6 +430,24 @@ class SorterView(QWidget):
         
         layout.addWidget(self.video_controls_panel)
         
+        self.content_splitter.addWidget(self.media_container)
+
+    def ensure_media_player(self):
+        """
+        Creates the video widget and media player on first use.
+        QtMultimedia is only imported here, so sessions without videos or GIFs never load it.
+        """
+        if self.media_player is not None:
+            return
+        from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
+        from PyQt6.QtMultimediaWidgets import QVideoWidget
+        
+        # Video widget
+        self.video_widget = QVideoWidget()
+        self.video_widget.setStyleSheet("background: transparent;")
+        self.video_widget.hide()  # Hidden by default
+        self.media_stack_layout.addWidget(self.video_widget)
+        
         # Initialize media player
         self.media_player = QMediaPlayer()
         self.audio_output = QAudioOutput()
@@ -413,8 +458,6 @@ class SorterView(QWidget):
         self.media_player.positionChanged.connect(self.on_position_changed)
         self.media_player.durationChanged.connect(self.on_duration_changed)
         self.media_player.mediaStatusChanged.connect(self.on_media_status_changed)
-        
-        self.content_splitter.addWidget(self.media_container)
 
     def init_sidebar(self):
         self.sidebar = QWidget()
@@ -541,6 +584,23 @@ class SorterView(QWidget):
         self.is_editing = False
         layout.addWidget(self.edit_btn)
         
+        # Batch edit button (date/time offset/camera for many files)
+        self.batch_edit_btn = QPushButton("Mehrere Dateien bearbeiten…")
+        self.batch_edit_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.batch_edit_btn.setStyleSheet("""
+            QPushButton { 
+                background-color: transparent; 
+                color: #AAAAAA; 
+                border: 1px solid #3A3A3C; 
+                padding: 8px; 
+                border-radius: 6px; 
+                font-size: 12px; 
+            }
+            QPushButton:hover { color: #E0E0E0; border-color: #555; }
+        """)
+        self.batch_edit_btn.clicked.connect(self.open_batch_edit)
+        layout.addWidget(self.batch_edit_btn)
+        
         parent_layout.addLayout(layout)
         parent_layout.addSpacing(10)
 
@@ -805,7 +865,7 @@ class SorterView(QWidget):
         self.current_media_type = 'image'
         
         # Stop video playback if active
-        if self.media_player and self.media_player.playbackState() == QMediaPlayer.PlaybackState.PlayingState:
+        if self.media_player and self.media_player.playbackState() == self.media_player.PlaybackState.PlayingState:
             self.media_player.stop()
             
         # Ensure video widgets are hidden
@@ -820,6 +880,7 @@ class SorterView(QWidget):
         self.zoom_out_btn.show()
         
         self.scene.clear()
+        self.current_pixmap = pixmap
         if pixmap and not pixmap.isNull():
             self.scene.addPixmap(pixmap)
             self.scene.setSceneRect(QRectF(pixmap.rect())) # Explicitly set scene rect
@@ -845,6 +906,37 @@ class SorterView(QWidget):
             self.view.setDragMode(QGraphicsView.DragMode.ScrollHandDrag)
             self.view.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
             self.view.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        
+        # Past 1:1 the viewport-sized decode gets blurry: fetch the full image
+        if self.view.transform().m11() * self.devicePixelRatioF() > 1.0:
+            self.request_full_resolution()
+
+    def request_full_resolution(self):
+        """Decodes the current image at full resolution if only a downscaled version is shown."""
+        if self.current_media_type != 'image' or not self.files or self.current_pixmap is None:
+            return
+        file_path = self.files[self.current_file_index]
+        if self.pending_full_res_path == file_path or self.pending_image_path == file_path:
+            return
+        original = self.media_loader.original_size(file_path)
+        if original is None or self.current_pixmap.width() >= original.width():
+            return
+        self.pending_full_res_path = file_path
+        self.media_loader.load_media(file_path, full_resolution=True)
+
+    def swap_in_full_resolution(self, pixmap):
+        """Replaces the downscaled pixmap without changing what the user sees (zoom and position)."""
+        if self.current_pixmap is None or pixmap.width() <= self.current_pixmap.width():
+            return
+        ratio = self.current_pixmap.width() / pixmap.width()
+        center = self.view.mapToScene(self.view.viewport().rect().center()) / ratio
+        
+        self.scene.clear()
+        self.current_pixmap = pixmap
+        self.scene.addPixmap(pixmap)
+        self.scene.setSceneRect(QRectF(pixmap.rect()))
+        self.view.scale(ratio, ratio)
+        self.view.centerOn(center)
 
     def zoom_out(self):
         if self.zoom_level > 1.0:
@@ -884,6 +976,7 @@ class SorterView(QWidget):
         self.current_media_type = 'video'
         
         # Hide image view, show video view
+        self.ensure_media_player()
         self.view.hide()
         self.video_widget.show()
         self.video_controls_panel.show()
@@ -918,6 +1011,7 @@ class SorterView(QWidget):
         self.current_media_type = 'gif'
         
         # Hide image view, show video view
+        self.ensure_media_player()
         self.view.hide()
         self.video_widget.show()
         self.video_controls_panel.hide()  # Hide controls for GIFs
@@ -936,14 +1030,14 @@ class SorterView(QWidget):
         self.media_player.setSource(QUrl.fromLocalFile(str(file_path)))
         
         # Set to loop indefinitely
-        self.media_player.setLoops(QMediaPlayer.Loops.Infinite)
+        self.media_player.setLoops(self.media_player.Loops.Infinite)
         
         # Auto-play GIF
         self.media_player.play()
         
     def on_media_status_changed(self, status):
         """Handle media status changes."""
-        if status == QMediaPlayer.MediaStatus.LoadedMedia:
+        if status == self.media_player.MediaStatus.LoadedMedia:
             if not self.video_initialized:
                 # Video loaded - ready to play
                 self.video_initialized = True
@@ -951,7 +1045,7 @@ class SorterView(QWidget):
                 if self.current_media_type == 'video':
                     self.media_player.play()
                     
-        elif status == QMediaPlayer.MediaStatus.EndOfMedia:
+        elif status == self.media_player.MediaStatus.EndOfMedia:
             # Video ended - reset to play icon
             if self.current_media_type == 'video':  # Don't update for GIFs (they loop)
                 play_icon_path = Path(__file__).parent.parent / "assets" / "icons" / "play.svg"
@@ -960,7 +1054,9 @@ class SorterView(QWidget):
     
     def toggle_play_pause(self):
         """Toggle between play and pause states."""
-        if self.media_player.playbackState() == QMediaPlayer.PlaybackState.PlayingState:
+        if not self.media_player:
+            return
+        if self.media_player.playbackState() == self.media_player.PlaybackState.PlayingState:
             self.media_player.pause()
             # Set play icon
             play_icon_path = Path(__file__).parent.parent / "assets" / "icons" / "play.svg"
@@ -989,7 +1085,8 @@ class SorterView(QWidget):
     
     def on_slider_moved(self, position):
         """Seek to position when user drags the timeline slider."""
-        self.media_player.setPosition(position)
+        if self.media_player:
+            self.media_player.setPosition(position)
     
     def format_time(self, milliseconds):
         """Convert milliseconds to MM:SS format."""
@@ -1007,7 +1104,8 @@ class SorterView(QWidget):
             self.media_player.stop()
         
         # Show image view, hide video view
-        self.video_widget.hide()
+        if self.video_widget:
+            self.video_widget.hide()
         self.video_controls_panel.hide()
         self.view.show()
         
@@ -1165,10 +1263,81 @@ class SorterView(QWidget):
     # ---------------------------------------------------------------------
     # Media loading and file operations (basic implementations)
     # ---------------------------------------------------------------------
+    def request_image(self, file_path: str):
+        """Shows an image through the MediaLoader: instant on a cache hit, otherwise decoded in the background."""
+        self.pending_image_path = file_path
+        self.pending_full_res_path = None
+        self.media_loader.pin(file_path)
+        # Decode images at the size they are shown (also used by the prefetches that follow)
+        self.media_loader.set_target_size(self.view.viewport().size() * self.devicePixelRatioF())
+        self.media_loader.load_media(file_path)  # Emits image_loaded synchronously on a cache hit
+        if self.pending_image_path == file_path:
+            # Still decoding: show the cached preview, or at least don't leave the previous file on screen
+            preview = QPixmap()
+            data = self.thumbnail_cache.get(file_path, by_content=False) if self.thumbnail_cache else None
+            if data and preview.loadFromData(data):
+                self.display_image(preview)
+            else:
+                self.scene.clear()
+                # A moved or copied file's preview is found by content, on the loader thread
+                self.media_loader.load_preview(file_path)
+
+    def on_preview_loaded(self, file_path: str, image: QImage):
+        """Slot for MediaLoader.preview_loaded: shows the preview while the image is still decoding."""
+        if file_path == self.pending_image_path:
+            self.display_image(QPixmap.fromImage(image))
+
+    def on_image_loaded(self, file_path: str, pixmap: QPixmap):
+        """Slot for MediaLoader.image_loaded. Ignores prefetched files that are not current."""
+        if file_path == self.pending_full_res_path and self.pending_image_path is None:
+            self.pending_full_res_path = None
+            if self.files and self.files[self.current_file_index] == file_path:
+                self.swap_in_full_resolution(pixmap)
+            return
+        if file_path != self.pending_image_path:
+            return
+        self.pending_image_path = None
+        self.on_media_loaded(file_path, pixmap)
+
+    def on_image_load_error(self, file_path: str, message: str):
+        if file_path != self.pending_image_path:
+            return
+        self.pending_image_path = None
+        self.on_media_loaded(file_path, QPixmap())
+
+    def prefetch_neighbours(self):
+        """Decodes the next and previous images in the background and drops stale requests."""
+        if not self.files:
+            return
+        index = self.current_file_index
+        wanted = [self.files[index]]
+        for offset in range(1, max(self.prefetch_next, self.prefetch_previous) + 1):
+            if offset <= self.prefetch_next and index + offset < len(self.files):
+                wanted.append(self.files[index + offset])
+            if offset <= self.prefetch_previous and index - offset >= 0:
+                wanted.append(self.files[index - offset])
+
+        self.media_loader.cancel_pending(wanted)
+        self.media_loader.preload(
+            path for path in wanted[1:]
+            if not self.is_video_file(path) and not self.is_gif_file(path)
+        )
+
     def on_media_loaded(self, file_path: str, pixmap: QPixmap = None):
         """Handle the signal when a new media file is loaded.
         Loads the image/video and updates the file info label and EXIF data.
         """
+        # Size, dimensions, date and camera from the session index, else one read of the file
+        metadata = None
+        if self.metadata_index and self.current_session_id:
+            metadata = self.metadata_index.lookup(self.current_session_id, file_path)
+        if metadata is None:
+            # None if the file vanished; the placeholders below are shown instead
+            metadata = self.exif_manager.read_metadata(file_path)
+            if metadata and self.metadata_index and self.current_session_id and not self.is_video_file(file_path):
+                self.metadata_index.store(self.current_session_id, file_path, metadata)
+        size_mb = (metadata["filesize"] if metadata else 0) / (1024 * 1024)
+        
         # Check if it's a GIF file first
         if self.is_gif_file(file_path):
             self.display_gif(file_path)
@@ -1179,7 +1348,6 @@ class SorterView(QWidget):
                 self.file_icon_label.setPixmap(QPixmap(str(icon_path)).scaled(20, 20, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
             
             # For GIF, show file size
-            size_mb = Path(file_path).stat().st_size / (1024 * 1024)
             self.file_meta_label.setText(f"• {size_mb:.1f} MB • GIF")
             
         # Check if it's a video file
@@ -1192,7 +1360,6 @@ class SorterView(QWidget):
                 self.file_icon_label.setPixmap(QPixmap(str(icon_path)).scaled(20, 20, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
             
             # For video, we don't have dimensions from pixmap
-            size_mb = Path(file_path).stat().st_size / (1024 * 1024)
             self.file_meta_label.setText(f"• {size_mb:.1f} MB • Video")
             
         else:
@@ -1207,8 +1374,12 @@ class SorterView(QWidget):
             if icon_path.exists():
                 self.file_icon_label.setPixmap(QPixmap(str(icon_path)).scaled(20, 20, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
             
-            size_mb = Path(file_path).stat().st_size / (1024 * 1024)
-            dimensions = f"{pixmap.width()}x{pixmap.height()}" if not pixmap.isNull() else "Unknown"
+            # The pixmap may be a viewport-sized decode, so report the file's own size
+            if metadata and metadata["width"]:
+                dimensions = f"{metadata['width']}x{metadata['height']}"
+            else:
+                original = self.media_loader.original_size(file_path) if not pixmap.isNull() else None
+                dimensions = f"{original.width()}x{original.height()}" if original else "Unknown"
             self.file_meta_label.setText(f"• {size_mb:.1f} MB • {dimensions}")
         
         file_name = Path(file_path).name
@@ -1223,12 +1394,16 @@ class SorterView(QWidget):
         # Check if file supports EXIF
         self.current_file_supports_exif = self.exif_manager.supports_exif(file_path)
         
-        # Read and display EXIF data
+        self.show_metadata(metadata)
+        
+        # Update edit button state based on EXIF support
+        self.update_edit_button_state()
+
+    def show_metadata(self, metadata):
+        """Fills the camera, date and time fields of the sidebar."""
         try:
-            metadata = self.exif_manager.get_metadata(file_path)
-            
             # Update camera
-            camera = metadata.get("camera_model", "—")
+            camera = metadata.get("camera_model") or "Unknown"
             self.camera_value.setText(camera if camera != "Unknown" else "—")
             
             # Update date and time
@@ -1247,9 +1422,34 @@ class SorterView(QWidget):
             self.camera_value.setText("—")
             self.date_value.setText("—")
             self.time_value.setText("—")
-        
-        # Update edit button state based on EXIF support
-        self.update_edit_button_state()
+
+    def open_batch_edit(self):
+        """Opens the batch EXIF editor for the files still to be sorted."""
+        if not self.files:
+            return
+        current_file = self.files[min(self.current_file_index, len(self.files) - 1)]
+        index_data = {}
+        if self.metadata_index and self.current_session_id:
+            session_id = self.current_session_id
+            index_data = {
+                "metadata_lookup": lambda path: self.metadata_index.lookup(session_id, path),
+                "date_range": self.metadata_index.date_range(session_id),
+                "camera_models": [model for model, _ in self.metadata_index.camera_counts(session_id) if model],
+            }
+        dialog = BatchExifDialog(self.exif_manager, self.files, default_folder=str(Path(current_file).parent),
+                                 parent=self, **index_data)
+        dialog.batch_finished.connect(self.on_batch_edit_finished)
+        dialog.exec()
+
+    def on_batch_edit_finished(self, result):
+        """Shows the new values if the displayed file was part of the batch."""
+        if self.files and self.current_file_index < len(self.files):
+            current_file = self.files[self.current_file_index]
+            if current_file in result["updated"]:
+                try:
+                    self.show_metadata(self.exif_manager.get_metadata(current_file))
+                except Exception:
+                    pass
 
     def delete_current_file(self):
         """Moves the current file to a 'gelöscht_{session_id}' folder in the user's home directory."""
@@ -1261,12 +1461,6 @@ class SorterView(QWidget):
         
         current_file_path = Path(self.files[self.current_file_index])
         
-        # Get file size before moving
-        try:
-            file_size = current_file_path.stat().st_size
-        except Exception as e:
-            file_size = 0
-            
         # Use the same logic as DuplicateDetector for the trash folder
         # ~/Foto-Sortierer/gelöscht_{session_id}
         deleted_dir = Path(os.path.expanduser(f"~/Foto-Sortierer/gelöscht_{self.current_session_id}"))
@@ -1278,30 +1472,14 @@ class SorterView(QWidget):
             QMessageBox.critical(self, "Fehler", f"Konnte Papierkorb-Ordner nicht erstellen:\n{str(e)}")
             return
             
-        # Reuse move logic by moving to the deleted folder
-        # Store the file count before move
+        # Reuse move logic by moving to the deleted folder; it records the file as
+        # deleted, which the deleted count and size are derived from
         files_before = len(self.files)
         self.move_current_file(str(deleted_dir))
         
-        # If file was successfully moved (file list decreased), update deleted stats
-        if len(self.files) < files_before:
-            self.session_manager.update_deleted_stats(self.current_session_id, file_size)
-            
-            # Update progress after deletion
-            if self.current_session_id:
-                session = self.session_manager.sessions.get(self.current_session_id)
-                if session:
-                    initial_count = session.get("initial_filecount", 0)
-                    sorted_count = session.get("sorted_files", 0)
-                    deleted_count = session.get("deleted_count", 0)
-                    
-                    processed = sorted_count + deleted_count
-                    self.update_progress(processed, initial_count)
-            
-            # Check for completion
-            if not self.files:
-                self.show_completion_popup()
-                return
+        # Check for completion
+        if len(self.files) < files_before and not self.files:
+            self.show_completion_popup()
 
     def create_new_folder_dialog(self):
         """Opens a dialog to create a new folder in the target directory."""
@@ -1351,27 +1529,21 @@ class SorterView(QWidget):
             self.media_player.setSource(QUrl())
 
         # Update internal state (remove from list as it's processed)
-        self.files.pop(self.current_file_index)
-        
-        # Update session stats
+        kept_path = self.files.pop(self.current_file_index)
+        if self.manifest is not None:
+            # Stays in the source folder, so the manifest must not pick it up again as new
+            self.manifest["kept"].append(kept_path)
+        if self.journal:
+            self.undo_stack.append(self.journal.append("keep", kept_path, index=self.current_file_index))
         if self.current_session_id:
-            session = self.session_manager.sessions.get(self.current_session_id)
-            if session:
-                session["sorted_files"] = session.get("sorted_files", 0) + 1
-                self.session_manager.save_sessions()
-                
-                # Update progress bar
-                initial_count = session.get("initial_filecount", 0)
-                sorted_count = session.get("sorted_files", 0)
-                deleted_count = session.get("deleted_count", 0)
-                
-                processed = sorted_count + deleted_count
-                self.update_progress(processed, initial_count)
-                
-                # Check for completion
-                if not self.files:
-                    self.show_completion_popup()
-                    return
+            # Counts as sorted: the counters are derived from the file history
+            self.session_manager.record_file_state(self.current_session_id, kept_path, "kept")
+            self.refresh_progress()
+            
+            # Check for completion
+            if not self.files:
+                self.show_completion_popup()
+                return
         
         # Load next file
         if self.current_file_index >= len(self.files):
@@ -1399,12 +1571,12 @@ class SorterView(QWidget):
 
         target_path = target_dir / current_file_path.name
         
-        # Handle filename collision
-        if target_path.exists():
+        # Handle filename collision (including moves that are still queued)
+        if target_path.exists() or self.file_queue.is_reserved(target_path):
             base = target_path.stem
             suffix = target_path.suffix
             counter = 1
-            while target_path.exists():
+            while target_path.exists() or self.file_queue.is_reserved(target_path):
                 target_path = target_dir / f"{base}_{counter}{suffix}"
                 counter += 1
 
@@ -1414,34 +1586,42 @@ class SorterView(QWidget):
             self.media_player.setSource(QUrl())
 
         try:
-            shutil.move(str(current_file_path), str(target_path))
-            
-            # Update internal state
-            self.files.pop(self.current_file_index)
-            
             # Check if this is a sorting operation (not deletion)
             # Deletion goes to ~/Foto-Sortierer/gelöscht_{session_id}
             is_deletion = "gelöscht_" in str(target_dir)
             
-            # Update session stats - only increment sorted_files if sorting (not deleting)
+            # The move itself runs in the background; the view advances right away
+            # and on_file_operation_failed undoes the bookkeeping if it fails
+            file_size = current_file_path.stat().st_size
+            if self.journal:
+                # Written ahead of the move, so a crash before it completes can be recovered
+                self.undo_stack.append(self.journal.append(
+                    "delete" if is_deletion else "move", current_file_path, target_path,
+                    size=file_size, index=self.current_file_index
+                ))
+            self.file_queue.move(
+                current_file_path, target_path,
+                session_id=self.current_session_id,
+                index=self.current_file_index,
+                is_deletion=is_deletion,
+                size=file_size
+            )
+            if self.current_session_id:
+                self.session_manager.record_file_state(
+                    self.current_session_id, current_file_path,
+                    "deleted" if is_deletion else "moved", target_path, file_size
+                )
+            self.media_loader.invalidate(str(current_file_path))
+            
+            # Update internal state
+            self.files.pop(self.current_file_index)
+            
+            # Deletions check for completion in delete_current_file
             if self.current_session_id and not is_deletion:
-                session = self.session_manager.sessions.get(self.current_session_id)
-                if session:
-                    session["sorted_files"] = session.get("sorted_files", 0) + 1
-                    self.session_manager.save_sessions()
-                    
-                    # Update progress bar
-                    initial_count = session.get("initial_filecount", 0)
-                    sorted_count = session.get("sorted_files", 0)
-                    deleted_count = session.get("deleted_count", 0)
-                    
-                    processed = sorted_count + deleted_count
-                    self.update_progress(processed, initial_count)
-                    
-                    # Check for completion
-                    if not self.files:
-                        self.show_completion_popup()
-                        return
+                self.refresh_progress()
+                if not self.files:
+                    self.show_completion_popup()
+                    return
             
             # Load next file (index stays same because we popped the current one)
             # But if we were at the last item, we need to adjust
@@ -1453,6 +1633,147 @@ class SorterView(QWidget):
         except Exception as e:
             QMessageBox.critical(self, "Fehler", f"Fehler beim Verschieben der Datei:\n{str(e)}")
 
+    def on_file_operation_finished(self, operation):
+        """A background operation completed: finishes undos and trash removals."""
+        if operation.get("undo"):
+            self.finish_undo(operation["record"], operation.get("session_id"))
+        elif operation["kind"] == "remove_tree":
+            QMessageBox.information(
+                self,
+                "Erfolgreich gelöscht",
+                f"Alle {operation.get('file_count', 0)} gelöschten Dateien wurden endgültig gelöscht."
+            )
+
+    def on_file_operation_failed(self, operation, message):
+        """A background move failed: mark the file pending again (reverting the counters) and put it back in the list."""
+        if operation["kind"] == "remove_tree":
+            QMessageBox.critical(
+                self,
+                "Fehler beim Löschen",
+                f"Die Dateien konnten nicht gelöscht werden:\n{message}"
+            )
+            return
+        if operation.get("undo"):
+            # If the original move failed as well, the file never left and that failure was reported
+            if not Path(operation["destination"]).exists():
+                if operation.get("session_id") == self.current_session_id:
+                    self.undo_stack.append(operation["record"])
+                QMessageBox.warning(self, "Fehler", f"Rückgängig machen fehlgeschlagen:\n{message}")
+            return
+        
+        session_id = operation.get("session_id")
+        session = self.session_manager.sessions.get(session_id)
+        
+        # Journal the revert (in the session's own journal, even if another session is open)
+        if session_id == self.current_session_id and self.journal:
+            journal = self.journal
+        else:
+            journal = SessionJournal(self.session_manager.journal_path(session_id))
+        journal.append("failed", operation["source"], operation["destination"], size=operation.get("size", 0),
+                       index=operation.get("index"), reverts="delete" if operation.get("is_deletion") else "move")
+        if journal is not self.journal:
+            journal.close()
+        for i in range(len(self.undo_stack) - 1, -1, -1):
+            if self.undo_stack[i]["src"] == operation["source"]:
+                del self.undo_stack[i]
+                break
+        self.session_manager.record_file_state(session_id, operation["source"], "pending")
+        
+        if session_id == self.current_session_id and Path(operation["source"]).exists():
+            index = min(operation.get("index", len(self.files)), len(self.files))
+            self.files.insert(index, operation["source"])
+            self.refresh_progress()
+            if len(self.files) == 1:
+                self.current_file_index = 0
+                self.load_current_file()
+            elif index <= self.current_file_index:
+                # Keep the file on screen, it just moved one position back
+                self.current_file_index += 1
+        
+        QMessageBox.warning(
+            self, "Fehler",
+            f"Fehler beim Verschieben der Datei:\n{Path(operation['source']).name}\n\n{message}"
+        )
+
+    def undo_last_action(self):
+        """
+        Ctrl+Z: reverts the latest keep/move/delete of this session and shows the file again.
+        A moved file is moved back on the file queue, after the original move;
+        finish_undo does the bookkeeping once it is back.
+        """
+        if not self.undo_stack or not self.current_session_id:
+            return
+        record = self.undo_stack.pop()
+        
+        if record["op"] in ("move", "delete"):
+            self.file_queue.move(record["dst"], record["src"], session_id=self.current_session_id, undo=True, record=record)
+            return
+        if self.manifest is not None and record["src"] in self.manifest["kept"]:
+            self.manifest["kept"].remove(record["src"])
+        self.finish_undo(record, self.current_session_id)
+
+    def finish_undo(self, record, session_id):
+        """Marks the file of an undone action pending again (reverting the counters) and puts it back in the list."""
+        src = record["src"]
+        if record.get("dst"):
+            self.media_loader.invalidate(record["dst"])
+        self.session_manager.record_file_state(session_id, src, "pending")
+        
+        # The undo may complete after another session was opened; it belongs to its own journal
+        if session_id != self.current_session_id:
+            journal = SessionJournal(self.session_manager.journal_path(session_id))
+            journal.append("undo", src)
+            journal.close()
+            return
+        self.journal.append("undo", src)
+        
+        index = min(record.get("index") or 0, len(self.files))
+        self.files.insert(index, src)
+        self.current_file_index = index
+        self.load_current_file()
+
+    def replay_journal(self, session, manifest):
+        """
+        Applies the journal on top of the manifest checkpoint after a crash:
+        drops files that were already sorted, brings the file history (and with it
+        the counters) up to date and re-queues moves that were journaled but never completed.
+        """
+        records = self.journal.read()
+        actions = SessionJournal.effective_actions(records)
+        if not actions and not manifest.get("in_flight"):
+            return
+        self.session_manager.logger.info(f"Replaying {len(actions)} journaled actions")
+        
+        done = {a["src"] for a in actions if a["op"] != "failed"}
+        manifest["files"] = [entry for entry in manifest["files"] if entry[0] not in done]
+        manifest["kept"].extend(a["src"] for a in actions if a["op"] == "keep")
+        # The file history may have missed the last writes as well
+        states = {"keep": "kept", "move": "moved", "delete": "deleted", "failed": "pending"}
+        for a in actions:
+            self.session_manager.record_file_state(session["id"], a["src"], states[a["op"]], a.get("dst"), a.get("size", 0))
+        # Files whose actions were all undone
+        for src in {r["src"] for r in records if r.get("op") == "undo"} - {a["src"] for a in actions}:
+            self.session_manager.record_file_state(session["id"], src, "pending")
+        for a in actions:
+            if a["op"] == "failed" and Path(a["src"]).exists():
+                stat = os.stat(a["src"])
+                manifest["files"].insert(min(a.get("index") or 0, len(manifest["files"])),
+                                         [a["src"], stat.st_size, stat.st_mtime])
+        
+        in_flight = manifest.pop("in_flight", []) + [a for a in actions if a["op"] in ("move", "delete")]
+        for a in in_flight:
+            if (Path(a["src"]).exists() and not Path(a["dst"]).exists()
+                    and not self.file_queue.is_reserved(a["dst"])):
+                self.file_queue.move(a["src"], a["dst"], session_id=session["id"], index=a.get("index"),
+                                     is_deletion=a["op"] == "delete", size=a.get("size", 0))
+
+    def on_pending_operations_changed(self, count):
+        if count:
+            self.pending_ops_label.setText(f"{count} Verschiebung{'en' if count != 1 else ''} ausstehend")
+            self.pending_ops_label.show()
+        else:
+            self.pending_ops_label.hide()
+
     def load_session(self, session_id):
         """Loads a session and initializes the view with files."""
         self.current_session_id = session_id
@@ -1462,11 +1783,32 @@ class SorterView(QWidget):
 
         self.session_name_label.setText(f"Session: {session.get('name', 'Unbenannt')}")
         
-        # Load files
+        # Load files: resume from the stored manifest and only diff it against the disk;
+        # a full walk of the source tree is needed only for the first load
         from core.file_manager import FileManager
         file_manager = FileManager()
-        media_files = file_manager.scan_directory(session["source_path"])
-        self.files = [f["path"] for f in media_files]
+        if self.journal:
+            self.journal.close()
+        self.journal = SessionJournal(self.session_manager.journal_path(session_id))
+        self.undo_stack = []
+        manifest = self.session_manager.load_manifest(session_id)
+        if manifest and manifest.get("source_path") == session["source_path"]:
+            self.replay_journal(session, manifest)
+            # Files with a queued move are still in the source folder, but not pending
+            in_flight = {op["source"] for op in self.file_queue.pending_operations()}
+            manifest = file_manager.refresh_manifest(manifest, ignore=in_flight)
+        else:
+            manifest = file_manager.build_manifest(session["source_path"])
+        self.manifest = manifest
+        self.files = [entry[0] for entry in manifest["files"]]
+        self.save_manifest()
+        
+        # Generate missing previews in the background, in sorting order
+        if self.thumbnail_cache:
+            self.thumbnail_cache.prefill(self.files)
+        # Index date, camera and dimensions of all files in the background
+        if self.metadata_index:
+            self.metadata_index.index_session(self.current_session_id, self.files)
         
         # Update session with file counts if not set (for sessions without duplicate detection)
         if session.get("initial_filecount", 0) == 0:
@@ -1480,11 +1822,7 @@ class SorterView(QWidget):
         self.update_navigation_ui()
         
         # Update progress
-        initial_count = session.get("initial_filecount", len(self.files))
-        sorted_count = session.get("sorted_files", 0)
-        deleted_count = session.get("deleted_count", 0)
-        processed = sorted_count + deleted_count
-        self.update_progress(processed, initial_count)
+        self.refresh_progress()
         
         # Reset index and load first file
         self.current_file_index = 0
@@ -1493,6 +1831,51 @@ class SorterView(QWidget):
         # Set focus to view to capture keyboard events
         self.setFocus()
 
+    def save_manifest(self):
+        """
+        Writes the remaining files of the current session back to its manifest.
+        This is the journal's checkpoint: still-queued moves are stored with it,
+        and the journal starts over.
+        """
+        if not self.current_session_id or self.manifest is None:
+            return
+        entries = {entry[0]: entry for entry in self.manifest["files"]}
+        files = []
+        for path in self.files:
+            entry = entries.get(path)
+            if entry is None:
+                # Put back into the list after the manifest was last saved (e.g. a failed move)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entry = [path, stat.st_size, stat.st_mtime]
+            files.append(entry)
+        self.manifest["files"] = files
+        
+        # Checkpoints of older versions stored the counters; they come from the file history now
+        self.manifest.pop("counters", None)
+        self.manifest["in_flight"] = [
+            {"op": "delete" if op.get("is_deletion") else "move", "src": op["source"], "dst": op["destination"],
+             "size": op.get("size", 0), "index": op.get("index")}
+            for op in self.file_queue.pending_operations()
+            if op["kind"] == "move" and op.get("session_id") == self.current_session_id and not op.get("undo")
+        ]
+        # The file history must be on disk before the journal that could rebuild it is truncated
+        self.session_manager.save_sessions()
+        self.session_manager.flush()
+        self.session_manager.save_manifest(self.current_session_id, self.manifest)
+        if self.journal:
+            self.journal.truncate()
+
+    def refresh_progress(self):
+        """Updates the progress bar from the session's counters, which are derived from the file history."""
+        session = self.session_manager.sessions.get(self.current_session_id) if self.current_session_id else None
+        if not session:
+            return
+        stats = self.session_manager.get_session_stats(self.current_session_id)
+        self.update_progress(stats["sorted_files"] + stats["deleted_count"], session.get("initial_filecount", len(self.files)))
+
     def update_progress(self, processed, total):
         """Updates the progress bar and label."""
         if total > 0:
@@ -1513,17 +1896,15 @@ class SorterView(QWidget):
             
         if 0 <= self.current_file_index < len(self.files):
             file_path = self.files[self.current_file_index]
-            self.on_media_loaded(file_path)
+            if self.is_gif_file(file_path) or self.is_video_file(file_path):
+                self.pending_image_path = None
+                self.on_media_loaded(file_path)
+            else:
+                self.request_image(file_path)
+            self.prefetch_neighbours()
             
             # Update progress display from session data
-            if self.current_session_id:
-                session = self.session_manager.sessions.get(self.current_session_id)
-                if session:
-                    initial_count = session.get("initial_filecount", len(self.files))
-                    sorted_count = session.get("sorted_files", 0)
-                    deleted_count = session.get("deleted_count", 0)
-                    processed = sorted_count + deleted_count
-                    self.update_progress(processed, initial_count)
+            self.refresh_progress()
         else:
              # Fallback if index is out of bounds (e.g. after deletion)
             if self.files:
@@ -1548,7 +1929,8 @@ class SorterView(QWidget):
             self.current_stats_popup = None
         
         # Create new popup
-        popup = StatsPopup(session, self)
+        # Counters from the per-file history rather than the running tallies
+        popup = StatsPopup({**session, **self.session_manager.get_session_stats(self.current_session_id)}, self)
         self.current_stats_popup = popup
         
         # Position popup: Top-right corner of popup under bottom-right corner of button
@@ -1582,7 +1964,7 @@ class SorterView(QWidget):
         overlay.show()
         
         # Create and show custom completion popup
-        popup = CompletionPopup(session, self)
+        popup = CompletionPopup({**session, **self.session_manager.get_session_stats(self.current_session_id)}, self)
         
         # Connect signals
         popup.close_requested.connect(self.close_session_clicked.emit)
@@ -1704,21 +2086,9 @@ class SorterView(QWidget):
         msg_box.exec()
         
         if msg_box.clickedButton() == ja_button:
-            try:
-                shutil.rmtree(deleted_folder)
-                
-                # Do NOT update session stats - keep them as they are
-                
-                QMessageBox.information(
-                    self,
-                    "Erfolgreich gelöscht",
-                    f"Alle {file_count} gelöschten Dateien wurden endgültig gelöscht."
-                )
-            except Exception as e:
-                QMessageBox.critical(
-                    self,
-                    "Fehler beim Löschen",
-                    f"Die Dateien konnten nicht gelöscht werden:\n{str(e)}"
-                )
+            # Queued behind deletions that are still on their way into the folder;
+            # on_file_operation_finished reports the result.
+            # Do NOT update session stats - keep them as they are
+            self.file_queue.remove_tree(deleted_folder, session_id=self.current_session_id, file_count=file_count)
 
 